@@ -0,0 +1,6 @@
+"""
+Paquete benchmarks: generador de datos sintéticos y mediciones de rendimiento.
+Se ejecuta sin conexión con `python -m benchmarks.bench_core`.
+"""
+
+__all__ = ["generador", "bench_core", "bench_formatos", "carga_servidor"]
@@ -0,0 +1,460 @@
+"""Benchmarks de las operaciones principales sobre datos sintéticos.
+
+Uso:
+    python -m benchmarks.bench_core --tamanos 1000 10000 --salida resultados.json
+    python -m benchmarks.bench_core --tamanos 1000 --comparar resultados.json
+
+Cada operación se mide con `time.perf_counter` tras una preparación no cronometrada.
+Las operaciones de coste cuadrático se omiten por encima de `--limite-cuadratico`
+para que las ejecuciones con 10⁵–10⁶ libros terminen en un tiempo razonable.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+from src import persistencia
+from src.clases import Libro, Biblioteca, GrafoLibros, ColaSolicitudes
+from src.recomendador import RecomendadorSimilitud, CoPrestamos
+from src.estadisticas import EstadisticasCirculacion
+from src.vencimientos import IndiceVencimientos
+from benchmarks.generador import SEMILLA, generar_escenario
+
+TAMANOS = [1000, 10000]
+REPETICIONES = 3
+LIMITE_CUADRATICO = 5000
+
+# Registro de casos: (nombre, preparar, cuadratico). `preparar(escenario)`
+# devuelve una función sin argumentos que es lo único que se cronometra.
+CASOS = []
+
+
+def caso(nombre: str, cuadratico: bool = False):
+    def registrar(preparar):
+        CASOS.append((nombre, preparar, cuadratico))
+        return preparar
+    return registrar
+
+
+def clonar_libros(libros: list) -> list:
+    return [Libro(l.titulo, l.autor, l.genero, l.year, l.disponible, id_libro=l.id) for l in libros]
+
+
+def biblioteca_de(libros: list, ordenada: bool = False, tam_cache: int = 0) -> Biblioteca:
+    # sin caché por defecto: las repeticiones medirían aciertos en lugar del recorrido
+    b = Biblioteca(tam_cache=tam_cache)
+    b.libros = clonar_libros(libros)
+    if ordenada:
+        b.libros.sort(key=lambda l: l.titulo.lower())
+    return b
+
+
+def _titulo_medio(esc: dict) -> str:
+    return esc["libros"][len(esc["libros"]) // 2].titulo
+
+
+# ---------- Biblioteca ----------
+@caso("biblioteca.buscar_por_titulo")
+def _buscar_titulo(esc):
+    b = biblioteca_de(esc["libros"])
+    return lambda: b.buscar_por_titulo("anillo")
+
+
+@caso("biblioteca.buscar_por_autor")
+def _buscar_autor(esc):
+    b = biblioteca_de(esc["libros"])
+    return lambda: b.buscar_por_autor("garcía")
+
+
+@caso("biblioteca.buscar_por_genero")
+def _buscar_genero(esc):
+    b = biblioteca_de(esc["libros"])
+    return lambda: b.buscar_por_genero("fantasía")
+
+
+@caso("biblioteca.buscar_por_año")
+def _buscar_year(esc):
+    b = biblioteca_de(esc["libros"])
+    return lambda: b.buscar_por_año(1954)
+
+
+@caso("biblioteca.buscar_disponibles")
+def _buscar_disponibles(esc):
+    b = biblioteca_de(esc["libros"])
+    return lambda: b.buscar_disponibles()
+
+
+@caso("biblioteca.buscar_por_genero (caché)")
+def _buscar_genero_cache(esc):
+    b = biblioteca_de(esc["libros"], tam_cache=256)
+    b.buscar_por_genero("fantasía")  # el primer fallo no se cronometra
+    return lambda: b.buscar_por_genero("fantasía")
+
+
+@caso("biblioteca.buscar_difuso")
+def _buscar_difuso(esc):
+    b = biblioteca_de(esc["libros"])
+    b.indice_difuso()  # la construcción del índice no se cronometra
+    return lambda: b.buscar_difuso("Castilo Oscuro", presupuesto_ms=1000)
+
+
+@caso("biblioteca.consultar")
+def _consultar(esc):
+    b = biblioteca_de(esc["libros"])
+    b.indices_consulta()
+    return lambda: b.consultar(genero="fantasía", year_desde=1950, year_hasta=1970, disponible=True)
+
+
+@caso("biblioteca.autocompletar_titulo")
+def _autocompletar_titulo(esc):
+    b = biblioteca_de(esc["libros"])
+    b.indice_prefijos()
+    prefijo = _titulo_medio(esc)[:6]
+    return lambda: b.autocompletar_titulo(prefijo, 8)
+
+
+@caso("biblioteca.ordenar_por_titulo")
+def _ordenar(esc):
+    b = biblioteca_de(esc["libros"])
+    return b.ordenar_por_titulo
+
+
+@caso("biblioteca.agregar_libro")
+def _agregar(esc):
+    b = biblioteca_de(esc["libros"], ordenada=True)
+    nuevo = Libro("Libro de prueba del benchmark", "Autor", "Ensayo", 2024)
+    return lambda: b.agregar_libro(nuevo)
+
+
+@caso("biblioteca.actualizar_libro")
+def _actualizar(esc):
+    b = biblioteca_de(esc["libros"], ordenada=True)
+    titulo = _titulo_medio(esc)
+    return lambda: b.actualizar_libro(titulo, autor="Autor actualizado")
+
+
+@caso("biblioteca.eliminar_libro")
+def _eliminar(esc):
+    b = biblioteca_de(esc["libros"], ordenada=True)
+    titulo = _titulo_medio(esc)
+    return lambda: b.eliminar_libro(titulo)
+
+
+@caso("biblioteca.libro_por_id")
+def _libro_por_id(esc):
+    b = biblioteca_de(esc["libros"], ordenada=True)
+    b.indice_ids()
+    id_libro = esc["libros"][len(esc["libros"]) // 2].id
+    return lambda: b.libro_por_id(id_libro)
+
+
+# ---------- Grafo ----------
+@caso("grafo.build_from_biblioteca", cuadratico=True)
+def _grafo_build(esc):
+    b = biblioteca_de(esc["libros"])
+    g = GrafoLibros()
+    return lambda: g.build_from_biblioteca(b)
+
+
+@caso("grafo.recomendaciones", cuadratico=True)
+def _grafo_recomendaciones(esc):
+    b = biblioteca_de(esc["libros"])
+    g = GrafoLibros()
+    g.build_from_biblioteca(b)
+    libro = b.libros[len(b.libros) // 2]
+    return lambda: g.recomendaciones(libro)
+
+
+@caso("grafo.recomendaciones_tras_baja", cuadratico=True)
+def _grafo_recomendaciones_tras_baja(esc):
+    # cada baja obliga a recalcular las componentes en la siguiente consulta
+    b = biblioteca_de(esc["libros"])
+    g = GrafoLibros()
+    g.build_from_biblioteca(b)
+    libro, otro = b.libros[len(b.libros) // 2], b.libros[-1]
+
+    def baja_y_consulta():
+        g.remover_libro(otro)
+        g.agregar_libro(otro)
+        return g.recomendaciones(libro)
+    return baja_y_consulta
+
+
+@caso("grafo.tamano_componente", cuadratico=True)
+def _grafo_tamano_componente(esc):
+    b = biblioteca_de(esc["libros"])
+    g = GrafoLibros()
+    g.build_from_biblioteca(b)
+    ids = [l.id for l in b.libros[::max(1, len(b.libros) // 100)]]
+    return lambda: [g.tamano_componente(i) for i in ids]
+
+
+# ---------- Recomendador por similitud ----------
+@caso("recomendador.construir")
+def _recomendador_construir(esc):
+    r = RecomendadorSimilitud()
+    return lambda: r.construir(esc["libros"])
+
+
+@caso("recomendador.similares")
+def _recomendador_similares(esc):
+    r = RecomendadorSimilitud(esc["libros"])
+    libro = esc["libros"][len(esc["libros"]) // 2]
+    return lambda: r.similares(libro, 10)
+
+
+@caso("coprestamos.construir")
+def _coprestamos_construir(esc):
+    co = CoPrestamos()
+    return lambda: co.construir(esc["prestamos"])
+
+
+@caso("estadisticas.construir")
+def _estadisticas_construir(esc):
+    e = EstadisticasCirculacion()
+    return lambda: e.construir(esc["libros"], esc["prestamos"])
+
+
+@caso("coprestamos.tambien_prestados")
+def _coprestamos_consulta(esc):
+    co = CoPrestamos(esc["prestamos"])
+    libro = esc["prestamos"][len(esc["prestamos"]) // 2].libro
+    return lambda: co.tambien_prestados(libro)
+
+
+# ---------- Vencimientos ----------
+def _ahora_vencimientos(esc) -> int:
+    # fecha que deja vencida aproximadamente una décima parte de los préstamos activos
+    fechas = sorted(p.fecha_vencimiento for p in esc["prestamos"] if p.fecha_devolucion is None)
+    return fechas[len(fechas) // 10] if fechas else 0
+
+
+@caso("vencimientos.vencidos (recorrido)")
+def _vencidos_recorrido(esc):
+    ahora = _ahora_vencimientos(esc)
+    prestamos = esc["prestamos"]
+    return lambda: sorted((p for p in prestamos if p.fecha_devolucion is None and p.fecha_vencimiento <= ahora),
+                          key=lambda p: p.fecha_vencimiento)
+
+
+@caso("vencimientos.vencidos")
+def _vencidos_indice(esc):
+    ahora = _ahora_vencimientos(esc)
+    indice = IndiceVencimientos(esc["prestamos"])
+    return lambda: indice.vencidos(ahora)
+
+
+@caso("vencimientos.proximos")
+def _proximos_indice(esc):
+    ahora = _ahora_vencimientos(esc)
+    indice = IndiceVencimientos(esc["prestamos"])
+    return lambda: indice.proximos(7, ahora)
+
+
+# ---------- Cola ----------
+@caso("cola.ordenadas")
+def _cola_ordenadas(esc):
+    cola = ColaSolicitudes.from_dict_list([s.to_dict() for s in esc["solicitudes"]])
+    return cola.ordenadas
+
+
+@caso("cola.procesar", cuadratico=True)
+def _cola_procesar(esc):
+    b = biblioteca_de(esc["libros"])
+    cola = ColaSolicitudes.from_dict_list([s.to_dict() for s in esc["solicitudes"]])
+    return lambda: cola.procesar(esc["usuarios"], b, [])
+
+
+# ---------- Persistencia ----------
+def _guardar(nombre_archivo, clave):
+    def preparar(esc):
+        return lambda: persistencia.guardar_datos(nombre_archivo, esc[clave])
+    return preparar
+
+
+for _nombre, _clave in (("libros.json", "libros"), ("usuarios.json", "usuarios"),
+                        ("prestamos.json", "prestamos"), ("solicitudes.json", "solicitudes")):
+    caso(f"persistencia.guardar_datos[{_nombre}]")(_guardar(_nombre, _clave))
+
+
+@caso("persistencia.guardar_prestamos_activos")
+def _guardar_activos(esc):
+    # lo que se reescribe en cada préstamo o devolución desde que los devueltos van al historial
+    activos = [p for p in esc["prestamos"] if p.fecha_devolucion is None]
+    return lambda: persistencia.guardar_datos("prestamos.json", activos)
+
+
+@caso("persistencia.iterar_historial")
+def _iterar_historial(esc):
+    shutil.rmtree(os.path.join(persistencia.DATA_DIR, persistencia.HISTORIAL), ignore_errors=True)
+    persistencia.archivar_registros(p.to_dict() for p in esc["prestamos"] if p.fecha_devolucion is not None)
+    return lambda: sum(1 for _ in persistencia.iterar_historial())
+
+
+@caso("persistencia.guardar_grafo", cuadratico=True)
+def _guardar_grafo(esc):
+    g = GrafoLibros()
+    g.build_from_biblioteca(biblioteca_de(esc["libros"]))
+    datos = g.to_dict()
+    return lambda: persistencia.guardar_grafo("grafo.json", datos)
+
+
+@caso("persistencia.cargar_libros")
+def _cargar_libros(esc):
+    persistencia.guardar_datos("libros.json", esc["libros"])
+    return persistencia.cargar_libros
+
+
+@caso("persistencia.cargar_usuarios")
+def _cargar_usuarios(esc):
+    persistencia.guardar_datos("usuarios.json", esc["usuarios"])
+    return persistencia.cargar_usuarios
+
+
+@caso("persistencia.cargar_prestamos")
+def _cargar_prestamos(esc):
+    persistencia.guardar_datos("prestamos.json", esc["prestamos"])
+    libros = clonar_libros(esc["libros"])
+    return lambda: persistencia.cargar_prestamos(libros, esc["usuarios"])
+
+
+@caso("catalogo_binario.buscar_titulo")
+def _catalogo_binario_buscar(esc):
+    # abrir + búsqueda binaria + un Libro, frente a persistencia.cargar_libros
+    persistencia.guardar_catalogo_binario(esc["libros"])
+    titulo = _titulo_medio(esc)
+
+    def buscar():
+        with persistencia.abrir_catalogo_binario() as catalogo:
+            return catalogo.libro_por_titulo(titulo)
+    return buscar
+
+
+@caso("persistencia.cargar_solicitudes")
+def _cargar_solicitudes(esc):
+    persistencia.guardar_datos("solicitudes.json", esc["solicitudes"])
+    return persistencia.cargar_solicitudes
+
+
+@caso("persistencia.cargar_grafo", cuadratico=True)
+def _cargar_grafo(esc):
+    g = GrafoLibros()
+    g.build_from_biblioteca(biblioteca_de(esc["libros"]))
+    persistencia.guardar_grafo("grafo.json", g.to_dict())
+    return lambda: persistencia.cargar_grafo("grafo.json")
+
+
+# ---------- Ejecución ----------
+def medir(preparar, escenario: dict, repeticiones: int) -> dict:
+    """Cronometra `repeticiones` ejecuciones, preparando el estado antes de cada una."""
+    tiempos = []
+    for _ in range(repeticiones):
+        funcion = preparar(escenario)
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return {
+        "segundos_min": min(tiempos),
+        "segundos_media": sum(tiempos) / len(tiempos),
+        "repeticiones": repeticiones,
+    }
+
+
+def ejecutar(tamanos=None, repeticiones: int = REPETICIONES, limite_cuadratico: int = LIMITE_CUADRATICO,
+             semilla: int = SEMILLA, filtro: str = None, progreso=None) -> dict:
+    """Ejecuta todos los casos registrados para cada tamaño y devuelve un informe JSON-serializable."""
+    tamanos = tamanos or TAMANOS
+    resultados = []
+    data_dir_original = persistencia.DATA_DIR
+    try:
+        with tempfile.TemporaryDirectory() as directorio:
+            persistencia.DATA_DIR = directorio
+            for n in tamanos:
+                escenario = generar_escenario(n, semilla)
+                for nombre, preparar, cuadratico in CASOS:
+                    if filtro and filtro not in nombre:
+                        continue
+                    fila = {"operacion": nombre, "tamano": n}
+                    if cuadratico and n > limite_cuadratico:
+                        fila["omitido"] = f"coste cuadrático por encima de {limite_cuadratico}"
+                    else:
+                        try:
+                            fila.update(medir(preparar, escenario, repeticiones))
+                        except Exception as e:
+                            # registrar el fallo (p. ej. recursión del quicksort) sin abortar la suite
+                            fila["error"] = f"{type(e).__name__}: {e}"
+                    resultados.append(fila)
+                    if progreso:
+                        progreso(fila)
+    finally:
+        persistencia.DATA_DIR = data_dir_original
+
+    return {
+        "meta": {
+            "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "semilla": semilla,
+            "repeticiones": repeticiones,
+            "limite_cuadratico": limite_cuadratico,
+        },
+        "resultados": resultados,
+    }
+
+
+def comparar(actual: dict, anterior: dict) -> list:
+    """Empareja resultados por (operación, tamaño) y devuelve la razón actual/anterior del mínimo."""
+    previos = {(r["operacion"], r["tamano"]): r for r in anterior.get("resultados", [])}
+    filas = []
+    for r in actual.get("resultados", []):
+        p = previos.get((r["operacion"], r["tamano"]))
+        if p and "segundos_min" in r and "segundos_min" in p and p["segundos_min"] > 0:
+            filas.append((r["operacion"], r["tamano"], p["segundos_min"], r["segundos_min"],
+                          r["segundos_min"] / p["segundos_min"]))
+    return filas
+
+
+def _describir(fila: dict) -> str:
+    if "segundos_min" in fila:
+        return f"{fila['segundos_min'] * 1000:10.3f} ms"
+    return fila.get("error") or fila.get("omitido", "")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de la biblioteca sobre datos sintéticos.")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=TAMANOS, help="número de libros por escenario")
+    parser.add_argument("--repeticiones", type=int, default=REPETICIONES)
+    parser.add_argument("--limite-cuadratico", type=int, default=LIMITE_CUADRATICO)
+    parser.add_argument("--semilla", type=int, default=SEMILLA)
+    parser.add_argument("--filtro", help="solo ejecutar operaciones cuyo nombre contenga este texto")
+    parser.add_argument("--salida", help="archivo JSON donde guardar los resultados")
+    parser.add_argument("--comparar", help="archivo JSON de una ejecución anterior")
+    args = parser.parse_args(argv)
+
+    informe = ejecutar(args.tamanos, args.repeticiones, args.limite_cuadratico, args.semilla, args.filtro,
+                       progreso=lambda f: print(f"{f['operacion']:<45} n={f['tamano']:<8} {_describir(f)}"))
+
+    if args.salida:
+        carpeta = os.path.dirname(args.salida)
+        if carpeta:
+            os.makedirs(carpeta, exist_ok=True)
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(informe, f, indent=2, ensure_ascii=False)
+        print(f"\nResultados guardados en {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as f:
+            anterior = json.load(f)
+        print("\nComparación (mínimo actual / mínimo anterior):")
+        for operacion, n, antes, ahora, razon in comparar(informe, anterior):
+            marca = "  <-- regresión" if razon > 1.2 else ""
+            print(f"{operacion:<45} n={n:<8} {antes * 1000:9.3f} ms -> {ahora * 1000:9.3f} ms  x{razon:.2f}{marca}")
+
+
+if __name__ == "__main__":
+    main()
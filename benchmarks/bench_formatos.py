@@ -0,0 +1,101 @@
+"""Tamaño en disco frente a tiempo de guardado y carga de cada formato de `data/`.
+
+Guarda y vuelve a cargar libros.json y prestamos.json de un escenario sintético
+con cada combinación de JSON legible (indent=2) o compacto y sin comprimir o con
+gzip, lzma (xz) o bz2, e imprime una tabla para elegir el formato según el disco
+y la CPU disponibles (ver BIBLIOTECA_COMPRESION y BIBLIOTECA_JSON_COMPACTO en
+`src.persistencia`). Trabaja en un directorio temporal (no toca `data/`).
+
+Uso:
+    python -m benchmarks.bench_formatos --libros 10000 20000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from src import persistencia
+from benchmarks.generador import SEMILLA, generar_escenario
+
+LIBROS = [10000]
+REPETICIONES = 3
+
+# (nombre, compacto, extensión)
+FORMATOS = [
+    ("json indent=2", False, ""),
+    ("json compacto", True, ""),
+    ("indent=2 + gz", False, ".gz"),
+    ("compacto + gz", True, ".gz"),
+    ("compacto + xz", True, ".xz"),
+    ("compacto + bz2", True, ".bz2"),
+]
+
+
+def _minimo(funcion, repeticiones: int) -> float:
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        transcurrido = time.perf_counter() - inicio
+        mejor = transcurrido if mejor is None else min(mejor, transcurrido)
+    return mejor
+
+
+def medir_formato(escenario: dict, compacto: bool, extension: str, repeticiones: int = REPETICIONES) -> list:
+    """Filas {coleccion, bytes, guardar, cargar} (segundos mínimos) para un formato."""
+    persistencia.JSON_COMPACTO = compacto
+    persistencia.COMPRESION = {"*": extension}
+    libros, usuarios = escenario["libros"], escenario["usuarios"]
+    casos = [
+        ("libros.json", libros, persistencia.cargar_libros),
+        ("prestamos.json", escenario["prestamos"], lambda: persistencia.cargar_prestamos(libros, usuarios)),
+    ]
+    filas = []
+    for nombre, objetos, cargar in casos:
+        guardar = _minimo(lambda: persistencia.guardar_datos(nombre, objetos), repeticiones)
+        filas.append({
+            "coleccion": nombre,
+            "bytes": os.path.getsize(persistencia._ruta_datos(nombre)),
+            "guardar": guardar,
+            "cargar": _minimo(cargar, repeticiones),
+        })
+    return filas
+
+
+def ejecutar(tamanos=None, repeticiones: int = REPETICIONES, semilla: int = SEMILLA, progreso=None) -> list:
+    originales = (persistencia.DATA_DIR, persistencia.JSON_COMPACTO, persistencia.COMPRESION)
+    resultados = []
+    try:
+        for n in tamanos or LIBROS:
+            escenario = generar_escenario(n, semilla)
+            for formato, compacto, extension in FORMATOS:
+                # directorio nuevo por formato: la carga no debe encontrar la variante anterior
+                with tempfile.TemporaryDirectory() as directorio:
+                    persistencia.DATA_DIR = directorio
+                    for fila in medir_formato(escenario, compacto, extension, repeticiones):
+                        fila.update(formato=formato, tamano=n)
+                        resultados.append(fila)
+                        if progreso:
+                            progreso(fila)
+    finally:
+        persistencia.DATA_DIR, persistencia.JSON_COMPACTO, persistencia.COMPRESION = originales
+    return resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tamaño y tiempos de guardado/carga de cada formato de data/.")
+    parser.add_argument("--libros", type=int, nargs="+", default=LIBROS, help="libros (y préstamos) por escenario")
+    parser.add_argument("--repeticiones", type=int, default=REPETICIONES)
+    parser.add_argument("--semilla", type=int, default=SEMILLA)
+    args = parser.parse_args(argv)
+
+    print(f"{'formato':<16} {'colección':<15} {'n':>8} {'KiB':>10} {'guardar':>12} {'cargar':>12}")
+    ejecutar(args.libros, args.repeticiones, args.semilla,
+             progreso=lambda f: print(f"{f['formato']:<16} {f['coleccion']:<15} {f['tamano']:>8} "
+                                      f"{f['bytes'] / 1024:>10.1f} {f['guardar'] * 1000:>9.1f} ms "
+                                      f"{f['cargar'] * 1000:>9.1f} ms"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Prueba de carga del servidor HTTP/JSON (`src.servidor`).
+
+Abre `--conexiones` clientes keep-alive que lanzan peticiones sin pausa durante
+`--duracion` segundos y mide peticiones por segundo y latencias (p50/p95/p99).
+La mezcla por defecto es de lectura (búsquedas y recomendaciones); con
+`--escrituras 0.2` un 20 % de las peticiones son préstamos/devoluciones.
+
+Sin `--puerto` arranca un servidor en otro proceso sobre datos sintéticos en un
+directorio temporal (no toca `data/`).
+
+Uso:
+    python -m benchmarks.carga_servidor --libros 2000 --conexiones 20 --duracion 5
+    python -m benchmarks.carga_servidor --puerto 8080 --escrituras 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import quote
+
+from src import persistencia
+from benchmarks.generador import SEMILLA, generar_escenario
+
+HOST = "127.0.0.1"
+LIBROS = 2000
+CONEXIONES = 20
+DURACION = 5.0
+
+
+def _percentil(valores: list, p: float) -> float:
+    if not valores:
+        return 0.0
+    return valores[min(len(valores), max(1, math.ceil(p / 100 * len(valores)))) - 1]
+
+
+async def _peticion(reader, writer, metodo: str, ruta: str, cuerpo: dict = None):
+    datos = json.dumps(cuerpo).encode("utf-8") if cuerpo is not None else b""
+    writer.write(f"{metodo} {ruta} HTTP/1.1\r\nHost: {HOST}\r\nContent-Length: {len(datos)}\r\n\r\n"
+                 .encode("latin-1") + datos)
+    await writer.drain()
+    estado = int((await reader.readline()).split()[1])
+    largo = 0
+    while True:
+        linea = await reader.readline()
+        if linea in (b"\r\n", b"\n", b""):
+            break
+        clave, _, valor = linea.decode("latin-1").partition(":")
+        if clave.strip().lower() == "content-length":
+            largo = int(valor)
+    respuesta = await reader.readexactly(largo)
+    return estado, respuesta
+
+
+def _siguiente(azar: random.Random, titulos: list, usuarios: list, escrituras: float, prestados: list):
+    """Elige la próxima petición de la mezcla."""
+    if escrituras and azar.random() < escrituras:
+        if prestados and azar.random() < 0.5:
+            return "POST", "/devoluciones", {"titulo": prestados.pop(azar.randrange(len(prestados)))}
+        titulo = azar.choice(titulos)
+        prestados.append(titulo)
+        return "POST", "/prestamos", {"id_usuario": azar.choice(usuarios), "titulo": titulo}
+    titulo = azar.choice(titulos)
+    if azar.random() < 0.7:
+        palabra = titulo.split()[-1]
+        return "GET", f"/libros?titulo={quote(palabra)}&limite=20", None
+    return "GET", f"/recomendaciones?titulo={quote(titulo)}&limite=20", None
+
+
+async def _cliente(n: int, host: str, puerto: int, fin: float, titulos: list, usuarios: list,
+                   escrituras: float, semilla: int, latencias: list, estados: dict):
+    azar = random.Random(semilla + n)
+    prestados = []
+    reader, writer = await asyncio.open_connection(host, puerto)
+    try:
+        while time.perf_counter() < fin:
+            metodo, ruta, cuerpo = _siguiente(azar, titulos, usuarios, escrituras, prestados)
+            inicio = time.perf_counter()
+            estado, _ = await _peticion(reader, writer, metodo, ruta, cuerpo)
+            latencias.append(time.perf_counter() - inicio)
+            estados[estado] = estados.get(estado, 0) + 1
+    finally:
+        writer.close()
+
+
+async def medir(host: str, puerto: int, titulos: list, usuarios: list, conexiones: int = CONEXIONES,
+                duracion: float = DURACION, escrituras: float = 0.0, semilla: int = SEMILLA) -> dict:
+    """Lanza la carga contra un servidor ya en marcha y devuelve el resumen."""
+    latencias, estados = [], {}
+    inicio = time.perf_counter()
+    fin = inicio + duracion
+    await asyncio.gather(*(_cliente(n, host, puerto, fin, titulos, usuarios, escrituras, semilla,
+                                    latencias, estados) for n in range(conexiones)))
+    total = time.perf_counter() - inicio
+    latencias.sort()
+    return {
+        "conexiones": conexiones,
+        "peticiones": len(latencias),
+        "segundos": round(total, 3),
+        "peticiones_por_segundo": round(len(latencias) / total, 1) if total else 0.0,
+        "p50_ms": round(_percentil(latencias, 50) * 1000, 3),
+        "p95_ms": round(_percentil(latencias, 95) * 1000, 3),
+        "p99_ms": round(_percentil(latencias, 99) * 1000, 3),
+        "max_ms": round(latencias[-1] * 1000, 3) if latencias else 0.0,
+        "estados": {str(k): v for k, v in sorted(estados.items())},
+    }
+
+
+def _puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind((HOST, 0))
+        return s.getsockname()[1]
+
+
+async def _esperar_puerto(puerto: int, proceso, limite: float = 60.0):
+    fin = time.perf_counter() + limite
+    while time.perf_counter() < fin:
+        if proceso.poll() is not None:
+            raise RuntimeError("el servidor terminó antes de aceptar conexiones")
+        try:
+            _, writer = await asyncio.open_connection(HOST, puerto)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise TimeoutError("el servidor no respondió a tiempo")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga del servidor HTTP/JSON de la biblioteca.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--puerto", type=int, help="servidor ya en marcha; si se omite se arranca uno")
+    parser.add_argument("--libros", type=int, default=LIBROS, help="tamaño del catálogo sintético")
+    parser.add_argument("--conexiones", type=int, default=CONEXIONES)
+    parser.add_argument("--duracion", type=float, default=DURACION, help="segundos de carga")
+    parser.add_argument("--escrituras", type=float, default=0.0, help="fracción de préstamos/devoluciones")
+    parser.add_argument("--semilla", type=int, default=SEMILLA)
+    parser.add_argument("--salida", help="guardar el resumen en JSON")
+    args = parser.parse_args(argv)
+
+    escenario = generar_escenario(args.libros, args.semilla)
+    titulos = [l.titulo for l in escenario["libros"]]
+    usuarios = [u.id for u in escenario["usuarios"]]
+
+    with tempfile.TemporaryDirectory() as directorio:
+        proceso = None
+        puerto = args.puerto
+        if puerto is None:
+            original = persistencia.DATA_DIR
+            try:
+                persistencia.DATA_DIR = directorio
+                persistencia.guardar_datos("libros.json", escenario["libros"])
+                persistencia.guardar_datos("usuarios.json", escenario["usuarios"])
+            finally:
+                persistencia.DATA_DIR = original
+            puerto = _puerto_libre()
+            codigo = (f"from src import persistencia, servidor\n"
+                      f"persistencia.DATA_DIR = {directorio!r}\n"
+                      f"servidor.main(['--puerto', '{puerto}'])\n")
+            proceso = subprocess.Popen([sys.executable, "-c", codigo], stdout=subprocess.DEVNULL)
+        try:
+            if proceso is not None:
+                asyncio.run(_esperar_puerto(puerto, proceso))
+            resumen = asyncio.run(medir(args.host, puerto, titulos, usuarios, args.conexiones,
+                                        args.duracion, args.escrituras, args.semilla))
+        finally:
+            if proceso is not None:
+                proceso.terminate()
+                proceso.wait(timeout=30)
+
+    resumen["libros"] = args.libros
+    print(f"{resumen['peticiones']} peticiones en {resumen['segundos']} s con {resumen['conexiones']} conexiones: "
+          f"{resumen['peticiones_por_segundo']} req/s")
+    print(f"latencia p50 {resumen['p50_ms']} ms · p95 {resumen['p95_ms']} ms · p99 {resumen['p99_ms']} ms "
+          f"· máx {resumen['max_ms']} ms · estados {resumen['estados']}")
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(resumen, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
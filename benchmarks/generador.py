@@ -0,0 +1,112 @@
+"""Generador determinista de datos sintéticos para los benchmarks.
+
+Con la misma semilla y los mismos tamaños siempre se obtienen los mismos libros,
+usuarios, préstamos y solicitudes, de modo que los resultados de distintas
+ejecuciones son comparables.
+"""
+
+import random
+from datetime import datetime
+
+from src.clases import Libro, Usuario, Prestamo, SolicitudPrestamo
+
+SEMILLA = 1234
+
+SUSTANTIVOS = [
+    "Anillo", "Bosque", "Castillo", "Dragón", "Espejo", "Fuego", "Guardián", "Hechizo",
+    "Imperio", "Jardín", "Laberinto", "Mar", "Noche", "Océano", "Príncipe", "Reino",
+    "Señor", "Tierra", "Viento", "Sombra", "Corazón", "Niño", "Ciudad", "Estrella",
+]
+ADJETIVOS = [
+    "Perdido", "Oscuro", "Eterno", "Dorado", "Olvidado", "Secreto", "Último", "Salvaje",
+    "Silencioso", "Invisible", "Antiguo", "Rojo", "Azul", "Errante", "Dormido", "Rápido",
+]
+NOMBRES = [
+    "Ana", "Bruno", "Carmen", "Diego", "Elena", "Fabián", "Gabriela", "Héctor",
+    "Inés", "Jorge", "Lucía", "Martín", "Nuria", "Óscar", "Paula", "Raúl",
+]
+APELLIDOS = [
+    "García", "Martínez", "López", "Sánchez", "Pérez", "Gómez", "Fernández", "Díaz",
+    "Ruiz", "Hernández", "Jiménez", "Moreno", "Álvarez", "Romero", "Navarro", "Torres",
+]
+GENEROS = [
+    "Fantasía", "Fantasía épica", "Ciencia ficción", "Novela histórica", "Misterio",
+    "Terror", "Romance", "Poesía", "Ensayo", "Biografía", "Infantil", "Juvenil",
+    "Aventura", "Policíaca", "Distopía", "Humor", "Filosofía", "Divulgación científica",
+]
+
+FECHA_BASE = datetime(2020, 1, 1)
+
+
+def generar_libros(n: int, semilla: int = SEMILLA) -> list:
+    """Devuelve n libros con títulos únicos, autores repetidos y géneros variados."""
+    rnd = random.Random(semilla)
+    n_autores = max(1, n // 10)
+    autores = [f"{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)} {rnd.choice(APELLIDOS)} {i}" for i in range(n_autores)]
+    libros = []
+    for i in range(n):
+        # el sufijo numérico garantiza títulos únicos sin perder variedad alfabética
+        titulo = f"El {rnd.choice(SUSTANTIVOS)} {rnd.choice(ADJETIVOS)} {i}"
+        libros.append(Libro(
+            titulo,
+            rnd.choice(autores),
+            rnd.choice(GENEROS),
+            rnd.randint(1850, 2024),
+            disponible=rnd.random() < 0.8,
+            id_libro=f"libro-{i}",  # ids deterministas, como el resto de los datos
+        ))
+    rnd.shuffle(libros)
+    return libros
+
+
+def generar_usuarios(n: int, semilla: int = SEMILLA) -> list:
+    """Devuelve n usuarios; aproximadamente uno de cada cinco es profesor."""
+    rnd = random.Random(semilla + 1)
+    return [
+        Usuario(f"{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)}", f"u{i:07d}",
+                "profesor" if rnd.random() < 0.2 else "estudiante")
+        for i in range(n)
+    ]
+
+
+def _fecha(rnd: random.Random) -> int:
+    return int(FECHA_BASE.timestamp()) + rnd.randint(0, 5 * 365 * 24 * 3600)
+
+
+def generar_prestamos(n: int, usuarios: list, libros: list, semilla: int = SEMILLA) -> list:
+    """Devuelve n préstamos sobre los usuarios y libros dados.
+    La mayoría están devueltos; el resto quedan activos."""
+    rnd = random.Random(semilla + 2)
+    prestamos = []
+    for _ in range(n):
+        p = Prestamo(rnd.choice(usuarios), rnd.choice(libros), _fecha(rnd))
+        if rnd.random() < 0.9:
+            p.fecha_devolucion = _fecha(rnd)
+        prestamos.append(p)
+    return prestamos
+
+
+def generar_solicitudes(n: int, usuarios: list, libros: list, semilla: int = SEMILLA) -> list:
+    """Devuelve n solicitudes de préstamo con el tipo de usuario ya asignado."""
+    rnd = random.Random(semilla + 3)
+    solicitudes = []
+    for _ in range(n):
+        u = rnd.choice(usuarios)
+        libro = rnd.choice(libros)
+        s = SolicitudPrestamo(u.id, libro.titulo, _fecha(rnd), id_libro=libro.id)
+        s.tipo_usuario = u.tipo
+        solicitudes.append(s)
+    return solicitudes
+
+
+def generar_escenario(n_libros: int, semilla: int = SEMILLA) -> dict:
+    """Genera un escenario completo proporcional a n_libros:
+    n/10 usuarios, n préstamos y n/10 solicitudes en cola."""
+    libros = generar_libros(n_libros, semilla)
+    usuarios = generar_usuarios(max(1, n_libros // 10), semilla)
+    return {
+        "libros": libros,
+        "usuarios": usuarios,
+        "prestamos": generar_prestamos(n_libros, usuarios, libros, semilla),
+        "solicitudes": generar_solicitudes(max(1, n_libros // 10), usuarios, libros, semilla),
+    }
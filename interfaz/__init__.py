@@ -3,4 +3,4 @@ Paquete interfaz: módulos de la interfaz de usuario.
 Archivo __init__ vacío para permitir imports de paquete (p.ej. import interfaz.menu).
 """
 
-__all__ = ["menu", "biblioteca", "decoracion", "interfaz", "joson"]
+__all__ = ["menu", "biblioteca", "decoracion", "interfaz", "joson", "paginacion", "autocompletado"]
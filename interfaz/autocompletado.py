@@ -0,0 +1,43 @@
+"""Autocompletado con TAB en los `input()` de la interfaz.
+
+`completado_tab(completar)` instala, mientras dura el bloque `with`, un
+completador de readline que delega en `completar(prefijo, k)` (p. ej.
+`Biblioteca.autocompletar_titulo`). La línea entera cuenta como prefijo, así que
+los títulos con espacios se completan bien. Sin readline (Windows) no hace nada
+y la interfaz sigue ofreciendo las sugerencias como lista numerada. No depende de `rich`.
+"""
+
+from contextlib import contextmanager
+
+try:
+    import readline
+except ImportError:  # readline es opcional
+    readline = None
+
+TAM_SUGERENCIAS = 8
+
+
+@contextmanager
+def completado_tab(completar, k: int = TAM_SUGERENCIAS):
+    if readline is None:
+        yield
+        return
+    coincidencias = []
+
+    def completador(texto, estado):
+        if estado == 0:
+            coincidencias[:] = completar(texto, k)
+        return coincidencias[estado] if estado < len(coincidencias) else None
+
+    anterior, separadores = readline.get_completer(), readline.get_completer_delims()
+    readline.set_completer(completador)
+    readline.set_completer_delims("")
+    if "libedit" in (readline.__doc__ or ""):  # readline de macOS
+        readline.parse_and_bind("bind ^I rl_complete")
+    else:
+        readline.parse_and_bind("tab: complete")
+    try:
+        yield
+    finally:
+        readline.set_completer(anterior)
+        readline.set_completer_delims(separadores)
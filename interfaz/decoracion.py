@@ -9,7 +9,8 @@ from pathlib import Path
 import json
 import random
 from src.persistencia import cargar_libros as _persist_cargar_libros, guardar_datos, cargar_grafo, guardar_grafo
-from src.clases import Libro
+from src.clases import Libro, nuevo_id_libro
+from src.indices import normalizar
 
 # -----------------------
 # Config colores pastel
@@ -45,13 +46,14 @@ def guardar_libros_from_dicts(libros_dicts):
             year = int(d.get("year")) if d.get("year") not in (None, "") else None
         except Exception:
             year = None
-        objetos.append(Libro(d.get("titulo"), d.get("autor"), genero, year, d.get("disponible", True)))
+        objetos.append(Libro(d.get("titulo"), d.get("autor"), genero, year, d.get("disponible", True),
+                             id_libro=d.get("id"), isbn=d.get("isbn")))
     guardar_datos("libros.json", objetos)
 
-def asegurar_grafo_agrega(titulo):
+def asegurar_grafo_agrega(id_libro):
     g = cargar_grafo("grafo.json") or {}
-    if titulo not in g:
-        g[titulo] = []
+    if id_libro not in g:
+        g[id_libro] = []
         guardar_grafo("grafo.json", g)
 
 # -----------------------
@@ -123,7 +125,7 @@ def buscar_libro():
     libros = cargar_libros()
     resultados = [
         libro for libro in libros
-        if termino.lower() in libro.get("titulo", "").lower()
+        if normalizar(termino) in normalizar(libro.get("titulo", ""))
     ]
 
     if not resultados:
@@ -175,11 +177,11 @@ def agregar_libro():
     year = Prompt.ask(f"[{MORADO}]Año[/]").strip() or ""
     categoria = Prompt.ask(f"[{MORADO}]Categoría[/]").strip() or "General"
 
-    libro_dict = {"titulo": titulo, "autor": autor, "year": year, "categoria": categoria}
+    libro_dict = {"id": nuevo_id_libro(), "titulo": titulo, "autor": autor, "year": year, "categoria": categoria}
     libros = cargar_libros()
     libros.append(libro_dict)
     guardar_libros_from_dicts(libros)
-    asegurar_grafo_agrega(titulo)
+    asegurar_grafo_agrega(libro_dict["id"])
     console.print(Panel(f"[bold green]Libro agregado:[/bold green] {titulo}", border_style="green"))
 
 # -----------------------
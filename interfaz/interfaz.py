@@ -7,9 +7,16 @@ from rich.prompt import Prompt, Confirm
 from rich.align import Align
 from pathlib import Path
 import json
-import random
-from src.persistencia import cargar_libros as _persist_cargar_libros, guardar_datos, cargar_grafo, guardar_grafo, cargar_usuarios, cargar_prestamos, cargar_solicitudes
-from src.clases import Libro, Usuario, Prestamo, Biblioteca, GrafoLibros, SolicitudPrestamo, ColaSolicitudes
+from src.persistencia import cargar_libros as _persist_cargar_libros, guardar_datos, cargar_grafo, guardar_grafo, cargar_usuarios, cargar_prestamos, cargar_solicitudes, colecciones_modificadas, archivar_devueltos, iterar_historial
+from src.clases import Libro, Usuario, Prestamo, Biblioteca, GrafoLibros, SolicitudPrestamo, ColaSolicitudes, formatear_fecha
+from src import metricas
+from interfaz.paginacion import Paginador, TAM_PAGINA
+from src.importacion import importar_catalogo, guardar_rechazados
+from src.recomendador import RecomendadorSimilitud, CoPrestamos
+from src.estadisticas import EstadisticasCirculacion
+from src.vencimientos import IndiceVencimientos, DIAS_AVISO
+from src.indices import IndicePrefijos, normalizar
+from interfaz.autocompletado import completado_tab, TAM_SUGERENCIAS
 
 # --------------------------------------------------
 # Inicializar datos y estructuras (igual que menú clásico)
@@ -19,6 +26,11 @@ biblioteca = Biblioteca()
 biblioteca.libros = _persist_cargar_libros()
 usuarios = cargar_usuarios()
 prestamos = cargar_prestamos(biblioteca.libros, usuarios)
+# prestamos.json solo guarda los activos: los devueltos que queden (datos anteriores) pasan al historial
+if archivar_devueltos(prestamos):
+    guardar_datos("prestamos.json", prestamos)
+# IDs de usuario para autocompletar (los títulos los mantiene la biblioteca)
+prefijos_usuarios = IndicePrefijos(u.id for u in usuarios)
 
 # cola de solicitudes
 solicitudes_data = cargar_solicitudes()
@@ -31,6 +43,9 @@ grafo.build_from_biblioteca(biblioteca)
 # persistir el grafo reconstruido (asegura consistencia)
 guardar_grafo("grafo.json", grafo.to_dict())
 
+# recomendaciones por similitud (se construye al primer uso)
+recomendador = RecomendadorSimilitud()
+
 # procesar cola al inicio
 procesados_inicio = cola.procesar(usuarios, biblioteca, prestamos)
 if procesados_inicio:
@@ -38,6 +53,13 @@ if procesados_inicio:
     guardar_datos("libros.json", biblioteca.libros)
     guardar_datos("solicitudes.json", cola.to_list())
 
+# "quienes leyeron X también leyeron", a partir del historial de préstamos
+coprestamos = CoPrestamos(prestamos, historial=iterar_historial(), libros=biblioteca.libros)
+# panel de circulación: contadores que se actualizan con cada préstamo, devolución, alta o baja
+estadisticas = EstadisticasCirculacion(biblioteca.libros, prestamos, iterar_historial())
+# préstamos activos por fecha de vencimiento (las devoluciones se quitan solas)
+vencimientos = IndiceVencimientos(prestamos)
+
 # -----------------------
 # Config colores pastel
 # -----------------------
@@ -45,6 +67,9 @@ ROSA = "#f7cce6"
 MORADO = "#d5b8ff"
 BLANCO = "white"
 
+# Opción oculta del menú principal para consultar la instrumentación
+OPCION_METRICAS = "m"
+
 # -----------------------
 # Rutas y consola
 # -----------------------
@@ -70,17 +95,38 @@ def guardar_libros_from_dicts(libros_dicts):
             year = int(d.get("year")) if d.get("year") not in (None, "") else None
         except Exception:
             year = None
-        objetos.append(Libro(d.get("titulo"), d.get("autor"), genero, year, d.get("disponible", True)))
+        objetos.append(Libro(d.get("titulo"), d.get("autor"), genero, year, d.get("disponible", True),
+                             id_libro=d.get("id"), isbn=d.get("isbn")))
     # ordenar usando la implementación de quicksort de Biblioteca
     b_temp = Biblioteca()
     b_temp.libros = objetos
     b_temp.ordenar_por_titulo()
     guardar_datos("libros.json", b_temp.libros)
 
-def asegurar_grafo_agrega(titulo):
+def sincronizar():
+    """Recarga en memoria las colecciones que otra terminal haya modificado en data/."""
+    cambiadas = set(colecciones_modificadas())
+    if not cambiadas:
+        return
+    if "libros.json" in cambiadas:
+        biblioteca.libros = _persist_cargar_libros()
+        grafo.build_from_biblioteca(biblioteca)
+    if "usuarios.json" in cambiadas:
+        usuarios[:] = cargar_usuarios()
+        prefijos_usuarios.construir(u.id for u in usuarios)
+    if cambiadas & {"libros.json", "usuarios.json", "prestamos.json"}:
+        # los préstamos enlazan objetos Libro/Usuario: reconstruirlos si cambió cualquiera
+        prestamos[:] = cargar_prestamos(biblioteca.libros, usuarios)
+        coprestamos.construir(prestamos, iterar_historial(), biblioteca.libros)
+        estadisticas.construir(biblioteca.libros, prestamos, iterar_historial())
+        vencimientos.construir(prestamos)
+    if "solicitudes.json" in cambiadas:
+        cola.solicitudes = ColaSolicitudes.from_dict_list(cargar_solicitudes()).solicitudes
+
+def asegurar_grafo_agrega(id_libro):
     g = cargar_grafo("grafo.json") or {}
-    if titulo not in g:
-        g[titulo] = []
+    if id_libro not in g:
+        g[id_libro] = []
         guardar_grafo("grafo.json", g)
 
 # -----------------------
@@ -104,6 +150,8 @@ def mostrar_menu():
     opciones.append("1. Usuarios (Registrar / Listar / Actualizar / Eliminar)\n", style=f"bold {ROSA}")
     opciones.append("2. Libros (Submenú de operaciones)\n", style=f"bold {MORADO}")
     opciones.append("3. Ver recomendaciones\n", style=f"bold {ROSA}")
+    opciones.append("4. Estadísticas de circulación\n", style=f"bold {MORADO}")
+    opciones.append("5. Préstamos vencidos y próximos a vencer\n", style=f"bold {ROSA}")
     opciones.append("0. Salir\n", style=f"bold {MORADO}")
 
     panel = Panel(
@@ -118,29 +166,53 @@ def mostrar_menu():
 # -----------------------
 # Funcionalidades
 # -----------------------
+def mostrar_paginado(items, titulo, columnas, fila, tam_pagina=TAM_PAGINA):
+    """Muestra `items` en una tabla paginada construyendo solo las filas de la página actual.
+    columnas: lista de (encabezado, opciones de add_column); fila(numero, item) -> tupla de celdas."""
+    pag = Paginador(len(items), tam_pagina)
+    while True:
+        inicio, fin = pag.rango()
+        titulo_pagina = titulo if pag.paginas == 1 else f"{titulo} (página {pag.pagina}/{pag.paginas})"
+        tabla = Table(title=titulo_pagina, caption=f"{inicio + 1}-{fin} de {len(items)}", border_style=MORADO)
+        for encabezado, opciones in columnas:
+            tabla.add_column(encabezado, **opciones)
+        for i in range(inicio, fin):
+            tabla.add_row(*fila(i + 1, items[i]))
+        console.print(tabla)
+        if pag.paginas == 1:
+            return
+        accion = Prompt.ask(
+            f"[{ROSA}]n: siguiente · p: anterior · número: ir a página · q: salir[/]",
+            default="q" if pag.es_ultima() else "n",
+        ).strip().lower()
+        if accion in ("q", "0", "salir"):
+            return
+        if accion == "n":
+            pag.siguiente()
+        elif accion == "p":
+            pag.anterior()
+        elif accion.isdigit():
+            pag.ir_a(int(accion))
+        console.clear()
+
+
 def ver_libros():
-    libros = cargar_libros()
-    if not libros:
+    # usar el catálogo en memoria: no releer libros.json ni convertir cada libro a dict
+    if not biblioteca.libros:
         console.print(Panel("[bold red]No hay libros agregados aún.[/bold red]", border_style="red"))
         return
 
-    tabla = Table(title="📚 Libros disponibles", show_lines=False, border_style=MORADO)
-    tabla.add_column("No.", style=f"bold {MORADO}", width=5)
-    tabla.add_column("Título", style=f"bold {ROSA}")
-    tabla.add_column("Autor", style=f"{MORADO}")
-    tabla.add_column("Año", style=f"{ROSA}", justify="center")
-    tabla.add_column("Categoría", style=f"{MORADO}")
-
-    for i, libro in enumerate(libros, start=1):
-        tabla.add_row(
-            str(i),
-            libro.get("titulo", "-"),
-            libro.get("autor", "-"),
-            str(libro.get("year", "-")),
-            libro.get("categoria", "-")
-        )
-
-    console.print(tabla)
+    columnas = [
+        ("No.", {"style": f"bold {MORADO}", "width": 7}),
+        ("Título", {"style": f"bold {ROSA}"}),
+        ("Autor", {"style": f"{MORADO}"}),
+        ("Año", {"style": f"{ROSA}", "justify": "center"}),
+        ("Categoría", {"style": f"{MORADO}"}),
+    ]
+    mostrar_paginado(
+        biblioteca.libros, "📚 Libros disponibles", columnas,
+        lambda i, l: (str(i), l.titulo or "-", l.autor or "-", str(l.year if l.year is not None else "-"), l.genero or "-"),
+    )
 
 
 def usuarios_menu():
@@ -149,6 +221,7 @@ def usuarios_menu():
         console.print(panel)
         opt = Prompt.ask(f"[{ROSA}]Elige opción (Usuarios)[/]").strip()
         console.clear()
+        sincronizar()
         o = opt.lower()
         # aceptar '0' o 'v'/'volver'/'b' para volver
         if o in ("0", "v", "b", "volver", "back"):
@@ -167,14 +240,18 @@ def usuarios_menu():
 
 def libros_menu():
     while True:
-        panel = Panel(Text("1. Registrar libro\n2. Ver libros\n3. Buscar libros\n4. Prestar libro\n5. Devolver libro\n6. Relacionar libros\n7. Ver recomendaciones\n8. Actualizar libro\n9. Eliminar libro\n0. Volver"), title=Text("📚 Libros", style=f"bold {MORADO}"), border_style=MORADO)
+        panel = Panel(Text("1. Registrar libro\n2. Ver libros\n3. Buscar libros\n4. Prestar libro\n5. Devolver libro\n6. Relacionar libros\n7. Ver recomendaciones\n8. Actualizar libro\n9. Eliminar libro\n10. Importar catálogo (CSV/JSONL)\n0. Volver"), title=Text("📚 Libros", style=f"bold {MORADO}"), border_style=MORADO)
         console.print(panel)
         opt = Prompt.ask(f"[{ROSA}]Elige opción (Libros)[/]").strip()
         console.clear()
+        sincronizar()
         o = opt.lower()
         if o in ("0", "v", "b", "volver", "back"):
             break
-        if o == "1" or o.startswith("1"):
+        # comprobar "10" antes que el prefijo "1"
+        if o == "10":
+            importar_catalogo_menu()
+        elif o == "1" or o.startswith("1"):
             registrar_libro()
         elif o == "2" or o.startswith("2"):
             ver_libros()
@@ -212,6 +289,7 @@ def registrar_libro():
 
     libro = Libro(titulo, autor, genero, year)
     biblioteca.agregar_libro(libro)
+    estadisticas.libro_agregado(libro)
     # reconstruir grafo según autor/género
     grafo.build_from_biblioteca(biblioteca)
     guardar_datos("libros.json", biblioteca.libros)
@@ -219,6 +297,35 @@ def registrar_libro():
     console.print(Panel(f"[bold green]Libro registrado:[/bold green] {titulo}", border_style="green"))
 
 
+def importar_catalogo_menu():
+    console.print(Panel("[bold]📥 Importar catálogo[/bold]", border_style=ROSA))
+    ruta = Prompt.ask(f"[{MORADO}]Ruta del archivo (.csv o .jsonl)[/]").strip()
+    if not ruta:
+        console.print("[bold red]No se indicó ningún archivo.[/bold red]")
+        return
+    try:
+        with console.status("Importando...") as estado:
+            resultado = importar_catalogo(
+                ruta, biblioteca, grafo,
+                progreso=lambda r: estado.update(f"Importando... {r.importados} libros ({len(r.rechazados)} rechazados)"),
+            )
+    except (OSError, ValueError) as e:
+        console.print(f"[bold red]No se pudo importar:[/bold red] {e}")
+        return
+    estadisticas.contar_catalogo(biblioteca.libros)
+    console.print(Panel(f"[bold green]{resultado}[/bold green]", border_style="green"))
+    if resultado.rechazados:
+        tabla = Table(title="Registros rechazados", border_style="red")
+        tabla.add_column("Registro", justify="right")
+        tabla.add_column("Motivo")
+        for n, motivo, _ in resultado.rechazados[:10]:
+            tabla.add_row(str(n), motivo)
+        console.print(tabla)
+        destino = Prompt.ask("Guardar todos los rechazados en (ENTER para omitir):", default="").strip()
+        if destino:
+            guardar_rechazados(resultado, destino)
+
+
 def registrar_usuario():
     console.print(Panel("[bold]➕ Registrar Usuario[/bold]", border_style=ROSA))
     nombre = Prompt.ask(f"[{MORADO}]Nombre[/]").strip()
@@ -226,16 +333,62 @@ def registrar_usuario():
     tipo = Prompt.ask(f"[{MORADO}]Tipo (estudiante/profesor)[/]").strip() or "estudiante"
     usuario = Usuario(nombre, id_usuario, tipo)
     usuarios.append(usuario)
+    prefijos_usuarios.agregar(id_usuario)
     guardar_datos("usuarios.json", usuarios)
     console.print(Panel(f"[bold green]Usuario registrado:[/bold green] {nombre}", border_style="green"))
 
 
+def pedir_con_sugerencias(mensaje, completar, parecidos=None):
+    """Prompt con autocompletado: TAB completa (si hay readline) y, si lo escrito no coincide
+    exactamente, se usa la única opción que empieza así o se ofrecen las opciones (o las más
+    parecidas) para elegir por número."""
+    with completado_tab(completar):
+        texto = Prompt.ask(mensaje).strip()
+    if not texto:
+        return texto
+    opciones = completar(texto, TAM_SUGERENCIAS)
+    if opciones and normalizar(opciones[0]) == normalizar(texto):
+        return texto  # coincidencia exacta: siempre ordena primera
+    if len(opciones) == 1:
+        console.print(f"[dim]→ {opciones[0]}[/dim]")
+        return opciones[0]
+    if not opciones and parecidos is not None:
+        opciones = parecidos(texto, TAM_SUGERENCIAS)
+    if not opciones:
+        return texto
+    console.print(f"[bold yellow]No hay coincidencia exacta para '{texto}'. ¿Quisiste decir...?[/bold yellow]")
+    for i, opcion in enumerate(opciones, start=1):
+        console.print(f"  [{ROSA}]{i}.[/] {opcion}")
+    eleccion = Prompt.ask("Número (ENTER para dejar lo escrito):", default="").strip()
+    if eleccion.isdigit() and 1 <= int(eleccion) <= len(opciones):
+        return opciones[int(eleccion) - 1]
+    return texto
+
+
+def _titulos_parecidos(texto, k):
+    return list(dict.fromkeys(l.titulo for l, _ in biblioteca.buscar_difuso(texto, limite=k, campos=("titulo",))))
+
+
+def pedir_titulo(mensaje):
+    return pedir_con_sugerencias(mensaje, biblioteca.autocompletar_titulo, _titulos_parecidos)
+
+
+def libro_por_titulo(titulo):
+    """Libro con ese título exacto, sin distinguir tildes ni mayúsculas ("exodo" -> "Éxodo")."""
+    clave = normalizar(titulo)
+    return next((l for l in biblioteca.libros if l.clave_titulo == clave), None)
+
+
+def pedir_id_usuario(mensaje):
+    return pedir_con_sugerencias(mensaje, prefijos_usuarios.completar)
+
+
 def prestar_libro():
     console.print(Panel("[bold]📦 Prestar Libro[/bold]", border_style=MORADO))
-    id_usuario = Prompt.ask(f"[{MORADO}]ID del usuario[/]").strip()
-    titulo = Prompt.ask(f"[{MORADO}]Título del libro a prestar[/]").strip()
+    id_usuario = pedir_id_usuario(f"[{MORADO}]ID del usuario[/]")
+    titulo = pedir_titulo(f"[{MORADO}]Título del libro a prestar[/]")
     usuario = next((u for u in usuarios if u.id == id_usuario), None)
-    libro = next((l for l in biblioteca.libros if titulo.lower() in l.titulo.lower()), None)
+    libro = next((l for l in biblioteca.libros if normalizar(titulo) in l.clave_titulo), None)
     if not usuario:
         console.print("[bold red]Usuario no encontrado.[/bold red]")
         return
@@ -246,11 +399,14 @@ def prestar_libro():
         libro.disponible = False
         prestamo = Prestamo(usuario, libro)
         prestamos.append(prestamo)
+        coprestamos.registrar(prestamo)
+        estadisticas.registrar_prestamo(prestamo)
+        vencimientos.agregar(prestamo)
         guardar_datos("prestamos.json", prestamos)
         guardar_datos("libros.json", biblioteca.libros)
         console.print(Panel("[bold green]Préstamo realizado con éxito.[/bold green]", border_style="green"))
     else:
-        s = SolicitudPrestamo(usuario.id, libro.titulo)
+        s = SolicitudPrestamo(usuario.id, libro.titulo, id_libro=libro.id)
         # registrar tipo de usuario para prioridad
         s.tipo_usuario = usuario.tipo
         cola.encolar(s)
@@ -260,15 +416,21 @@ def prestar_libro():
 
 def devolver_libro():
     console.print(Panel("[bold]↩️ Devolver Libro[/bold]", border_style=ROSA))
-    titulo = Prompt.ask(f"[{MORADO}]Título del libro a devolver[/]").strip()
-    prestamo = next((p for p in prestamos if p.libro.titulo.lower() == titulo.lower() and p.fecha_devolucion is None), None)
+    titulo = pedir_titulo(f"[{MORADO}]Título del libro a devolver[/]")
+    prestamo = next((p for p in prestamos if p.libro.clave_titulo == normalizar(titulo) and p.fecha_devolucion is None), None)
     if not prestamo:
         console.print("[bold red]No se encontró un préstamo activo para ese libro.[/bold red]")
         return
     prestamo.devolver()
+    estadisticas.registrar_devolucion(prestamo)
+    archivar_devueltos(prestamos)
     guardar_datos("prestamos.json", prestamos)
     guardar_datos("libros.json", biblioteca.libros)
     procesados = cola.procesar(usuarios, biblioteca, prestamos)
+    for p in procesados:
+        coprestamos.registrar(p)
+        estadisticas.registrar_prestamo(p)
+        vencimientos.agregar(p)
     if procesados:
         guardar_datos("prestamos.json", prestamos)
         guardar_datos("libros.json", biblioteca.libros)
@@ -279,8 +441,8 @@ def devolver_libro():
 
 def buscar_libros():
     console.print(Panel("[bold]🔎 Buscar Libros[/bold]", border_style=MORADO))
-    opciones = {"1":"Por título","2":"Por autor","3":"Por género","4":"Por año","5":"Disponible"}
-    choice = Prompt.ask("Elige: 1-título,2-autor,3-género,4-año,5-disponible", choices=list(opciones.keys()))
+    opciones = {"1":"Por título","2":"Por autor","3":"Por género","4":"Por año","5":"Disponible","6":"Varios criterios"}
+    choice = Prompt.ask("Elige: 1-título,2-autor,3-género,4-año,5-disponible,6-varios", choices=list(opciones.keys()))
     resultados = []
     if choice == "1":
         q = Prompt.ask("Título:").strip()
@@ -300,25 +462,48 @@ def buscar_libros():
         resultados = biblioteca.buscar_por_año(qn)
     elif choice == "5":
         resultados = biblioteca.buscar_disponibles()
+    elif choice == "6":
+        console.print("[dim]Deja vacío lo que no quieras filtrar.[/dim]")
+        criterios = {"titulo": Prompt.ask("Título contiene:", default="").strip(),
+                     "autor": Prompt.ask("Autor contiene:", default="").strip(),
+                     "genero": Prompt.ask("Género contiene:", default="").strip()}
+        for campo, texto in (("year_desde", "Desde el año:"), ("year_hasta", "Hasta el año:")):
+            valor = Prompt.ask(texto, default="").strip()
+            try:
+                criterios[campo] = int(valor) if valor else None
+            except ValueError:
+                console.print("[bold red]Año no válido.[/bold red]")
+                return
+        if Confirm.ask("¿Solo disponibles?", default=False):
+            criterios["disponible"] = True
+        criterios = {k: v for k, v in criterios.items() if v}
+        resultados = biblioteca.consultar(**criterios) if criterios else biblioteca.libros
+    if not resultados and choice in ("1", "2") and q:
+        # sin coincidencia exacta: ofrecer los títulos/autores más parecidos (erratas, tildes)
+        campo = "titulo" if choice == "1" else "autor"
+        parecidos = biblioteca.buscar_difuso(q, limite=TAM_PAGINA, campos=(campo,))
+        if parecidos:
+            console.print(f"[bold yellow]Sin coincidencias exactas para '{q}'. ¿Quisiste decir...?[/bold yellow]")
+            resultados = [l for l, _ in parecidos]
     if resultados:
-        tabla = Table(title="Resultados", border_style=MORADO)
-        tabla.add_column("Título", style=f"bold {ROSA}")
-        tabla.add_column("Autor", style=f"{MORADO}")
-        tabla.add_column("Año", style=f"{ROSA}")
-        tabla.add_column("Estado", style=f"{MORADO}")
-        for l in resultados:
-            tabla.add_row(l.titulo, l.autor, str(l.year), "Disponible" if l.disponible else "Prestado")
-        console.print(tabla)
+        columnas = [
+            ("Título", {"style": f"bold {ROSA}"}),
+            ("Autor", {"style": f"{MORADO}"}),
+            ("Año", {"style": f"{ROSA}"}),
+            ("Estado", {"style": f"{MORADO}"}),
+        ]
+        mostrar_paginado(resultados, "Resultados", columnas,
+                         lambda i, l: (l.titulo, l.autor, str(l.year), "Disponible" if l.disponible else "Prestado"))
     else:
         console.print(Panel("[bold red]No se encontraron coincidencias.[/bold red]", border_style="red"))
 
 
 def relacionar_libros():
     console.print(Panel("[bold]🔗 Relacionar Libros[/bold]", border_style=MORADO))
-    t1 = Prompt.ask("Título del primer libro:").strip()
-    t2 = Prompt.ask("Título del segundo libro:").strip()
-    libro1 = next((l for l in biblioteca.libros if l.titulo.lower() == t1.lower()), None)
-    libro2 = next((l for l in biblioteca.libros if l.titulo.lower() == t2.lower()), None)
+    t1 = pedir_titulo("Título del primer libro:")
+    t2 = pedir_titulo("Título del segundo libro:")
+    libro1 = libro_por_titulo(t1)
+    libro2 = libro_por_titulo(t2)
     if not libro1 or not libro2:
         console.print("[bold red]Uno de los libros no existe.[/bold red]")
         return
@@ -329,23 +514,29 @@ def relacionar_libros():
 
 def ver_recomendaciones():
     console.print(Panel("[bold]✨ Recomendaciones (Grafo)[/bold]", border_style=ROSA))
-    titulo = Prompt.ask("Título del libro base:").strip()
-    libro = next((l for l in biblioteca.libros if l.titulo.lower() == titulo.lower()), None)
+    titulo = pedir_titulo("Título del libro base:")
+    libro = libro_por_titulo(titulo)
     if not libro:
         console.print("[bold red]Libro no encontrado.[/bold red]")
         return
-    recomendaciones = grafo.recomendaciones(libro)
-    if recomendaciones:
-        for r in recomendaciones:
+    recomendaciones_grafo = grafo.recomendaciones(libro)
+    if recomendaciones_grafo:
+        for r in recomendaciones_grafo:
             console.print(f"- {r}")
     else:
         console.print(Panel("[bold yellow]Este libro no tiene recomendaciones relacionadas.[/bold yellow]", border_style="yellow"))
+    tambien = coprestamos.tambien_prestados(libro)
+    if tambien:
+        console.print(f"[bold {MORADO}]Quienes lo leyeron también leyeron:[/]")
+        for t, n in tambien:
+            console.print(f"- {t} [dim]({n} {'lector' if n == 1 else 'lectores'})[/dim]")
+    recomendaciones(libro)
 
 
 def actualizar_libro_menu():
     console.print(Panel("[bold]✏️ Actualizar Libro[/bold]", border_style=MORADO))
-    titulo = Prompt.ask("Título exacto del libro a actualizar:").strip()
-    libro = next((l for l in biblioteca.libros if l.titulo.lower() == titulo.lower()), None)
+    titulo = pedir_titulo("Título exacto del libro a actualizar (TAB completa):")
+    libro = libro_por_titulo(titulo)
     if not libro:
         console.print("[bold red]Libro no encontrado.[/bold red]")
         return
@@ -366,7 +557,7 @@ def actualizar_libro_menu():
         except Exception:
             cambios['year'] = None
     if cambios:
-        biblioteca.actualizar_libro(titulo, **cambios)
+        biblioteca.actualizar_libro(libro.id, **cambios)
         # reconstruir grafo porque título/autor/género pueden haber cambiado
         guardar_datos("libros.json", biblioteca.libros)
         grafo.build_from_biblioteca(biblioteca)
@@ -378,13 +569,14 @@ def actualizar_libro_menu():
 
 def eliminar_libro_menu():
     console.print(Panel("[bold]🗑️ Eliminar Libro[/bold]", border_style=ROSA))
-    titulo = Prompt.ask("Título exacto del libro a eliminar:").strip()
-    libro = next((l for l in biblioteca.libros if l.titulo.lower() == titulo.lower()), None)
+    titulo = pedir_titulo("Título exacto del libro a eliminar:")
+    libro = libro_por_titulo(titulo)
     if not libro:
         console.print("[bold red]No se encontró el libro.[/bold red]")
         return
-    ok = biblioteca.eliminar_libro(titulo)
+    ok = biblioteca.eliminar_libro(libro.id)
     if ok:
+        estadisticas.libro_eliminado(libro)
         # reconstruir grafo tras eliminación
         grafo.build_from_biblioteca(biblioteca)
         guardar_datos("libros.json", biblioteca.libros)
@@ -399,13 +591,17 @@ def listar_usuarios():
     if not usuarios:
         console.print("No hay usuarios registrados.")
         return
-    for u in usuarios:
-        console.print(f"- {u}")
+    columnas = [
+        ("ID", {"style": f"bold {MORADO}"}),
+        ("Nombre", {"style": f"bold {ROSA}"}),
+        ("Tipo", {"style": f"{MORADO}"}),
+    ]
+    mostrar_paginado(usuarios, "👥 Usuarios", columnas, lambda i, u: (u.id, u.nombre, u.tipo))
 
 
 def actualizar_usuario_menu():
     console.print(Panel("[bold]✏️ Actualizar Usuario[/bold]", border_style=ROSA))
-    id_u = Prompt.ask("ID del usuario a actualizar:").strip()
+    id_u = pedir_id_usuario("ID del usuario a actualizar:")
     u = next((x for x in usuarios if x.id == id_u), None)
     if not u:
         console.print("[bold red]Usuario no encontrado.[/bold red]")
@@ -422,12 +618,13 @@ def actualizar_usuario_menu():
 
 def eliminar_usuario_menu():
     console.print(Panel("[bold]🗑️ Eliminar Usuario[/bold]", border_style=MORADO))
-    id_u = Prompt.ask("ID del usuario a eliminar:").strip()
+    id_u = pedir_id_usuario("ID del usuario a eliminar:")
     idx = next((i for i, x in enumerate(usuarios) if x.id == id_u), None)
     if idx is None:
         console.print("[bold red]Usuario no encontrado.[/bold red]")
         return
     del usuarios[idx]
+    prefijos_usuarios.eliminar(id_u)
     guardar_datos("usuarios.json", usuarios)
     console.print(Panel("[bold green]Usuario eliminado.[/bold green]", border_style="green"))
 
@@ -440,7 +637,7 @@ def buscar_libro():
     libros = cargar_libros()
     resultados = [
         libro for libro in libros
-        if termino.lower() in libro.get("titulo", "").lower()
+        if normalizar(termino) in normalizar(libro.get("titulo", ""))
     ]
 
     if not resultados:
@@ -463,22 +660,28 @@ def buscar_libro():
 
     console.print(tabla)
 
-def recomendaciones():
-    libros = cargar_libros()
-    if not libros:
-        console.print(Panel("[bold red]No hay libros para recomendar.[/bold red]", border_style="red"))
+def recomendaciones(libro=None, cantidad=5):
+    """Muestra los libros más parecidos (autor, género, década) ordenados por puntuación."""
+    if libro is None:
+        titulo = pedir_titulo("Título del libro base:")
+        libro = libro_por_titulo(titulo)
+        if not libro:
+            console.print("[bold red]Libro no encontrado.[/bold red]")
+            return
+    recomendador.actualizar(biblioteca)
+    parecidos = recomendador.similares(libro, cantidad)
+    if not parecidos:
+        console.print(Panel("[bold red]No hay libros parecidos para recomendar.[/bold red]", border_style="red"))
         return
 
-    cantidad = min(3, len(libros))
-    recomendados = random.sample(libros, cantidad)
-
     tabla = Table(title="✨ Recomendaciones", border_style=MORADO)
     tabla.add_column("Título", style=f"bold {ROSA}")
     tabla.add_column("Autor", style=f"{MORADO}")
     tabla.add_column("Categoría", style=f"{ROSA}")
+    tabla.add_column("Afinidad", justify="right")
 
-    for libro in recomendados:
-        tabla.add_row(libro.get("titulo", "-"), libro.get("autor", "-"), libro.get("categoria", "-"))
+    for l, puntuacion in parecidos:
+        tabla.add_row(l.titulo, l.autor or "-", l.genero or "-", f"{puntuacion:.0%}")
 
     console.print(tabla)
 
@@ -503,6 +706,73 @@ def agregar_libro():
     guardar_grafo("grafo.json", grafo.to_dict())
     console.print(Panel(f"[bold green]Libro agregado:[/bold green] {titulo}", border_style="green"))
 
+def ver_estadisticas():
+    console.print(Panel("[bold]📊 Estadísticas de circulación[/bold]", border_style=MORADO))
+    d = estadisticas.disponibilidad()
+    console.print(f"Libros: [bold]{d['libros']}[/bold] · disponibles: [green]{d['disponibles']}[/green] · "
+                  f"prestados: [yellow]{d['prestados']}[/yellow] · préstamos registrados: {estadisticas.total_prestamos}")
+    for titulo, encabezado, filas in (
+        ("Más prestados", "Título", estadisticas.mas_prestados()),
+        ("Préstamos por género", "Género", estadisticas.prestamos_por_genero()),
+        ("Préstamos activos por tipo de usuario", "Tipo", list(estadisticas.prestamos_activos_por_tipo().items())),
+    ):
+        if not filas:
+            continue
+        tabla = Table(title=titulo, border_style=MORADO)
+        tabla.add_column(encabezado, style=f"bold {ROSA}")
+        tabla.add_column("Préstamos", style=f"{MORADO}", justify="right")
+        for nombre, n in filas:
+            tabla.add_row(str(nombre), str(n))
+        console.print(tabla)
+
+
+def ver_vencimientos():
+    console.print(Panel("[bold]⏰ Préstamos vencidos y próximos a vencer[/bold]", border_style=MORADO))
+    dias_txt = Prompt.ask(f"Días a mirar (ENTER = {DIAS_AVISO})", default="").strip()
+    dias = int(dias_txt) if dias_txt.isdigit() else DIAS_AVISO
+    for titulo, lista, estilo in (
+        ("Vencidos", vencimientos.vencidos(), "red"),
+        (f"Vencen en los próximos {dias} días", vencimientos.proximos(dias), "yellow"),
+    ):
+        if not lista:
+            console.print(f"[dim]{titulo}: ninguno.[/dim]")
+            continue
+        tabla = Table(title=f"{titulo} ({len(lista)})", border_style=MORADO)
+        tabla.add_column("Vence", style=estilo)
+        tabla.add_column("Título", style=f"bold {ROSA}")
+        tabla.add_column("Usuario", style=f"{MORADO}")
+        for p in lista:
+            tabla.add_row(formatear_fecha(p.fecha_vencimiento), p.libro.titulo, f"{p.usuario.nombre} ({p.usuario.id})")
+        console.print(tabla)
+
+
+def ver_metricas():
+    console.print(Panel("[bold]📈 Métricas de rendimiento[/bold]", border_style=MORADO))
+    c = biblioteca.cache.estadisticas()
+    console.print(f"Caché de búsquedas: [bold]{c['aciertos']}[/bold] aciertos, {c['fallos']} fallos "
+                  f"([bold]{c['tasa_aciertos']:.0%}[/bold]), {c['entradas']}/{c['capacidad']} entradas")
+    if not metricas.esta_habilitado():
+        console.print("[dim]La instrumentación está deshabilitada (BIBLIOTECA_METRICAS=1 para activarla al iniciar).[/dim]")
+        if Confirm.ask("¿Activarla ahora?", default=False):
+            metricas.habilitar()
+        return
+    datos = metricas.resumen()
+    if not datos:
+        console.print("Aún no hay mediciones registradas.")
+        return
+    tabla = Table(title="Rutas instrumentadas", border_style=MORADO)
+    tabla.add_column("Métrica", style=f"bold {ROSA}")
+    for col in ("Llamadas", "Total ms", "p50 ms", "p95 ms", "p99 ms", "Bytes"):
+        tabla.add_column(col, style=f"{MORADO}", justify="right")
+    for nombre, m in datos.items():
+        tabla.add_row(nombre, str(m["llamadas"]), f"{m['total_ms']:.2f}", f"{m['p50_ms']:.3f}",
+                      f"{m['p95_ms']:.3f}", f"{m['p99_ms']:.3f}", str(m["bytes_escritos"]))
+    console.print(tabla)
+    ruta = Prompt.ask("Archivo JSON para volcar (ENTER para omitir):", default="").strip()
+    if ruta:
+        metricas.volcar(ruta)
+        console.print(f"[green]Métricas guardadas en {ruta}[/green]")
+
 # -----------------------
 # Programa principal
 # -----------------------
@@ -511,8 +781,10 @@ def main():
     while True:
         mostrar_encabezado()
         mostrar_menu()
-        opcion = Prompt.ask(f"[{MORADO}]Elige una opción[/]", choices=["0","1","2","3"], default="1")
+        # la opción de métricas no se anuncia en el menú ni en la lista de opciones
+        opcion = Prompt.ask(f"[{MORADO}]Elige una opción[/]", choices=["0","1","2","3","4","5", OPCION_METRICAS], show_choices=False, default="1")
         console.clear()
+        sincronizar()
 
         if opcion == "1":
             mostrar_encabezado()
@@ -523,6 +795,14 @@ def main():
         elif opcion == "3":
             mostrar_encabezado()
             ver_recomendaciones()
+        elif opcion == "4":
+            mostrar_encabezado()
+            ver_estadisticas()
+        elif opcion == "5":
+            mostrar_encabezado()
+            ver_vencimientos()
+        elif opcion == OPCION_METRICAS:
+            ver_metricas()
         elif opcion == "0":
             console.print(Panel("[bold magenta]Gracias por usar la biblioteca — ¡éxito con tu tarea! 💗[/bold magenta]", border_style=MORADO))
             break
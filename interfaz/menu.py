@@ -1,6 +1,13 @@
 from src.clases import Libro, Usuario, Prestamo, Biblioteca, GrafoLibros
 from src import persistencia
-from src.clases import SolicitudPrestamo, ColaSolicitudes
+from src.clases import SolicitudPrestamo, ColaSolicitudes, formatear_fecha
+from src import metricas
+from src.importacion import importar_catalogo, guardar_rechazados
+from src.recomendador import RecomendadorSimilitud, CoPrestamos
+from src.estadisticas import EstadisticasCirculacion
+from src.vencimientos import IndiceVencimientos, DIAS_AVISO
+from src.indices import IndicePrefijos, normalizar
+from interfaz.autocompletado import completado_tab, TAM_SUGERENCIAS
 
 # Instancias principales del sistema
 biblioteca = Biblioteca()
@@ -8,6 +15,11 @@ biblioteca = Biblioteca()
 biblioteca.libros = persistencia.cargar_libros()
 usuarios = persistencia.cargar_usuarios()
 prestamos = persistencia.cargar_prestamos(biblioteca.libros, usuarios)
+# prestamos.json solo guarda los activos: los devueltos que queden (datos anteriores) pasan al historial
+if persistencia.archivar_devueltos(prestamos):
+    persistencia.guardar_datos("prestamos.json", prestamos)
+# IDs de usuario para autocompletar (los títulos los mantiene la biblioteca)
+prefijos_usuarios = IndicePrefijos(u.id for u in usuarios)
 # Cargar solicitudes (cola FIFO)
 solicitudes_data = persistencia.cargar_solicitudes()
 cola = ColaSolicitudes.from_dict_list(solicitudes_data) if solicitudes_data else ColaSolicitudes()
@@ -20,6 +32,9 @@ grafo.build_from_biblioteca(biblioteca)
 # persistir el grafo reconstruido (asegura consistencia)
 persistencia.guardar_grafo("grafo.json", grafo.to_dict())
 
+# Recomendaciones por similitud (se construye al primer uso)
+recomendador = RecomendadorSimilitud()
+
 # Al iniciar, intentar procesar la cola (por si hay libros disponibles ahora)
 procesados_inicio = cola.procesar(usuarios, biblioteca, prestamos)
 if procesados_inicio:
@@ -28,11 +43,39 @@ if procesados_inicio:
     persistencia.guardar_datos("libros.json", biblioteca.libros)
     persistencia.guardar_datos("solicitudes.json", cola.to_list())
 
+# "Quienes leyeron X también leyeron", a partir del historial de préstamos
+coprestamos = CoPrestamos(prestamos, historial=persistencia.iterar_historial(), libros=biblioteca.libros)
+# panel de circulación: contadores que se actualizan con cada préstamo, devolución, alta o baja
+estadisticas = EstadisticasCirculacion(biblioteca.libros, prestamos, persistencia.iterar_historial())
+# préstamos activos por fecha de vencimiento (las devoluciones se quitan solas)
+vencimientos = IndiceVencimientos(prestamos)
+
 
 # ---------------------------------------------------------
 #   FUNCIONES DE LA LÓGICA
 # ---------------------------------------------------------
 
+def sincronizar():
+    """Recarga en memoria las colecciones que otra terminal haya modificado en data/."""
+    cambiadas = set(persistencia.colecciones_modificadas())
+    if not cambiadas:
+        return
+    if "libros.json" in cambiadas:
+        biblioteca.libros = persistencia.cargar_libros()
+        grafo.build_from_biblioteca(biblioteca)
+    if "usuarios.json" in cambiadas:
+        usuarios[:] = persistencia.cargar_usuarios()
+        prefijos_usuarios.construir(u.id for u in usuarios)
+    if cambiadas & {"libros.json", "usuarios.json", "prestamos.json"}:
+        # los préstamos enlazan objetos Libro/Usuario: reconstruirlos si cambió cualquiera
+        prestamos[:] = persistencia.cargar_prestamos(biblioteca.libros, usuarios)
+        coprestamos.construir(prestamos, persistencia.iterar_historial(), biblioteca.libros)
+        estadisticas.construir(biblioteca.libros, prestamos, persistencia.iterar_historial())
+        vencimientos.construir(prestamos)
+    if "solicitudes.json" in cambiadas:
+        cola.solicitudes = ColaSolicitudes.from_dict_list(persistencia.cargar_solicitudes()).solicitudes
+
+
 def registrar_libro():
     print("\n--- Registrar Libro ---")
     titulo = input("Título: ")
@@ -46,6 +89,7 @@ def registrar_libro():
     libro = Libro(titulo, autor, genero, year)
     biblioteca.agregar_libro(libro)
     grafo.agregar_libro(libro)
+    estadisticas.libro_agregado(libro)
 
     # Persistir cambio
     persistencia.guardar_datos("libros.json", biblioteca.libros)
@@ -55,6 +99,73 @@ def registrar_libro():
     print("\nLibro registrado correctamente.")
 
 
+def importar_catalogo_menu():
+    print("\n--- Importar catálogo (CSV/JSONL) ---")
+    ruta = input("Ruta del archivo: ").strip()
+    if not ruta:
+        print("No se indicó ningún archivo.")
+        return
+    try:
+        resultado = importar_catalogo(ruta, biblioteca, grafo,
+                                      progreso=lambda r: print(f"  {r.importados} libros importados..."))
+    except (OSError, ValueError) as e:
+        print(f"No se pudo importar: {e}")
+        return
+    estadisticas.contar_catalogo(biblioteca.libros)
+    print(f"\n{resultado}")
+    for n, motivo, _ in resultado.rechazados[:10]:
+        print(f"  registro {n}: {motivo}")
+    if resultado.rechazados:
+        destino = input("Guardar todos los rechazados en (ENTER para omitir): ").strip()
+        if destino:
+            guardar_rechazados(resultado, destino)
+
+
+def pedir_con_sugerencias(mensaje, completar, parecidos=None):
+    """input() con autocompletado: TAB completa (si hay readline) y, si lo escrito no coincide
+    exactamente, se usa la única opción que empieza así o se ofrecen las opciones (o las más
+    parecidas) para elegir por número."""
+    with completado_tab(completar):
+        texto = input(mensaje).strip()
+    if not texto:
+        return texto
+    opciones = completar(texto, TAM_SUGERENCIAS)
+    if opciones and normalizar(opciones[0]) == normalizar(texto):
+        return texto  # coincidencia exacta: siempre ordena primera
+    if len(opciones) == 1:
+        print(f"  -> {opciones[0]}")
+        return opciones[0]
+    if not opciones and parecidos is not None:
+        opciones = parecidos(texto, TAM_SUGERENCIAS)
+    if not opciones:
+        return texto
+    print(f"No hay coincidencia exacta para '{texto}'. ¿Quisiste decir...?")
+    for i, opcion in enumerate(opciones, start=1):
+        print(f"  {i}. {opcion}")
+    eleccion = input("Número (ENTER para dejar lo escrito): ").strip()
+    if eleccion.isdigit() and 1 <= int(eleccion) <= len(opciones):
+        return opciones[int(eleccion) - 1]
+    return texto
+
+
+def _titulos_parecidos(texto, k):
+    return list(dict.fromkeys(l.titulo for l, _ in biblioteca.buscar_difuso(texto, limite=k, campos=("titulo",))))
+
+
+def pedir_titulo(mensaje):
+    return pedir_con_sugerencias(mensaje, biblioteca.autocompletar_titulo, _titulos_parecidos)
+
+
+def libro_por_titulo(titulo):
+    """Libro con ese título exacto, sin distinguir tildes ni mayúsculas ("exodo" -> "Éxodo")."""
+    clave = normalizar(titulo)
+    return next((l for l in biblioteca.libros if l.clave_titulo == clave), None)
+
+
+def pedir_id_usuario(mensaje):
+    return pedir_con_sugerencias(mensaje, prefijos_usuarios.completar)
+
+
 def registrar_usuario():
     print("\n--- Registrar Usuario ---")
     nombre = input("Nombre: ")
@@ -62,6 +173,7 @@ def registrar_usuario():
     tipo = input("Tipo (estudiante/profesor): ")
     usuario = Usuario(nombre, id_usuario, tipo)
     usuarios.append(usuario)
+    prefijos_usuarios.agregar(id_usuario)
 
     # Persistir usuarios
     persistencia.guardar_datos("usuarios.json", usuarios)
@@ -71,11 +183,11 @@ def registrar_usuario():
 
 def prestar_libro():
     print("\n--- Prestar Libro ---")
-    id_usuario = input("ID del usuario: ")
-    titulo = input("Título del libro a prestar: ")
+    id_usuario = pedir_id_usuario("ID del usuario: ")
+    titulo = pedir_titulo("Título del libro a prestar: ")
 
     usuario = next((u for u in usuarios if u.id == id_usuario), None)
-    libro = next((l for l in biblioteca.libros if titulo.lower() in l.titulo.lower()), None)
+    libro = next((l for l in biblioteca.libros if normalizar(titulo) in l.clave_titulo), None)
 
     if not usuario:
         print("Usuario no encontrado.")
@@ -89,13 +201,16 @@ def prestar_libro():
         libro.disponible = False
         prestamo = Prestamo(usuario, libro)
         prestamos.append(prestamo)
+        coprestamos.registrar(prestamo)
+        estadisticas.registrar_prestamo(prestamo)
+        vencimientos.agregar(prestamo)
         # Persistir cambios
         persistencia.guardar_datos("prestamos.json", prestamos)
         persistencia.guardar_datos("libros.json", biblioteca.libros)
         print("\nPréstamo realizado con éxito.")
     else:
         # Encolar la solicitud (FIFO)
-        s = SolicitudPrestamo(usuario.id, libro.titulo)
+        s = SolicitudPrestamo(usuario.id, libro.titulo, id_libro=libro.id)
         # registrar tipo de usuario para prioridad
         s.tipo_usuario = usuario.tipo
         cola.encolar(s)
@@ -105,21 +220,27 @@ def prestar_libro():
 
 def devolver_libro():
     print("\n--- Devolver Libro ---")
-    titulo = input("Título del libro a devolver: ")
+    titulo = pedir_titulo("Título del libro a devolver: ")
 
-    prestamo = next((p for p in prestamos if p.libro.titulo.lower() == titulo.lower() and p.fecha_devolucion is None), None)
+    prestamo = next((p for p in prestamos if p.libro.clave_titulo == normalizar(titulo) and p.fecha_devolucion is None), None)
 
     if not prestamo:
         print("No se encontró un préstamo activo para ese libro.")
         return
 
     prestamo.devolver()
-    # Persistir cambios
+    estadisticas.registrar_devolucion(prestamo)
+    # Persistir cambios: el préstamo devuelto pasa al historial y prestamos.json queda con los activos
+    persistencia.archivar_devueltos(prestamos)
     persistencia.guardar_datos("prestamos.json", prestamos)
     persistencia.guardar_datos("libros.json", biblioteca.libros)
 
     # Intentar procesar la cola de solicitudes después de la devolución
     procesados = cola.procesar(usuarios, biblioteca, prestamos)
+    for p in procesados:
+        coprestamos.registrar(p)
+        estadisticas.registrar_prestamo(p)
+        vencimientos.agregar(p)
     if procesados:
         persistencia.guardar_datos("prestamos.json", prestamos)
         persistencia.guardar_datos("libros.json", biblioteca.libros)
@@ -136,6 +257,7 @@ def buscar_libros():
     print("3. Por género")
     print("4. Por año")
     print("5. Disponible")
+    print("6. Varios criterios")
     opcion = input("\nElige una opción: ")
 
     if opcion == "1":
@@ -157,10 +279,34 @@ def buscar_libros():
     elif opcion == "5":
         resultados = biblioteca.buscar_disponibles()
 
+    elif opcion == "6":
+        print("Deja vacío lo que no quieras filtrar.")
+        criterios = {"titulo": input("Título contiene: ").strip(),
+                     "autor": input("Autor contiene: ").strip(),
+                     "genero": input("Género contiene: ").strip()}
+        try:
+            criterios["year_desde"] = int(input("Desde el año: ") or 0) or None
+            criterios["year_hasta"] = int(input("Hasta el año: ") or 0) or None
+        except ValueError:
+            print("Año no válido.")
+            return
+        if input("¿Solo disponibles? (s/n): ").strip().lower() == "s":
+            criterios["disponible"] = True
+        criterios = {k: v for k, v in criterios.items() if v}
+        resultados = biblioteca.consultar(**criterios) if criterios else biblioteca.libros
+
     else:
         print("Opción no válida.")
         return
 
+    if not resultados and opcion in ("1", "2") and q.strip():
+        # sin coincidencia exacta: ofrecer los títulos/autores más parecidos (erratas, tildes)
+        campo = "titulo" if opcion == "1" else "autor"
+        parecidos = biblioteca.buscar_difuso(q, campos=(campo,))
+        if parecidos:
+            print(f"\nSin coincidencias exactas para '{q}'. ¿Quisiste decir...?")
+            resultados = [l for l, _ in parecidos]
+
     if resultados:
         print("\nResultados:")
         for libro in resultados:
@@ -171,11 +317,11 @@ def buscar_libros():
 
 def relacionar_libros():
     print("\n--- Relacionar Libros (Grafo) ---")
-    t1 = input("Título del primer libro: ")
-    t2 = input("Título del segundo libro: ")
+    t1 = pedir_titulo("Título del primer libro: ")
+    t2 = pedir_titulo("Título del segundo libro: ")
 
-    libro1 = next((l for l in biblioteca.libros if l.titulo.lower() == t1.lower()), None)
-    libro2 = next((l for l in biblioteca.libros if l.titulo.lower() == t2.lower()), None)
+    libro1 = libro_por_titulo(t1)
+    libro2 = libro_por_titulo(t2)
 
     if not libro1 or not libro2:
         print("Uno de los libros no existe.")
@@ -189,9 +335,9 @@ def relacionar_libros():
 
 def ver_recomendaciones():
     print("\n--- Recomendaciones de Libros (Grafo) ---")
-    titulo = input("Título del libro base: ")
+    titulo = pedir_titulo("Título del libro base: ")
 
-    libro = next((l for l in biblioteca.libros if l.titulo.lower() == titulo.lower()), None)
+    libro = libro_por_titulo(titulo)
     if not libro:
         print("Libro no encontrado.")
         return
@@ -205,11 +351,24 @@ def ver_recomendaciones():
     else:
         print("Este libro no tiene recomendaciones relacionadas.")
 
+    tambien = coprestamos.tambien_prestados(libro)
+    if tambien:
+        print("\nQuienes lo leyeron también leyeron:")
+        for t, n in tambien:
+            print(f"- {t} ({n} {'lector' if n == 1 else 'lectores'})")
+
+    recomendador.actualizar(biblioteca)
+    parecidos = recomendador.similares(libro)
+    if parecidos:
+        print("\nMás parecidos (autor, género, década):")
+        for l, puntuacion in parecidos:
+            print(f"- {l.titulo} - {l.autor} ({puntuacion:.0%})")
+
 
 def actualizar_libro_menu():
     print("\n--- Actualizar Libro ---")
-    titulo = input("Título exacto del libro a actualizar: ")
-    libro = next((l for l in biblioteca.libros if l.titulo.lower() == titulo.lower()), None)
+    titulo = pedir_titulo("Título exacto del libro a actualizar (TAB completa): ")
+    libro = libro_por_titulo(titulo)
     if not libro:
         print("Libro no encontrado.")
         return
@@ -233,7 +392,7 @@ def actualizar_libro_menu():
             cambios['year'] = None
 
     if cambios:
-        biblioteca.actualizar_libro(titulo, **cambios)
+        biblioteca.actualizar_libro(libro.id, **cambios)
         persistencia.guardar_datos("libros.json", biblioteca.libros)
         print("Libro actualizado.")
     else:
@@ -242,17 +401,18 @@ def actualizar_libro_menu():
 
 def eliminar_libro_menu():
     print("\n--- Eliminar Libro ---")
-    titulo = input("Título exacto del libro a eliminar: ")
+    titulo = pedir_titulo("Título exacto del libro a eliminar: ")
     # Buscar objeto Libro para eliminar y actualizar grafo
-    libro = next((l for l in biblioteca.libros if l.titulo.lower() == titulo.lower()), None)
+    libro = libro_por_titulo(titulo)
     if not libro:
         print("No se encontró el libro.")
         return
     # Remover del grafo
     grafo.remover_libro(libro)
     # Remover de la biblioteca
-    ok = biblioteca.eliminar_libro(titulo)
+    ok = biblioteca.eliminar_libro(libro.id)
     if ok:
+        estadisticas.libro_eliminado(libro)
         persistencia.guardar_datos("libros.json", biblioteca.libros)
         persistencia.guardar_grafo("grafo.json", grafo.to_dict())
         print("Libro eliminado.")
@@ -271,7 +431,7 @@ def listar_usuarios():
 
 def actualizar_usuario_menu():
     print("\n--- Actualizar Usuario ---")
-    id_u = input("ID del usuario a actualizar: ")
+    id_u = pedir_id_usuario("ID del usuario a actualizar: ")
     u = next((x for x in usuarios if x.id == id_u), None)
     if not u:
         print("Usuario no encontrado.")
@@ -288,16 +448,67 @@ def actualizar_usuario_menu():
 
 def eliminar_usuario_menu():
     print("\n--- Eliminar Usuario ---")
-    id_u = input("ID del usuario a eliminar: ")
+    id_u = pedir_id_usuario("ID del usuario a eliminar: ")
     idx = next((i for i, x in enumerate(usuarios) if x.id == id_u), None)
     if idx is None:
         print("Usuario no encontrado.")
         return
     del usuarios[idx]
+    prefijos_usuarios.eliminar(id_u)
     persistencia.guardar_datos("usuarios.json", usuarios)
     print("Usuario eliminado.")
 
 
+def ver_estadisticas():
+    print("\n--- Estadísticas de circulación ---")
+    d = estadisticas.disponibilidad()
+    print(f"Libros: {d['libros']} ({d['disponibles']} disponibles, {d['prestados']} prestados)")
+    print(f"Préstamos registrados: {estadisticas.total_prestamos}")
+    print("\nMás prestados:")
+    for titulo, n in estadisticas.mas_prestados():
+        print(f"  {n:>5}  {titulo}")
+    print("\nPréstamos por género:")
+    for genero, n in estadisticas.prestamos_por_genero():
+        print(f"  {n:>5}  {genero}")
+    print("\nPréstamos activos por tipo de usuario:")
+    for tipo, n in estadisticas.prestamos_activos_por_tipo().items():
+        print(f"  {n:>5}  {tipo}")
+
+
+def ver_vencimientos():
+    print("\n--- Préstamos vencidos y próximos a vencer ---")
+    dias_txt = input(f"Días a mirar (ENTER = {DIAS_AVISO}): ").strip()
+    dias = int(dias_txt) if dias_txt.isdigit() else DIAS_AVISO
+    for titulo, lista in (("Vencidos", vencimientos.vencidos()),
+                          (f"Vencen en los próximos {dias} días", vencimientos.proximos(dias))):
+        print(f"\n{titulo}: {len(lista) or 'ninguno'}")
+        for p in lista:
+            print(f"  {formatear_fecha(p.fecha_vencimiento)}  {p.libro.titulo} -> {p.usuario.nombre} ({p.usuario.id})")
+
+
+def ver_metricas():
+    print("\n--- Métricas de rendimiento ---")
+    c = biblioteca.cache.estadisticas()
+    print(f"Caché de búsquedas: {c['aciertos']} aciertos, {c['fallos']} fallos ({c['tasa_aciertos']:.0%}), "
+          f"{c['entradas']}/{c['capacidad']} entradas")
+    if not metricas.esta_habilitado():
+        print("La instrumentación está deshabilitada (BIBLIOTECA_METRICAS=1 para activarla al iniciar).")
+        if input("¿Activarla ahora? (s/n): ").strip().lower() == "s":
+            metricas.habilitar()
+        return
+    datos = metricas.resumen()
+    if not datos:
+        print("Aún no hay mediciones registradas.")
+        return
+    print(f"{'Métrica':<40} {'Llamadas':>9} {'Total ms':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'Bytes':>10}")
+    for nombre, m in datos.items():
+        print(f"{nombre:<40} {m['llamadas']:>9} {m['total_ms']:>10.2f} {m['p50_ms']:>9.3f} "
+              f"{m['p95_ms']:>9.3f} {m['p99_ms']:>9.3f} {m['bytes_escritos']:>10}")
+    ruta = input("Archivo JSON para volcar (ENTER para omitir): ").strip()
+    if ruta:
+        metricas.volcar(ruta)
+        print(f"Métricas guardadas en {ruta}")
+
 
 # ---------------------------------------------------------
 #   MENÚ PRINCIPAL
@@ -318,10 +529,14 @@ def mostrar_menu():
         print("10. Listar usuarios")
         print("11. Actualizar usuario")
         print("12. Eliminar usuario")
+        print("13. Importar catálogo (CSV/JSONL)")
+        print("14. Estadísticas de circulación")
+        print("15. Préstamos vencidos y próximos a vencer")
         print("0. Salir")
 
 
         opcion = input("\nElige una opción: ")
+        sincronizar()
 
         if opcion == "1":
             registrar_libro()
@@ -347,6 +562,15 @@ def mostrar_menu():
             actualizar_usuario_menu()
         elif opcion == "12":
             eliminar_usuario_menu()
+        elif opcion == "13":
+            importar_catalogo_menu()
+        elif opcion == "14":
+            ver_estadisticas()
+        elif opcion == "15":
+            ver_vencimientos()
+        elif opcion == "m":
+            # opción oculta: no aparece en el listado del menú
+            ver_metricas()
         elif opcion == "0":
             print("\nSaliendo del sistema...")
             break
@@ -0,0 +1,42 @@
+"""Paginación de listados largos para la interfaz.
+
+`Paginador` solo calcula qué rango de elementos corresponde a la página actual,
+de modo que la interfaz construya únicamente esas filas (coste O(tamaño de página)
+independiente del tamaño del catálogo). No depende de `rich`.
+"""
+
+TAM_PAGINA = 20
+
+
+class Paginador:
+    def __init__(self, total: int, tam_pagina: int = TAM_PAGINA):
+        self.total = max(0, total)
+        self.tam_pagina = max(1, tam_pagina)
+        self.pagina = 1  # numeración desde 1, como se muestra al usuario
+
+    @property
+    def paginas(self) -> int:
+        return max(1, -(-self.total // self.tam_pagina))
+
+    def es_ultima(self) -> bool:
+        return self.pagina >= self.paginas
+
+    def siguiente(self) -> int:
+        return self.ir_a(self.pagina + 1)
+
+    def anterior(self) -> int:
+        return self.ir_a(self.pagina - 1)
+
+    def ir_a(self, pagina: int) -> int:
+        """Salta a la página indicada, acotada al rango válido. Devuelve la página resultante."""
+        self.pagina = min(max(1, pagina), self.paginas)
+        return self.pagina
+
+    def rango(self) -> tuple:
+        """Devuelve (inicio, fin) de la página actual para usar como items[inicio:fin]."""
+        inicio = (self.pagina - 1) * self.tam_pagina
+        return inicio, min(inicio + self.tam_pagina, self.total)
+
+    def rebanada(self, items):
+        inicio, fin = self.rango()
+        return items[inicio:fin]
@@ -1,15 +1,49 @@
 """Punto de entrada: intenta iniciar la interfaz rica (interfaz.interfaz.main).
 Si ocurre algún problema (por ejemplo falta de dependencia), cae al menú clásico
 implementado en `interfaz.menu.mostrar_menu()`.
+
+Con `--perfil` (o BIBLIOTECA_PERFIL=1) cada acción del menú se ejecuta bajo
+cProfile y se guarda un `.prof` por acción en `perfiles/`; `--perfil-memoria`
+(o BIBLIOTECA_PERFIL_MEMORIA=1) añade el pico de memoria con tracemalloc.
 """
 
+import argparse
+import os
 import sys
 
-def main():
+
+def _leer_opciones(argv=None):
+    parser = argparse.ArgumentParser(description="Gestor de biblioteca inteligente")
+    parser.add_argument("--perfil", action="store_true",
+                        default=os.environ.get("BIBLIOTECA_PERFIL", "") not in ("", "0"),
+                        help="perfilar cada acción del menú con cProfile")
+    parser.add_argument("--perfil-memoria", action="store_true",
+                        default=os.environ.get("BIBLIOTECA_PERFIL_MEMORIA", "") not in ("", "0"),
+                        help="medir también el pico de memoria con tracemalloc")
+    parser.add_argument("--perfil-dir", default=os.environ.get("BIBLIOTECA_PERFIL_DIR", "perfiles"),
+                        help="carpeta donde guardar los archivos .prof")
+    parser.add_argument("--perfil-top", type=int, default=15, help="funciones a mostrar en el resumen")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    opciones = _leer_opciones(argv)
+    perfilador = None
+    if opciones.perfil or opciones.perfil_memoria:
+        from src.perfilado import Perfilador
+        perfilador = Perfilador(opciones.perfil_dir, opciones.perfil_top, memoria=opciones.perfil_memoria)
+
     try:
         # Intentar arrancar la interfaz basada en rich
-        from interfaz.interfaz import main as rich_main
-        rich_main()
+        if perfilador:
+            from src.perfilado import ACCIONES_INTERFAZ
+            # la importación carga los datos y construye el grafo: perfilarla también
+            with perfilador.perfilar("inicio_interfaz"):
+                import interfaz.interfaz as rich_ui
+            perfilador.instalar(rich_ui, ACCIONES_INTERFAZ)
+        else:
+            import interfaz.interfaz as rich_ui
+        rich_ui.main()
         return
     except Exception as e:
         # Mostrar por qué no se pudo arrancar la interfaz rica y usar fallback
@@ -17,8 +51,14 @@ def main():
         print(f"Detalles: {e}", file=sys.stderr)
 
     # Fallback al menú de texto
-    from interfaz.menu import mostrar_menu
-    mostrar_menu()
+    if perfilador:
+        from src.perfilado import ACCIONES_MENU
+        with perfilador.perfilar("inicio_menu"):
+            import interfaz.menu as menu_clasico
+        perfilador.instalar(menu_clasico, ACCIONES_MENU)
+    else:
+        import interfaz.menu as menu_clasico
+    menu_clasico.mostrar_menu()
 
 
 if __name__ == "__main__":
@@ -3,4 +3,4 @@ Paquete src: contiene clases y persistencia del proyecto.
 Archivo __init__ vacío necesario para permitir imports de paquete.
 """
 
-__all__ = ["clases", "persistencia"]
+__all__ = ["clases", "persistencia", "metricas", "perfilado", "importacion", "exportacion", "servidor", "concurrencia", "recomendador", "indices", "consultas", "cache", "estadisticas", "vencimientos", "catalogo_binario", "fragmentos"]
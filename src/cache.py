@@ -0,0 +1,75 @@
+"""Caché LRU de resultados de búsqueda.
+
+`Biblioteca` guarda aquí los resultados de `buscar_*` con la clave
+(método, consulta normalizada). Cada entrada lleva la firma del catálogo con
+la que se calculó (versión, lista, tamaño y los cambios in-place de los libros:
+de atributos para las búsquedas por texto y año, de disponibilidad para
+`buscar_disponibles`); si al consultarla la firma ya no coincide se recalcula.
+
+No hace falta vaciar la caché al cambiar el catálogo: las entradas viejas no
+vuelven a acertar y salen por el extremo LRU.
+
+El tamaño por defecto se puede cambiar con la variable de entorno
+BIBLIOTECA_CACHE (0 la desactiva).
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+TAM_CACHE = int(os.environ.get("BIBLIOTECA_CACHE", "256"))
+
+
+class CacheResultados:
+    def __init__(self, capacidad: int = TAM_CACHE):
+        self.capacidad = max(0, int(capacidad))
+        self._entradas = OrderedDict()  # clave -> (firma, valor); la más reciente al final
+        self._lock = threading.Lock()   # BibliotecaConcurrente busca desde varios hilos
+        self.aciertos = 0
+        self.fallos = 0
+        self.invalidaciones = 0
+
+    def obtener(self, clave, firma, calcular):
+        """Devuelve el valor guardado para `clave` si se calculó con la misma `firma`;
+        si no, llama a `calcular()` y lo guarda."""
+        if not self.capacidad:
+            self.fallos += 1
+            return calcular()
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                if entrada[0] == firma:
+                    self._entradas.move_to_end(clave)
+                    self.aciertos += 1
+                    return entrada[1]
+                self.invalidaciones += 1
+            self.fallos += 1
+        valor = calcular()  # fuera del candado: dos hilos pueden calcular lo mismo a la vez
+        with self._lock:
+            self._entradas[clave] = (firma, valor)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.capacidad:
+                self._entradas.popitem(last=False)
+        return valor
+
+    def vaciar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def __len__(self):
+        return len(self._entradas)
+
+    @property
+    def tasa_aciertos(self) -> float:
+        total = self.aciertos + self.fallos
+        return self.aciertos / total if total else 0.0
+
+    def estadisticas(self) -> dict:
+        return {
+            "entradas": len(self._entradas),
+            "capacidad": self.capacidad,
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "invalidaciones": self.invalidaciones,
+            "tasa_aciertos": self.tasa_aciertos,
+        }
@@ -0,0 +1,218 @@
+"""Catálogo en un archivo binario de registros fijos, para abrir con mmap.
+
+Buscar un libro en libros.json obliga a parsear el archivo entero y crear todos
+los objetos `Libro`. `catalogo.bin` es una copia del catálogo que se consulta sin
+cargarlo:
+
+    cabecera | registros de tamaño fijo (ordenados por título) | montón de textos
+
+- Cabecera: magia, versión del formato, tamaño de registro, número de libros,
+  posición del montón y versión de libros.json con la que se generó.
+- Registro: (posición, longitud) en el montón de id, título, autor, género, isbn y
+  título normalizado, más año y disponibilidad. El libro N está en
+  `cabecera + N * tamaño de registro`: acceso O(1).
+- Montón: textos UTF-8, sin repetir (autores y géneros se comparten).
+
+Los registros van ordenados por título normalizado (el mismo orden que
+`Biblioteca`), así que buscar por título es una búsqueda binaria que solo lee los
+registros que visita. `marcar_disponible` reescribe el byte de disponibilidad en el
+sitio; el resto del archivo es de solo lectura y se regenera con
+`persistencia.guardar_catalogo_binario` cuando cambia el catálogo.
+
+    python -m src.catalogo_binario --generar
+    python -m src.catalogo_binario --buscar "dune"
+"""
+
+import argparse
+import mmap
+import os
+import struct
+
+from .clases import Libro
+from .indices import normalizar
+
+MAGIA = b"BIBC"
+VERSION_FORMATO = 1
+
+# magia, versión del formato, tamaño de registro, nº de libros, posición del montón, versión de libros.json
+CABECERA = struct.Struct("<4sHHIIQ")
+# 6 textos x (posición, longitud), año, disponible
+REGISTRO = struct.Struct("<12IiB3x")
+CAMPOS = ("id", "titulo", "autor", "genero", "isbn", "clave_titulo")
+_POS_DISPONIBLE = 12 * 4 + 4
+_POS_TITULO = CAMPOS.index("titulo") * 8
+_POS_CLAVE = CAMPOS.index("clave_titulo") * 8
+SIN_YEAR = -2 ** 31
+
+
+def escribir(ruta: str, libros, version_origen: int = 0) -> int:
+    """Escribe el catálogo binario de `libros` en `ruta` (atómico). Devuelve los bytes."""
+    libros = sorted(libros, key=lambda l: l.clave_titulo)  # estable, como el quicksort por título
+    monton = bytearray()
+    posiciones = {}  # texto -> (posición, longitud): cada texto se guarda una sola vez
+
+    def texto(valor):
+        valor = "" if valor is None else str(valor)
+        if valor not in posiciones:
+            datos = valor.encode("utf-8")
+            posiciones[valor] = (len(monton), len(datos))
+            monton.extend(datos)
+        return posiciones[valor]
+
+    inicio_monton = CABECERA.size + REGISTRO.size * len(libros)
+    registros = bytearray(REGISTRO.size * len(libros))
+    for i, l in enumerate(libros):
+        campos = []
+        for valor in (l.id, l.titulo, l.autor, l.genero, l.isbn, l.clave_titulo):
+            campos.extend(texto(valor))
+        year = l.year if isinstance(l.year, int) else SIN_YEAR
+        REGISTRO.pack_into(registros, i * REGISTRO.size, *campos, year, 1 if l.disponible else 0)
+
+    tmp = f"{ruta}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(CABECERA.pack(MAGIA, VERSION_FORMATO, REGISTRO.size, len(libros), inicio_monton,
+                                  version_origen))
+            f.write(registros)
+            f.write(monton)
+            tamano = f.tell()
+        os.replace(tmp, ruta)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return tamano
+
+
+class CatalogoBinario:
+    """Catálogo binario abierto con mmap. Con escritura=True se puede cambiar la
+    disponibilidad en el sitio (el resto es de solo lectura)."""
+
+    def __init__(self, ruta: str, escritura: bool = False):
+        self.ruta = ruta
+        self._archivo = open(ruta, "r+b" if escritura else "rb")
+        self._mm = None
+        try:
+            self._mm = mmap.mmap(self._archivo.fileno(), 0,
+                                 access=mmap.ACCESS_WRITE if escritura else mmap.ACCESS_READ)
+            magia, version, tam_registro, self._n, self._monton, self.version_origen = \
+                CABECERA.unpack_from(self._mm, 0)
+        except (ValueError, struct.error):
+            self.cerrar()
+            raise ValueError(f"{ruta} no es un catálogo binario")
+        if magia != MAGIA or version != VERSION_FORMATO or tam_registro != REGISTRO.size:
+            self.cerrar()
+            raise ValueError(f"{ruta}: formato de catálogo binario no soportado")
+
+    def cerrar(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._archivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def __len__(self):
+        return self._n
+
+    # ---------- Acceso a registros ----------
+    def _posicion(self, i: int) -> int:
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError("libro fuera de rango")
+        return CABECERA.size + i * REGISTRO.size
+
+    def _texto(self, inicio: int, longitud: int) -> str:
+        return self._mm[self._monton + inicio:self._monton + inicio + longitud].decode("utf-8")
+
+    def _clave(self, i: int) -> bytes:
+        """Título normalizado del libro i en bytes (UTF-8 ordena igual que el texto)."""
+        inicio, longitud = struct.unpack_from("<II", self._mm, self._posicion(i) + _POS_CLAVE)
+        return self._mm[self._monton + inicio:self._monton + inicio + longitud]
+
+    def __getitem__(self, i: int) -> Libro:
+        """El libro i (en orden de título) como objeto Libro, leyendo solo su registro."""
+        valores = REGISTRO.unpack_from(self._mm, self._posicion(i))
+        id_libro, titulo, autor, genero, isbn, _ = (self._texto(valores[k], valores[k + 1])
+                                                    for k in range(0, 12, 2))
+        year = None if valores[12] == SIN_YEAR else valores[12]
+        return Libro(titulo, autor, genero, year, bool(valores[13]), id_libro=id_libro, isbn=isbn or None)
+
+    def titulo(self, i: int) -> str:
+        inicio, longitud = struct.unpack_from("<II", self._mm, self._posicion(i) + _POS_TITULO)
+        return self._texto(inicio, longitud)
+
+    def disponible(self, i: int) -> bool:
+        return bool(self._mm[self._posicion(i) + _POS_DISPONIBLE])
+
+    def marcar_disponible(self, i: int, valor: bool):
+        """Cambia la disponibilidad del libro i en el archivo (requiere escritura=True)."""
+        self._mm[self._posicion(i) + _POS_DISPONIBLE] = 1 if valor else 0
+
+    def sincronizar(self):
+        """Fuerza a disco los cambios hechos con marcar_disponible."""
+        self._mm.flush()
+
+    # ---------- Búsqueda binaria por título ----------
+    def _primero_desde(self, clave: bytes) -> int:
+        """Primer índice cuyo título normalizado es >= clave."""
+        bajo, alto = 0, self._n
+        while bajo < alto:
+            medio = (bajo + alto) // 2
+            if self._clave(medio) < clave:
+                bajo = medio + 1
+            else:
+                alto = medio
+        return bajo
+
+    def buscar_titulo(self, titulo: str) -> int:
+        """Índice del libro con ese título exacto (sin tildes ni mayúsculas), o -1."""
+        clave = normalizar(titulo).encode("utf-8")
+        i = self._primero_desde(clave)
+        return i if i < self._n and self._clave(i) == clave else -1
+
+    def libro_por_titulo(self, titulo: str):
+        i = self.buscar_titulo(titulo)
+        return self[i] if i >= 0 else None
+
+    def con_prefijo(self, prefijo: str, limite: int = 10) -> list:
+        """Índices de hasta `limite` libros cuyo título empieza por `prefijo`, en orden."""
+        clave = normalizar(prefijo).encode("utf-8")
+        resultado = []
+        i = self._primero_desde(clave)
+        while i < self._n and len(resultado) < limite and self._clave(i).startswith(clave):
+            resultado.append(i)
+            i += 1
+        return resultado
+
+
+def main(argv=None):
+    from . import persistencia
+
+    parser = argparse.ArgumentParser(description="Catálogo binario (mmap) generado desde libros.json")
+    parser.add_argument("--generar", action="store_true", help="regenerar el catálogo binario desde libros.json")
+    parser.add_argument("--buscar", help="título exacto (o prefijo) a buscar sin cargar el catálogo")
+    opciones = parser.parse_args(argv)
+
+    if opciones.generar:
+        tamano = persistencia.guardar_catalogo_binario(persistencia.cargar_libros())
+        print(f"{persistencia.CATALOGO_BINARIO}: {tamano} bytes")
+    if opciones.buscar:
+        catalogo = persistencia.abrir_catalogo_binario()
+        if catalogo is None:
+            print("No hay catálogo binario; genéralo con --generar")
+            return
+        with catalogo:
+            if not persistencia.catalogo_binario_al_dia(catalogo):
+                print("(aviso: libros.json cambió desde que se generó el catálogo binario)")
+            i = catalogo.buscar_titulo(opciones.buscar)
+            for j in ([i] if i >= 0 else catalogo.con_prefijo(opciones.buscar)):
+                print(catalogo[j])
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,98 @@
 import json
+import time
+import uuid
+from operator import attrgetter
 from datetime import datetime
+from .metricas import instrumentar
+from .indices import IndicePrefijos, IndiceTrigramas, UnionFind, normalizar
+from .consultas import IndicesCatalogo, PlanConsulta
+from .cache import CacheResultados, TAM_CACHE
+
+def nuevo_id_libro() -> str:
+    return uuid.uuid4().hex
+
+
+def indexar_por_id(objetos) -> dict:
+    """id -> objeto (libros o usuarios); si un id se repite gana el primero, como con next()."""
+    indice = {}
+    for o in objetos:
+        indice.setdefault(o.id, o)
+    return indice
+
 
 class Libro:
-    def __init__(self, titulo: str, autor: str, genero: str, year: int, disponible: bool = True):
+    # Contadores de cambios in-place en cualquier libro (p. ej. libro.genero = ... o un préstamo):
+    # los libros no conocen su biblioteca, así que la caché de búsquedas los usa como versión.
+    cambios_atributos = 0       # título, autor, género o año
+    cambios_disponibilidad = 0  # disponible <-> prestado
+
+    def __init__(self, titulo: str, autor: str, genero: str, year: int, disponible: bool = True,
+                 id_libro: str = None, isbn: str = None):
+        # Identificador estable: no cambia al renombrar el libro y distingue títulos repetidos.
+        # Préstamos, solicitudes y grafo referencian el libro por él.
+        self.id = id_libro or nuevo_id_libro()
+        self.isbn = isbn or None
         self.titulo = titulo
         self.autor = autor
         self.genero = genero
         # Usar atributo 'year' (sin caracteres especiales)
-        self.year = year
-        self.disponible = disponible
+        self._year = year
+        self._disponible = disponible
+
+    # Claves normalizadas (sin tildes, casefold) calculadas al asignar el atributo: ordenar,
+    # buscar, agrupar el grafo y casar solicitudes las usan en lugar de llamar a .lower().
+    @property
+    def titulo(self):
+        return self._titulo
+
+    @titulo.setter
+    def titulo(self, valor):
+        if getattr(self, "_titulo", valor) != valor:
+            Libro.cambios_atributos += 1
+        self._titulo = valor
+        self.clave_titulo = normalizar(valor) if isinstance(valor, str) else ""
+
+    @property
+    def autor(self):
+        return self._autor
+
+    @autor.setter
+    def autor(self, valor):
+        if getattr(self, "_autor", valor) != valor:
+            Libro.cambios_atributos += 1
+        self._autor = valor
+        self.clave_autor = normalizar(valor) if isinstance(valor, str) else ""
+
+    @property
+    def genero(self):
+        return self._genero
+
+    @genero.setter
+    def genero(self, valor):
+        if getattr(self, "_genero", valor) != valor:
+            Libro.cambios_atributos += 1
+        self._genero = valor
+        self.clave_genero = normalizar(valor) if isinstance(valor, str) else ""
+
+    @property
+    def year(self):
+        return self._year
+
+    @year.setter
+    def year(self, valor):
+        if valor != self._year:
+            Libro.cambios_atributos += 1
+        self._year = valor
+
+    @property
+    def disponible(self):
+        return self._disponible
+
+    @disponible.setter
+    def disponible(self, valor):
+        if valor != self._disponible:
+            Libro.cambios_disponibilidad += 1
+        self._disponible = valor
 
     def __str__(self):
         return f"{self.titulo} - {self.autor} ({self.year}) - {'Disponible' if self.disponible else 'Prestado'}"
@@ -16,7 +100,8 @@ class Libro:
     def to_dict(self):
         """Convierte el objeto Libro a diccionario para JSON."""
         # Exportar la clave estándar 'year' y 'genero'/'categoria' para compatibilidad visual.
-        return {
+        data = {
+            "id": self.id,
             "titulo": self.titulo,
             "autor": self.autor,
             "genero": self.genero,
@@ -24,6 +109,9 @@ class Libro:
             "year": self.year,
             "disponible": self.disponible
         }
+        if self.isbn:
+            data["isbn"] = self.isbn
+        return data
 
     @classmethod
     def from_dict(cls, data: dict):
@@ -46,7 +134,9 @@ class Libro:
             autor=autor,
             genero=genero,
             year=year,
-            disponible=disponible
+            disponible=disponible,
+            id_libro=data.get("id"),  # sin id (datos antiguos) se genera uno nuevo
+            isbn=data.get("isbn")
         )
 
 
@@ -75,41 +165,102 @@ class Usuario:
         )
 
 
+# Días de préstamo según el tipo de usuario (los tipos desconocidos usan DIAS_PRESTAMO_DEFECTO)
+DIAS_PRESTAMO = {"estudiante": 14, "profesor": 30}
+DIAS_PRESTAMO_DEFECTO = 14
+SEGUNDOS_DIA = 24 * 3600
+
+# Las fechas de préstamos y solicitudes se guardan en memoria como segundos desde epoch
+# (int): ordenar la cola o comparar vencimientos es comparar enteros. Solo se formatean
+# al escribir JSON o mostrarlas en pantalla, como texto ISO "AAAA-MM-DD HH:MM:SS" en hora
+# local (datetime.isoformat/fromisoformat: bastante más rápidos que strftime/strptime).
+
+
+def dias_prestamo(tipo: str) -> int:
+    return DIAS_PRESTAMO.get(tipo, DIAS_PRESTAMO_DEFECTO)
+
+
+def marca_actual() -> int:
+    return int(time.time())
+
+
+def a_marca(valor):
+    """Convierte a segundos desde epoch una marca (int/float) o un texto "AAAA-MM-DD HH:MM:SS"
+    (JSON y datos antiguos). None se queda en None."""
+    if valor is None or isinstance(valor, int):
+        return valor
+    if isinstance(valor, float):
+        return int(valor)
+    return int(datetime.fromisoformat(valor).timestamp())
+
+
+def formatear_fecha(marca) -> str:
+    """Marca -> texto "AAAA-MM-DD HH:MM:SS"; None se queda en None."""
+    if marca is None:
+        return None
+    return datetime.fromtimestamp(marca).isoformat(" ")
+
+
 class Prestamo:
-    def __init__(self, usuario: Usuario, libro: Libro, fecha_prestamo: str = None):
+    def __init__(self, usuario: Usuario, libro: Libro, fecha_prestamo=None, fecha_vencimiento=None):
+        """Las fechas pueden ser marcas (int) o textos "AAAA-MM-DD HH:MM:SS"."""
         self.usuario = usuario
         self.libro = libro
-        self.fecha_prestamo = fecha_prestamo if fecha_prestamo else datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.fecha_prestamo = a_marca(fecha_prestamo) if fecha_prestamo else marca_actual()
+        if not fecha_vencimiento:
+            # préstamos guardados antes de existir el vencimiento: se calcula con el tipo de usuario
+            fecha_vencimiento = self.fecha_prestamo + dias_prestamo(usuario.tipo) * SEGUNDOS_DIA
+        self.fecha_vencimiento = a_marca(fecha_vencimiento)
         self.fecha_devolucion = None
+        self._vencimientos = None  # IndiceVencimientos que lo sigue mientras está activo
 
     def devolver(self):
         """Marca el libro como devuelto."""
-        self.fecha_devolucion = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.fecha_devolucion = marca_actual()
         self.libro.disponible = True
+        if self._vencimientos is not None:
+            self._vencimientos.quitar(self)
+
+    def vencido(self, ahora: int = None) -> bool:
+        ahora = marca_actual() if ahora is None else ahora
+        return self.fecha_devolucion is None and self.fecha_vencimiento <= ahora
 
     def __str__(self):
-        return f"Prestamo: {self.libro.titulo} -> {self.usuario.nombre} ({self.fecha_prestamo})"
+        return f"Prestamo: {self.libro.titulo} -> {self.usuario.nombre} ({formatear_fecha(self.fecha_prestamo)})"
 
     def to_dict(self):
         return {
             "usuario": self.usuario.to_dict(),
             "libro": self.libro.to_dict(),
-            "fecha_prestamo": self.fecha_prestamo,
-            "fecha_devolucion": self.fecha_devolucion
+            "fecha_prestamo": formatear_fecha(self.fecha_prestamo),
+            "fecha_vencimiento": formatear_fecha(self.fecha_vencimiento),
+            "fecha_devolucion": formatear_fecha(self.fecha_devolucion)
         }
 
     @classmethod
-    def from_dict(cls, data: dict, usuarios_registrados: list, libros_registrados: list):
-        # Buscar usuario y libro por ID/título
+    def from_dict(cls, data: dict, usuarios_registrados, libros_registrados):
+        """usuarios_registrados / libros_registrados: listas o, para cargar muchos préstamos,
+        dicts id -> objeto (indexar_por_id) que se resuelven en O(1)."""
+        # Buscar usuario por ID y libro por ID (o por título en préstamos guardados sin id)
         usuario_data = data["usuario"]
         libro_data = data["libro"]
 
-        usuario = next((u for u in usuarios_registrados if u.id == usuario_data["id"]), None)
-        libro = next((l for l in libros_registrados if l.titulo == libro_data["titulo"]), None)
+        if isinstance(usuarios_registrados, dict):
+            usuario = usuarios_registrados.get(usuario_data["id"])
+        else:
+            usuario = next((u for u in usuarios_registrados if u.id == usuario_data["id"]), None)
+        libros = libros_registrados.values() if isinstance(libros_registrados, dict) else libros_registrados
+        id_libro = libro_data.get("id")
+        if id_libro is None:
+            libro = next((l for l in libros if l.titulo == libro_data["titulo"]), None)
+        elif isinstance(libros_registrados, dict):
+            libro = libros_registrados.get(id_libro)
+        else:
+            libro = next((l for l in libros if l.id == id_libro), None)
 
         if usuario and libro:
-            prestamo = cls(usuario, libro, data["fecha_prestamo"])
-            prestamo.fecha_devolucion = data.get("fecha_devolucion")
+            prestamo = cls(usuario, libro, data["fecha_prestamo"], data.get("fecha_vencimiento"))
+            prestamo.fecha_devolucion = a_marca(data.get("fecha_devolucion") or None)
             libro.disponible = not bool(prestamo.fecha_devolucion)  # Si hay devolución, disponible=True
             return prestamo
         return None
@@ -121,21 +272,47 @@ class Prestamo:
 # -----------------------------------------------------------
 
 class Biblioteca:
-    def __init__(self):
+    def __init__(self, tam_cache: int = TAM_CACHE):
+        self.version = 0  # se incrementa con cada alta, baja, modificación u ordenación
         self.libros = []  # Lista de objetos Libro
+        self._indices = {}  # nombre -> (firma del catálogo, índice)
+        self.cache = CacheResultados(tam_cache)  # resultados de buscar_*
+
+    @property
+    def libros(self):
+        return self._libros
+
+    @libros.setter
+    def libros(self, libros):
+        # reemplazar la lista (cargar, sincronizar, copy-on-write) cuenta como cambio del catálogo
+        self._libros = libros
+        self.version += 1
         
     # ---------- ORDENAMIENTO (quicksort por título) ----------
     def _quicksort(self, arr, low, high):
-        if low < high:
+        # Recursión solo sobre la mitad más pequeña: profundidad O(log n) incluso
+        # con listas ya ordenadas (p. ej. al añadir un libro a un catálogo ordenado).
+        while low < high:
             p = self._partition(arr, low, high)
-            self._quicksort(arr, low, p - 1)
-            self._quicksort(arr, p + 1, high)
+            if p - low < high - p:
+                self._quicksort(arr, low, p - 1)
+                low = p + 1
+            else:
+                self._quicksort(arr, p + 1, high)
+                high = p - 1
 
     def _partition(self, arr, low, high):
-        pivot = arr[high].titulo.lower()
+        # pivote por mediana de tres, colocado al final para la partición de Lomuto
+        mid = (low + high) // 2
+        a, b, c = arr[low].clave_titulo, arr[mid].clave_titulo, arr[high].clave_titulo
+        if a <= b <= c or c <= b <= a:
+            arr[mid], arr[high] = arr[high], arr[mid]
+        elif b <= a <= c or c <= a <= b:
+            arr[low], arr[high] = arr[high], arr[low]
+        pivot = arr[high].clave_titulo
         i = low - 1
         for j in range(low, high):
-            if arr[j].titulo.lower() <= pivot:
+            if arr[j].clave_titulo <= pivot:
                 i += 1
                 arr[i], arr[j] = arr[j], arr[i]
         arr[i+1], arr[high] = arr[high], arr[i+1]
@@ -146,54 +323,184 @@ class Biblioteca:
         if not self.libros:
             return
         self._quicksort(self.libros, 0, len(self.libros) - 1)
+        self.version += 1  # cambia el orden de los resultados
 
     # ---------- MÉTODOS DE BÚSQUEDA ----------
+    def _cacheado(self, clave, calcular, disponibilidad: bool = False):
+        """Resultado de `calcular()` a través de la caché LRU. Devuelve una copia de la lista
+        guardada para que el llamador pueda modificarla."""
+        cambios = Libro.cambios_disponibilidad if disponibilidad else Libro.cambios_atributos
+        firma = (self.version, id(self.libros), len(self.libros), cambios)
+        return list(self.cache.obtener(clave, firma, calcular))
+
+    @instrumentar("biblioteca.buscar_por_titulo")
     def buscar_por_titulo(self, titulo: str):
-        """Devuelve una lista de libros cuyo título coincide parcial."""
-        return [libro for libro in self.libros if titulo.lower() in libro.titulo.lower()]
+        """Devuelve una lista de libros cuyo título coincide parcial (sin distinguir tildes ni mayúsculas)."""
+        q = normalizar(titulo)
+        return self._cacheado(("titulo", q), lambda: [libro for libro in self.libros if q in libro.clave_titulo])
 
+    @instrumentar("biblioteca.buscar_por_autor")
     def buscar_por_autor(self, autor: str):
         """Devuelve libros que coinciden parcialmente con el autor."""
-        return [libro for libro in self.libros if autor.lower() in libro.autor.lower()]
+        q = normalizar(autor)
+        return self._cacheado(("autor", q), lambda: [libro for libro in self.libros if q in libro.clave_autor])
 
+    @instrumentar("biblioteca.buscar_por_genero")
     def buscar_por_genero(self, genero: str):
-        """Devuelve libros del género especificado."""
-        return [libro for libro in self.libros if genero.lower() in libro.genero.lower()]
+        """Devuelve libros del género especificado ("Fantasia" encuentra "Fantasía")."""
+        q = normalizar(genero)
+        return self._cacheado(("genero", q), lambda: [libro for libro in self.libros if q in libro.clave_genero])
 
+    @instrumentar("biblioteca.buscar_por_año")
     def buscar_por_año(self, year: int):
         """Devuelve libros del año indicado (parámetro 'year')."""
-        return [libro for libro in self.libros if libro.year == year]
+        return self._cacheado(("year", year), lambda: [libro for libro in self.libros if libro.year == year])
 
+    @instrumentar("biblioteca.buscar_disponibles")
     def buscar_disponibles(self):
         """Devuelve solo libros disponibles para préstamo."""
-        return [libro for libro in self.libros if libro.disponible]
+        return self._cacheado(("disponibles",), lambda: [libro for libro in self.libros if libro.disponible],
+                              disponibilidad=True)
+
+    def _firma(self):
+        # como en _cacheado, los cambios in-place de atributos (libro.genero = ...) también cuentan
+        return (self.version, id(self.libros), len(self.libros), Libro.cambios_atributos)
+
+    def _indice(self, nombre: str, construir):
+        """Devuelve el índice `nombre`, reconstruyéndolo si el catálogo cambió
+        (nueva versión, otra lista, distinto tamaño o un atributo cambiado in-place)."""
+        firma = self._firma()
+        guardado = self._indices.get(nombre)
+        if guardado is None or guardado[0] != firma:
+            guardado = (firma, construir(self.libros))
+            self._indices[nombre] = guardado
+        return guardado[1]
+
+    def indice_vigente(self, nombre: str):
+        """El índice `nombre` si está al día con el catálogo, o None. Nunca lo reconstruye."""
+        guardado = self._indices.get(nombre)
+        if guardado is not None and guardado[0] == self._firma():
+            return guardado[1]
+        return None
+
+    def _mantener_indice(self, nombre: str, firma_previa, aplicar):
+        """Aplica un cambio puntual a un índice incremental en lugar de dejar que se reconstruya.
+        Solo si estaba al día antes del cambio (firma_previa); si no, se reconstruirá al usarlo."""
+        guardado = self._indices.get(nombre)
+        if guardado is not None and guardado[0] == firma_previa:
+            aplicar(guardado[1])
+            self._indices[nombre] = (self._firma(), guardado[1])
+
+    def indice_prefijos(self) -> IndicePrefijos:
+        """Títulos para autocompletar; altas, bajas y cambios de título lo actualizan sin reconstruirlo."""
+        return self._indice("prefijos", lambda libros: IndicePrefijos(l.titulo for l in libros))
+
+    def indice_ids(self) -> dict:
+        """id -> Libro; altas, bajas y cambios lo actualizan sin reconstruirlo."""
+        return self._indice("ids", indexar_por_id)
+
+    def libro_por_id(self, id_libro: str):
+        """El libro con ese id, o None. O(1) con el índice al día."""
+        return self.indice_ids().get(id_libro)
+
+    def autocompletar_titulo(self, prefijo: str, k: int = 10) -> list:
+        """Hasta k títulos que empiezan por `prefijo` (sin distinguir tildes ni mayúsculas)."""
+        return self.indice_prefijos().completar(prefijo, k)
+
+    def indice_difuso(self) -> IndiceTrigramas:
+        """Índice de trigramas de títulos y autores."""
+        return self._indice("difuso", IndiceTrigramas)
+
+    def indices_consulta(self) -> IndicesCatalogo:
+        """Índices por autor, género y año usados por consultar()."""
+        return self._indice("consulta", IndicesCatalogo)
+
+    def plan_consulta(self, **criterios) -> PlanConsulta:
+        return PlanConsulta(self.libros, self.indices_consulta(), criterios)
+
+    @instrumentar("biblioteca.consultar")
+    def consultar(self, **criterios):
+        """Libros que cumplen todos los criterios (AND), en orden de catálogo.
+        Criterios: titulo, autor, genero (contienen, sin tildes ni mayúsculas), year,
+        year_desde, year_hasta y disponible (True/False). Sin criterios devuelve todo."""
+        return self.plan_consulta(**criterios).ejecutar()
+
+    def explicar(self, **criterios) -> str:
+        """Ejecuta la consulta y devuelve el plan elegido con las cardinalidades estimadas."""
+        plan = self.plan_consulta(**criterios)
+        plan.ejecutar()
+        return str(plan)
+
+    @instrumentar("biblioteca.buscar_difuso")
+    def buscar_difuso(self, texto: str, limite: int = 10, campos=("titulo", "autor"), presupuesto_ms: float = 50.0):
+        """Búsqueda tolerante a erratas en título y/o autor.
+        Devuelve hasta `limite` pares (libro, puntuación entre 0 y 1), los más parecidos primero."""
+        return self.indice_difuso().buscar(texto, limite, campos=campos, presupuesto_ms=presupuesto_ms)
 
     def agregar_libro(self, libro: Libro):
         """Añade un libro a la colección."""
+        firma = self._firma()
         self.libros.append(libro)
+        self.version += 1
         # Reordenar inmediatamente usando quicksort por título
         self.ordenar_por_titulo()
+        self._mantener_indice("prefijos", firma, lambda indice: indice.agregar(libro.titulo))
+        self._mantener_indice("ids", firma, lambda indice: indice.setdefault(libro.id, libro))
+
+    def agregar_libros(self, libros: list, ordenar: bool = True):
+        """Añade varios libros de una vez con una sola ordenación al final.
+        Con ordenar=False el caller debe llamar a ordenar_por_titulo() al terminar."""
+        self.libros.extend(libros)
+        self.version += 1
+        if ordenar:
+            self.ordenar_por_titulo()
+
+    def _buscar_para_modificar(self, titulo_buscar: str):
+        # por id (sin ambigüedad con títulos repetidos) o, si no, por título exacto
+        libro = self.indice_ids().get(titulo_buscar)
+        if libro is None:
+            clave = normalizar(titulo_buscar)
+            libro = next((l for l in self.libros if l.clave_titulo == clave), None)
+        return libro
 
     def actualizar_libro(self, titulo_buscar: str, **kwargs):
-        """Actualiza atributos de un libro encontrado por título (parcial o exacto).
+        """Actualiza atributos de un libro encontrado por id o por título exacto.
         kwargs puede incluir 'titulo','autor','genero','year','disponible'.
+        El id no cambia: préstamos, solicitudes y grafo siguen apuntando al libro renombrado.
         Devuelve True si se actualizó, False si no se encontró."""
-        libro = next((l for l in self.libros if l.titulo.lower() == titulo_buscar.lower()), None)
+        libro = self._buscar_para_modificar(titulo_buscar)
         if not libro:
             return False
+        firma, titulo_previo = self._firma(), libro.titulo
         for k, v in kwargs.items():
             if hasattr(libro, k):
                 setattr(libro, k, v)
+        self.version += 1
         # Si se cambió el título, reordenar
         self.ordenar_por_titulo()
+
+        def renombrar(indice):
+            if libro.titulo != titulo_previo:
+                indice.eliminar(titulo_previo)
+                indice.agregar(libro.titulo)
+        self._mantener_indice("prefijos", firma, renombrar)
+        self._mantener_indice("ids", firma, lambda indice: None)
         return True
 
     def eliminar_libro(self, titulo_buscar: str):
-        """Elimina un libro por título (exacto). Devuelve True si se eliminó."""
-        idx = next((i for i, l in enumerate(self.libros) if l.titulo.lower() == titulo_buscar.lower()), None)
-        if idx is None:
+        """Elimina un libro por id o por título (exacto). Devuelve True si se eliminó."""
+        libro = self._buscar_para_modificar(titulo_buscar)
+        if libro is None:
             return False
-        del self.libros[idx]
+        firma = self._firma()
+        self.libros.remove(libro)
+        self.version += 1
+        self._mantener_indice("prefijos", firma, lambda indice: indice.eliminar(libro.titulo))
+
+        def quitar_id(indice):
+            if indice.get(libro.id) is libro:
+                del indice[libro.id]
+        self._mantener_indice("ids", firma, quitar_id)
         return True
 
 
@@ -204,39 +511,47 @@ class Biblioteca:
 
 class GrafoLibros:
     def __init__(self):
-        self.adyacencia = {}   # {titulo : [titulos relacionados]}
+        self.adyacencia = {}   # {id_libro : [ids relacionados]}
+        self.nodos = {}        # {id_libro : Libro}, para devolver títulos aunque el libro se renombre
+        # (adyacencia de la que salen, UnionFind de sus componentes); None tras una baja
+        self._componentes = None
 
     def agregar_libro(self, libro: Libro):
         """Agrega un nodo al grafo si no existe."""
-        if libro.titulo not in self.adyacencia:
-            self.adyacencia[libro.titulo] = []
+        self.nodos[libro.id] = libro
+        if libro.id not in self.adyacencia:
+            self.adyacencia[libro.id] = []
+            uf = self._componentes_al_dia()
+            if uf is not None:
+                uf.agregar(libro.id)
 
     def relacionar(self, libro1: Libro, libro2: Libro):
         """Crea una relación simple entre dos libros (bidireccional)."""
-        t1 = libro1.titulo
-        t2 = libro2.titulo
-
-        if t1 not in self.adyacencia:
-            self.adyacencia[t1] = []
-        if t2 not in self.adyacencia:
-            self.adyacencia[t2] = []
+        self.agregar_libro(libro1)
+        self.agregar_libro(libro2)
+        t1 = libro1.id
+        t2 = libro2.id
 
         if t2 not in self.adyacencia[t1]:
             self.adyacencia[t1].append(t2)
         if t1 not in self.adyacencia[t2]:
             self.adyacencia[t2].append(t1)
+        uf = self._componentes_al_dia()
+        if uf is not None:
+            uf.unir(t1, t2)
 
+    @instrumentar("grafo.recomendaciones")
     def recomendaciones(self, libro: Libro):
-        """Devuelve una lista de títulos recomendados para un libro.
-        Por defecto, realiza una búsqueda en profundidad (DFS) desde el nodo y
-        devuelve los títulos alcanzables (excluyendo el libro original).
+        """Devuelve una lista de títulos recomendados para un libro: los de toda su
+        componente conexa (excluyendo el libro original), en orden de alta en el grafo
+        (el del catálogo tras build_from_biblioteca), no de cercanía.
+        Para los más cercanos primero, usar dfs con max_depth o limite.
         """
-        # usar DFS para obtener recomendaciones ordenadas por recorrido
-        return self.dfs(libro.titulo)
+        return [self.titulo(n) for n in self.componente_ids(libro.id) if n != libro.id]
 
     def remover_libro(self, libro: Libro):
         """Elimina un nodo del grafo y todas las referencias a él."""
-        t = libro.titulo
+        t = libro.id
         if t in self.adyacencia:
             # eliminar referencias desde otros nodos
             for otro in list(self.adyacencia.keys()):
@@ -247,63 +562,187 @@ class GrafoLibros:
                         pass
             # eliminar el nodo
             del self.adyacencia[t]
+            # la baja puede partir la componente: se recalculan en la próxima consulta,
+            # una sola vez aunque haya varias bajas seguidas
+            self._componentes = None
+        self.nodos.pop(t, None)
+
+    # ---------- Componentes conexas ----------
+    def _componentes_al_dia(self):
+        """UnionFind vigente, o None si hay que reconstruirlo (tras una baja o si se
+        reemplazó la adyacencia, p. ej. en from_dict)."""
+        componentes = self._componentes
+        if componentes is not None and componentes[0] is self.adyacencia:
+            return componentes[1]
+        return None
+
+    def componentes(self) -> UnionFind:
+        """UnionFind de las componentes conexas, reconstruyéndolo si hace falta (O(V+E))."""
+        uf = self._componentes_al_dia()
+        if uf is None:
+            adyacencia = self.adyacencia
+            uf = UnionFind(adyacencia)
+            # recorrido por componentes: una unión por nodo, no por arista
+            origen = {}  # nodo -> nodo desde el que se alcanzó primero
+            for inicio in adyacencia:
+                if inicio in origen:
+                    continue
+                origen[inicio] = inicio
+                pila = [inicio]
+                while pila:
+                    for n in adyacencia.get(pila.pop(), ()):
+                        o = origen.get(n)
+                        if o is None:
+                            origen[n] = inicio
+                            uf.unir(inicio, n)
+                            pila.append(n)
+                        elif o != inicio:
+                            uf.unir(inicio, n)  # arista en un solo sentido hacia un recorrido anterior
+            self._componentes = (adyacencia, uf)
+        return uf
+
+    def componente_ids(self, inicio: str) -> list:
+        """Ids de la componente de `inicio` (id o título exacto), incluido él mismo, en
+        orden de alta en el grafo. Devuelve una lista nueva."""
+        nodo = self._nodo(inicio)
+        return self.componentes().miembros(nodo) if nodo is not None else []
+
+    def tamano_componente(self, inicio: str) -> int:
+        nodo = self._nodo(inicio)
+        return self.componentes().tamano(nodo) if nodo is not None else 0
+
+    def misma_componente(self, a: str, b: str) -> bool:
+        """True si hay un camino entre los libros a y b (ids o títulos exactos)."""
+        na, nb = self._nodo(a), self._nodo(b)
+        return na is not None and nb is not None and self.componentes().conectados(na, nb)
+
+    def reemplazar(self, otro: 'GrafoLibros'):
+        """Adopta la adyacencia, los nodos y las componentes de `otro` (ya construido)."""
+        self.adyacencia, self.nodos, self._componentes = otro.adyacencia, otro.nodos, otro._componentes
+
+    def titulo(self, id_libro: str) -> str:
+        libro = self.nodos.get(id_libro)
+        return libro.titulo if libro is not None else id_libro
+
+    def _nodo(self, inicio: str):
+        """Id del nodo de `inicio`, que puede ser un id o (compatibilidad) un título exacto."""
+        if inicio in self.adyacencia:
+            return inicio
+        return next((i for i, l in self.nodos.items() if l.titulo == inicio), None)
 
     def to_dict(self):
-        """Serializa el grafo a un diccionario simple (JSON-serializable)."""
+        """Serializa el grafo a un diccionario simple (JSON-serializable), por id de libro."""
         return self.adyacencia
 
     @classmethod
-    def from_dict(cls, data: dict):
+    def from_dict(cls, data: dict, biblioteca: 'Biblioteca' = None):
+        """Con `biblioteca` se enlazan los nodos a sus libros; un grafo.json antiguo, con
+        títulos como nodos, se traduce a ids (los títulos que no existen se descartan)."""
         g = cls()
+        ids = biblioteca.indice_ids() if biblioteca is not None else {}
+        por_titulo = None
+
+        def resolver(nodo):
+            nonlocal por_titulo
+            if biblioteca is None or nodo in ids:
+                return nodo
+            if por_titulo is None:
+                por_titulo = {}
+                for l in biblioteca.libros:
+                    por_titulo.setdefault(l.titulo, l.id)
+            return por_titulo.get(nodo)
+
         # asegurarse de que las claves y valores son listas
         for k, v in data.items():
-            g.adyacencia[k] = list(v) if v is not None else []
+            k = resolver(k)
+            if k is None:
+                continue
+            vecinos = g.adyacencia.setdefault(k, [])
+            for n in (v or []):
+                n = resolver(n)
+                if n is not None and n not in vecinos:
+                    vecinos.append(n)
+        for k in g.adyacencia:
+            if k in ids:
+                g.nodos[k] = ids[k]
         return g
 
+    @instrumentar("grafo.build_from_biblioteca")
     def build_from_biblioteca(self, biblioteca: 'Biblioteca'):
         """Reconstruye el grafo conectando libros que comparten autor o género.
-        Nodo = título del libro. Aristas no dirigidas entre libros con mismo autor o género.
+        Nodo = id del libro. Aristas no dirigidas entre libros con mismo autor o género.
         """
         self.adyacencia = {}
-        # agregar nodos
-        for l in biblioteca.libros:
-            self.adyacencia[l.titulo] = []
-        # crear aristas entre pares que compartan autor o género
-        n = len(biblioteca.libros)
-        for i in range(n):
-            for j in range(i+1, n):
-                a = biblioteca.libros[i]
-                b = biblioteca.libros[j]
-                if (a.autor and b.autor and a.autor.lower() == b.autor.lower()) or (a.genero and b.genero and a.genero.lower() == b.genero.lower()):
-                    # añadir bidireccional
-                    if b.titulo not in self.adyacencia[a.titulo]:
-                        self.adyacencia[a.titulo].append(b.titulo)
-                    if a.titulo not in self.adyacencia[b.titulo]:
-                        self.adyacencia[b.titulo].append(a.titulo)
-
-    def dfs(self, start_title: str, max_depth: int = None):
-        """Realiza DFS en el grafo desde start_title.
-        Devuelve lista de títulos alcanzables (excluyendo start_title) en orden de visita.
-        Si start_title no existe devuelve lista vacía.
+        self.nodos = {}
+        libros = biblioteca.libros
+        # agrupar índices por autor y por género: solo se comparan libros del mismo grupo
+        por_autor = {}
+        por_genero = {}
+        for idx, l in enumerate(libros):
+            self.adyacencia[l.id] = []
+            self.nodos[l.id] = l
+            if l.clave_autor:
+                por_autor.setdefault(l.clave_autor, []).append(idx)
+            if l.clave_genero:
+                por_genero.setdefault(l.clave_genero, []).append(idx)
+        # componentes: cada grupo es conexo, basta unir cada miembro con el primero
+        uf = UnionFind(self.adyacencia)
+        for grupo in (*por_autor.values(), *por_genero.values()):
+            primero = libros[grupo[0]].id
+            for j in grupo[1:]:
+                uf.unir(primero, libros[j].id)
+        self._componentes = (self.adyacencia, uf)
+        # aristas no dirigidas: los vecinos de cada libro son los demás miembros de sus grupos,
+        # en el mismo orden (por posición en la biblioteca) que producía la comparación por pares
+        for idx, a in enumerate(libros):
+            candidatos = set()
+            if a.clave_autor:
+                candidatos.update(por_autor[a.clave_autor])
+            if a.clave_genero:
+                candidatos.update(por_genero[a.clave_genero])
+            vecinos = self.adyacencia[a.id]
+            vistos = set(vecinos)
+            vistos.add(a.id)
+            for j in sorted(candidatos):
+                t = libros[j].id
+                if t not in vistos:
+                    vistos.add(t)
+                    vecinos.append(t)
+
+    @instrumentar("grafo.dfs")
+    def dfs(self, inicio: str, max_depth: int = None, limite: int = None):
+        """Realiza DFS en el grafo desde el libro `inicio` (id, o título exacto).
+        Devuelve lista de títulos alcanzables (excluyendo el inicio) en orden de visita.
+        Con `limite` se detiene al reunir ese número de títulos.
+        Si el inicio no existe devuelve lista vacía.
         """
-        if start_title not in self.adyacencia:
+        return [self.titulo(n) for n in self.dfs_ids(inicio, max_depth, limite)]
+
+    def dfs_ids(self, inicio: str, max_depth: int = None, limite: int = None):
+        """Como dfs pero devuelve los ids de los libros alcanzados."""
+        start = self._nodo(inicio)
+        if start is None:
             return []
-        visited = set()
+        visited = {start}
         result = []
-
-        def _dfs(node, depth):
-            if node in visited:
-                return
-            visited.add(node)
-            if node != start_title:
-                result.append(node)
-            if max_depth is not None and depth >= max_depth:
-                return
-            for neigh in self.adyacencia.get(node, []):
+        # pila explícita de (iterador de vecinos, profundidad): mismo orden de visita que
+        # la versión recursiva, sin límite de recursión en componentes grandes
+        pila = [(iter(self.adyacencia.get(start, [])), 0)]
+        if max_depth is not None and max_depth <= 0:
+            pila = []
+        while pila:
+            if limite is not None and len(result) >= limite:
+                break
+            vecinos, depth = pila[-1]
+            for neigh in vecinos:
                 if neigh not in visited:
-                    _dfs(neigh, depth+1)
-
-        _dfs(start_title, 0)
+                    visited.add(neigh)
+                    result.append(neigh)
+                    if max_depth is None or depth + 1 < max_depth:
+                        pila.append((iter(self.adyacencia.get(neigh, [])), depth + 1))
+                    break
+            else:
+                pila.pop()
         return result
 
 
@@ -311,10 +750,11 @@ class GrafoLibros:
 #   COLA DE SOLICITUDES (FIFO) PARA PRÉSTAMOS
 # -----------------------------------------------------------
 class SolicitudPrestamo:
-    def __init__(self, id_usuario: str, titulo_libro: str, fecha_solicitud: str = None):
+    def __init__(self, id_usuario: str, titulo_libro: str, fecha_solicitud=None, id_libro: str = None):
         self.id_usuario = id_usuario
         self.titulo_libro = titulo_libro
-        self.fecha_solicitud = fecha_solicitud if fecha_solicitud else datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.id_libro = id_libro  # None en solicitudes antiguas: se resuelven por título
+        self.fecha_solicitud = a_marca(fecha_solicitud) if fecha_solicitud else marca_actual()
         # tipo_usuario / prioridad puede añadirse al crear la solicitud
         self.tipo_usuario = None
 
@@ -322,8 +762,10 @@ class SolicitudPrestamo:
         data = {
             "id_usuario": self.id_usuario,
             "titulo_libro": self.titulo_libro,
-            "fecha_solicitud": self.fecha_solicitud
+            "fecha_solicitud": formatear_fecha(self.fecha_solicitud)
         }
+        if self.id_libro is not None:
+            data["id_libro"] = self.id_libro
         if self.tipo_usuario is not None:
             data["tipo_usuario"] = self.tipo_usuario
         return data
@@ -333,13 +775,17 @@ class SolicitudPrestamo:
         s = cls(
             id_usuario=data.get("id_usuario"),
             titulo_libro=data.get("titulo_libro"),
-            fecha_solicitud=data.get("fecha_solicitud")
+            fecha_solicitud=data.get("fecha_solicitud"),
+            id_libro=data.get("id_libro")
         )
         # compatibilidad: aceptar tipo_usuario si está presente
         s.tipo_usuario = data.get("tipo_usuario", data.get("tipo", None))
         return s
 
 
+_por_fecha_solicitud = attrgetter("fecha_solicitud")
+
+
 class ColaSolicitudes:
     def __init__(self):
         self.solicitudes = []  # lista de SolicitudPrestamo
@@ -366,32 +812,52 @@ class ColaSolicitudes:
             c.solicitudes.append(SolicitudPrestamo.from_dict(d))
         return c
 
+    def ordenadas(self) -> list:
+        """Las solicitudes en el orden en que se atienden: primero profesores, luego el resto;
+        dentro de cada grupo, por fecha de solicitud (estable ante empates)."""
+        # Ahora procesamos por prioridad: se considera 'profesor' con mayor prioridad.
+        # Separar por grupo y ordenar cada uno por la marca entera equivale a ordenar por
+        # (prioridad, fecha) sin crear una tupla por solicitud.
+        profesores, resto = [], []
+        for s in self.solicitudes:
+            tipo = (s.tipo_usuario or "").lower()
+            (profesores if tipo == "profesor" or tipo == "teacher" else resto).append(s)
+        try:
+            profesores.sort(key=_por_fecha_solicitud)
+            resto.sort(key=_por_fecha_solicitud)
+        except TypeError:
+            # fallback si fecha no comparable
+            pass
+        return profesores + resto
+
+    @instrumentar("cola.procesar")
     def procesar(self, usuarios: list, biblioteca: 'Biblioteca', prestamos: list):
         """Procesa la cola FIFO: por cada solicitud en orden, si el libro está disponible crea un Prestamo
         y lo añade a prestamos; si no está disponible la solicitud permanece en la cola.
         Devuelve la lista de prestados creados en esta pasada."""
-        # Ahora procesamos por prioridad: se considera 'profesor' con mayor prioridad
-        # Mapear solicitudes con prioridad y timestamp para estabilidad
-        def prioridad(s: SolicitudPrestamo):
-            tipo = (s.tipo_usuario or "").lower()
-            if tipo == "profesor" or tipo == "teacher":
-                return 0
-            # por defecto estudiantes y otros tienen prioridad 1
-            return 1
-
+        if not self.solicitudes:
+            return []
         procesados = []
         nuevas = []
 
         # Ordenar solicitudes por (prioridad, fecha_solicitud) para procesar en orden deseado
-        try:
-            sorted_solicitudes = sorted(self.solicitudes, key=lambda s: (prioridad(s), s.fecha_solicitud))
-        except Exception:
-            # fallback si fecha no comparable
-            sorted_solicitudes = list(self.solicitudes)
+        sorted_solicitudes = self.ordenadas()
+
+        # usuarios y libros por id en O(1); el índice por título solo para solicitudes sin id,
+        # que puede atender cualquier ejemplar con ese título
+        por_id = indexar_por_id(usuarios)
+        por_titulo = None
 
         for s in sorted_solicitudes:
-            usuario = next((u for u in usuarios if u.id == s.id_usuario), None)
-            libro = next((l for l in biblioteca.libros if l.titulo.lower() == s.titulo_libro.lower()), None)
+            usuario = por_id.get(s.id_usuario)
+            libro = biblioteca.libro_por_id(s.id_libro) if s.id_libro is not None else None
+            if libro is None and s.id_libro is None:
+                if por_titulo is None:
+                    por_titulo = {}
+                    for l in biblioteca.libros:
+                        por_titulo.setdefault(l.clave_titulo, []).append(l)
+                ejemplares = por_titulo.get(normalizar(s.titulo_libro or ""), [])
+                libro = next((l for l in ejemplares if l.disponible), None)
             if usuario and libro and libro.disponible:
                 p = Prestamo(usuario, libro)
                 prestamos.append(p)
@@ -0,0 +1,288 @@
+"""Envolturas seguras entre hilos para Biblioteca, GrafoLibros y ColaSolicitudes.
+
+Las clases de `clases.py` no usan candados: `agregar_libro` reordena la lista
+in-place mientras otro hilo podría estar recorriéndola en un `buscar_*`. Estas
+envolturas las protegen con un candado lector-escritor (muchas búsquedas a la
+vez, mutaciones en exclusiva).
+
+Las mutaciones de la biblioteca son copy-on-write: trabajan sobre una copia de
+la lista y la publican al terminar, así que `instantanea()` devuelve en O(1) una
+lista que nadie volverá a modificar. Sirve para lecturas largas (exportar,
+reconstruir el grafo) sin bloquear a los escritores. La instantánea fija qué
+libros hay y su orden; atributos como `disponible` siguen siendo los de los
+objetos vivos.
+
+Orden de candados cuando se necesitan varios: cola -> biblioteca -> grafo.
+"""
+
+import threading
+from contextlib import contextmanager
+
+from .indices import normalizar
+from .clases import Biblioteca, GrafoLibros, ColaSolicitudes, Libro, Prestamo, SolicitudPrestamo, Usuario
+
+
+class LockLectorEscritor:
+    """Candado lector-escritor con preferencia para escritores (no los deja esperando
+    indefinidamente). Reentrante para el hilo escritor: dentro de `escritura()` se
+    puede volver a pedir `lectura()` o `escritura()`. Un lector no debe anidar lecturas
+    (con un escritor esperando, la segunda lectura se quedaría bloqueada)."""
+
+    def __init__(self):
+        self._condicion = threading.Condition(threading.Lock())
+        self._lectores = 0
+        self._escritor = None  # ident del hilo que escribe
+        self._profundidad = 0
+        self._escritores_esperando = 0
+
+    @contextmanager
+    def lectura(self):
+        if self._escritor == threading.get_ident():
+            yield
+            return
+        with self._condicion:
+            while self._escritor is not None or self._escritores_esperando:
+                self._condicion.wait()
+            self._lectores += 1
+        try:
+            yield
+        finally:
+            with self._condicion:
+                self._lectores -= 1
+                if not self._lectores:
+                    self._condicion.notify_all()
+
+    @contextmanager
+    def escritura(self):
+        yo = threading.get_ident()
+        with self._condicion:
+            if self._escritor == yo:
+                self._profundidad += 1
+            else:
+                self._escritores_esperando += 1
+                try:
+                    while self._escritor is not None or self._lectores:
+                        self._condicion.wait()
+                finally:
+                    self._escritores_esperando -= 1
+                self._escritor = yo
+                self._profundidad = 1
+        try:
+            yield
+        finally:
+            with self._condicion:
+                self._profundidad -= 1
+                if not self._profundidad:
+                    self._escritor = None
+                    self._condicion.notify_all()
+
+
+# -----------------------------------------------------------
+#   BIBLIOTECA
+# -----------------------------------------------------------
+
+class BibliotecaConcurrente:
+    def __init__(self, biblioteca: Biblioteca = None):
+        self.biblioteca = biblioteca if biblioteca is not None else Biblioteca()
+        self.lock = LockLectorEscritor()
+
+    @property
+    def libros(self) -> list:
+        return self.instantanea()
+
+    def instantanea(self) -> list:
+        """Lista actual de libros; no se modifica nunca después de publicada."""
+        with self.lock.lectura():
+            return self.biblioteca.libros
+
+    @contextmanager
+    def _copia(self):
+        # copy-on-write: la lista publicada no se toca; se reemplaza al terminar
+        with self.lock.escritura():
+            original = self.biblioteca.libros
+            self.biblioteca.libros = list(original)
+            try:
+                yield self.biblioteca
+            except BaseException:
+                self.biblioteca.libros = original
+                raise
+
+    # ---------- Lectura ----------
+    def buscar_por_titulo(self, titulo: str):
+        with self.lock.lectura():
+            return self.biblioteca.buscar_por_titulo(titulo)
+
+    def buscar_por_autor(self, autor: str):
+        with self.lock.lectura():
+            return self.biblioteca.buscar_por_autor(autor)
+
+    def buscar_por_genero(self, genero: str):
+        with self.lock.lectura():
+            return self.biblioteca.buscar_por_genero(genero)
+
+    def buscar_por_año(self, year: int):
+        with self.lock.lectura():
+            return self.biblioteca.buscar_por_año(year)
+
+    def buscar_disponibles(self):
+        with self.lock.lectura():
+            return self.biblioteca.buscar_disponibles()
+
+    def _indice(self, nombre: str, construir):
+        """Índice publicado si sigue al día (con el candado de lectura, así que varios hilos
+        consultan a la vez); si no, se reconstruye con el de escritura, volviendo a comprobar
+        la firma por si otro hilo acababa de hacerlo. Un índice publicado no se modifica
+        después (las mutaciones crean una lista nueva, que cambia la firma), así que se
+        consulta ya sin candado."""
+        with self.lock.lectura():
+            indice = self.biblioteca.indice_vigente(nombre)
+        if indice is None:
+            with self.lock.escritura():
+                indice = construir()
+        return indice
+
+    def buscar_difuso(self, texto: str, limite: int = 10, campos=("titulo", "autor"), presupuesto_ms: float = 50.0):
+        indice = self._indice("difuso", self.biblioteca.indice_difuso)
+        return indice.buscar(texto, limite, campos=campos, presupuesto_ms=presupuesto_ms)
+
+    def autocompletar_titulo(self, prefijo: str, k: int = 10):
+        return self._indice("prefijos", self.biblioteca.indice_prefijos).completar(prefijo, k)
+
+    def libro_por_id(self, id_libro: str):
+        return self._indice("ids", self.biblioteca.indice_ids).get(id_libro)
+
+    # ---------- Escritura ----------
+    def agregar_libro(self, libro: Libro):
+        with self._copia() as b:
+            b.agregar_libro(libro)
+
+    def agregar_libros(self, libros: list, ordenar: bool = True):
+        with self._copia() as b:
+            b.agregar_libros(libros, ordenar)
+
+    def ordenar_por_titulo(self):
+        with self._copia() as b:
+            b.ordenar_por_titulo()
+
+    def actualizar_libro(self, titulo_buscar: str, **kwargs) -> bool:
+        with self._copia() as b:
+            return b.actualizar_libro(titulo_buscar, **kwargs)
+
+    def eliminar_libro(self, titulo_buscar: str) -> bool:
+        with self._copia() as b:
+            return b.eliminar_libro(titulo_buscar)
+
+    def prestar(self, usuario: Usuario, titulo: str, prestamos: list):
+        """Comprueba la disponibilidad y presta en un solo paso atómico.
+        Devuelve el Prestamo creado, o None si el libro no existe o ya está prestado."""
+        with self.lock.escritura():
+            clave = normalizar(titulo)
+            libro = next((l for l in self.biblioteca.libros if l.clave_titulo == clave), None)
+            if libro is None or not libro.disponible:
+                return None
+            libro.disponible = False
+            prestamo = Prestamo(usuario, libro)
+            prestamos.append(prestamo)
+            return prestamo
+
+    def devolver(self, prestamo: Prestamo) -> bool:
+        """Devuelve un préstamo activo. False si ya estaba devuelto."""
+        with self.lock.escritura():
+            if prestamo.fecha_devolucion is not None:
+                return False
+            prestamo.devolver()
+            return True
+
+
+# -----------------------------------------------------------
+#   GRAFO
+# -----------------------------------------------------------
+
+class GrafoConcurrente:
+    def __init__(self, grafo: GrafoLibros = None):
+        self.grafo = grafo if grafo is not None else GrafoLibros()
+        self.lock = LockLectorEscritor()
+
+    def recomendaciones(self, libro: Libro):
+        # si las componentes están por recalcular, un lector las reconstruye aparte y
+        # las publica con una sola asignación: otros lectores a la vez no ven nada a medias
+        with self.lock.lectura():
+            return self.grafo.recomendaciones(libro)
+
+    def dfs(self, start_title: str, max_depth: int = None, limite: int = None):
+        with self.lock.lectura():
+            return self.grafo.dfs(start_title, max_depth, limite)
+
+    def tamano_componente(self, inicio: str) -> int:
+        with self.lock.lectura():
+            return self.grafo.tamano_componente(inicio)
+
+    def misma_componente(self, a: str, b: str) -> bool:
+        with self.lock.lectura():
+            return self.grafo.misma_componente(a, b)
+
+    def to_dict(self) -> dict:
+        with self.lock.lectura():
+            return {k: list(v) for k, v in self.grafo.adyacencia.items()}
+
+    def agregar_libro(self, libro: Libro):
+        with self.lock.escritura():
+            self.grafo.agregar_libro(libro)
+
+    def relacionar(self, libro1: Libro, libro2: Libro):
+        with self.lock.escritura():
+            self.grafo.relacionar(libro1, libro2)
+
+    def remover_libro(self, libro: Libro):
+        with self.lock.escritura():
+            self.grafo.remover_libro(libro)
+
+    def build_from_biblioteca(self, biblioteca):
+        """Reconstruye fuera del candado (sobre una instantánea si se pasa una
+        BibliotecaConcurrente) y solo bloquea para publicar el resultado."""
+        if isinstance(biblioteca, BibliotecaConcurrente):
+            fuente = Biblioteca()
+            fuente.libros = biblioteca.instantanea()
+        else:
+            fuente = biblioteca
+        nuevo = GrafoLibros()
+        nuevo.build_from_biblioteca(fuente)
+        with self.lock.escritura():
+            self.grafo.reemplazar(nuevo)
+
+
+# -----------------------------------------------------------
+#   COLA DE SOLICITUDES
+# -----------------------------------------------------------
+
+class ColaConcurrente:
+    def __init__(self, cola: ColaSolicitudes = None):
+        self.cola = cola if cola is not None else ColaSolicitudes()
+        # casi todas las operaciones mutan: basta un candado simple
+        self.lock = threading.RLock()
+
+    def encolar(self, solicitud: SolicitudPrestamo):
+        with self.lock:
+            self.cola.encolar(solicitud)
+
+    def desencolar(self):
+        with self.lock:
+            return self.cola.desencolar()
+
+    def to_list(self) -> list:
+        """Copia de las solicitudes pendientes."""
+        with self.lock:
+            return list(self.cola.solicitudes)
+
+    def to_dict_list(self) -> list:
+        with self.lock:
+            return self.cola.to_dict_list()
+
+    def __len__(self):
+        with self.lock:
+            return len(self.cola.solicitudes)
+
+    def procesar(self, usuarios: list, biblioteca: BibliotecaConcurrente, prestamos: list) -> list:
+        """Como ColaSolicitudes.procesar, con la cola y la biblioteca bloqueadas."""
+        with self.lock, biblioteca.lock.escritura():
+            return self.cola.procesar(usuarios, biblioteca.biblioteca, prestamos)
@@ -0,0 +1,162 @@
+"""Consultas con varios criterios sobre el catálogo.
+
+`Biblioteca.consultar(autor="tolkien", genero="fantasía", disponible=True,
+year_desde=1950, year_hasta=1970)` combina los criterios con AND. En lugar de
+encadenar un recorrido completo por criterio:
+
+1. Se estima cuántos libros cumple cada criterio usando los índices del
+   catálogo (`IndicesCatalogo`): autor y género agrupados por clave normalizada
+   (un "contiene" recorre solo los valores distintos, no los libros) y los años
+   en una lista ordenada (rangos con bisect).
+2. El criterio más selectivo con índice genera los candidatos.
+3. Los demás criterios con índice se intersecan si su conjunto no es mayor que
+   los candidatos que quedan; si lo es, sale más barato comprobarlos libro a libro.
+4. Los criterios sin índice (título contiene, disponible) se evalúan solo sobre
+   los supervivientes.
+
+`Biblioteca.explicar(...)` devuelve el plan elegido con las cardinalidades estimadas.
+`disponible` no tiene índice porque cambia con cada préstamo.
+"""
+
+from bisect import bisect_left, bisect_right
+
+from .indices import normalizar
+
+CRITERIOS = ("titulo", "autor", "genero", "year", "year_desde", "year_hasta", "disponible")
+
+
+class IndicesCatalogo:
+    """Índices secundarios de una lista de libros (se reconstruyen cuando cambia el catálogo)."""
+
+    def __init__(self, libros: list):
+        self.total = len(libros)
+        self.posiciones = {id(l): i for i, l in enumerate(libros)}
+        self.por_autor = {}
+        self.por_genero = {}
+        for l in libros:
+            self.por_autor.setdefault(l.clave_autor, []).append(l)
+            self.por_genero.setdefault(l.clave_genero, []).append(l)
+        con_year = sorted((l for l in libros if isinstance(l.year, int)), key=lambda l: l.year)
+        self.years = [l.year for l in con_year]
+        self.por_year = con_year
+
+    def rango_years(self, desde, hasta) -> list:
+        i = 0 if desde is None else bisect_left(self.years, desde)
+        j = len(self.years) if hasta is None else bisect_right(self.years, hasta)
+        return self.por_year[i:j]
+
+    def claves_que_contienen(self, grupos: dict, q: str) -> list:
+        return [clave for clave in grupos if q in clave]
+
+
+class Predicado:
+    def __init__(self, descripcion: str, evaluar, candidatos=None, estimacion: int = None):
+        self.descripcion = descripcion
+        self.evaluar = evaluar          # libro -> bool
+        self.candidatos = candidatos    # función sin argumentos que devuelve los libros que lo cumplen (con índice)
+        self.estimacion = estimacion    # cardinalidad exacta o estimada; None si no hay índice
+
+
+def _predicados(indices: IndicesCatalogo, criterios: dict) -> list:
+    desconocidos = set(criterios) - set(CRITERIOS)
+    if desconocidos:
+        raise ValueError(f"Criterios no soportados: {', '.join(sorted(desconocidos))}")
+    predicados = []
+
+    titulo = criterios.get("titulo")
+    if titulo:
+        q = normalizar(titulo)
+        predicados.append(Predicado(f"título contiene '{q}'", lambda l, q=q: q in l.clave_titulo))
+
+    for campo, grupos in (("autor", indices.por_autor), ("genero", indices.por_genero)):
+        valor = criterios.get(campo)
+        if not valor:
+            continue
+        q = normalizar(valor)
+        claves = indices.claves_que_contienen(grupos, q)
+        atributo = "clave_" + campo
+
+        def candidatos(grupos=grupos, claves=claves):
+            return [l for clave in claves for l in grupos[clave]]
+        predicados.append(Predicado(f"{campo} contiene '{q}' ({len(claves)} valores)",
+                                    lambda l, q=q, atributo=atributo: q in getattr(l, atributo),
+                                    candidatos, sum(len(grupos[c]) for c in claves)))
+
+    year = criterios.get("year")
+    desde, hasta = criterios.get("year_desde"), criterios.get("year_hasta")
+    if year is not None:
+        desde = year if desde is None else max(desde, year)
+        hasta = year if hasta is None else min(hasta, year)
+    if desde is not None or hasta is not None:
+        rango = indices.rango_years(desde, hasta)
+        texto = f"año = {desde}" if desde == hasta else f"año entre {desde if desde is not None else '…'} y {hasta if hasta is not None else '…'}"
+        predicados.append(Predicado(
+            texto,
+            lambda l: isinstance(l.year, int) and (desde is None or l.year >= desde) and (hasta is None or l.year <= hasta),
+            lambda: rango, len(rango)))
+
+    disponible = criterios.get("disponible")
+    if disponible is not None:
+        predicados.append(Predicado(f"disponible = {bool(disponible)}", lambda l: bool(l.disponible) == bool(disponible)))
+    return predicados
+
+
+class PlanConsulta:
+    def __init__(self, libros: list, indices: IndicesCatalogo, criterios: dict):
+        self.libros = libros
+        self.indices = indices
+        self.criterios = criterios
+        self.pasos = []  # dicts: {"accion", "predicado", "estimacion"}
+        predicados = _predicados(indices, criterios)
+        con_indice = sorted((p for p in predicados if p.candidatos is not None), key=lambda p: p.estimacion)
+        sin_indice = [p for p in predicados if p.candidatos is None]
+
+        self._origen = con_indice[0] if con_indice else None
+        if self._origen is not None:
+            self.pasos.append({"accion": "índice", "predicado": self._origen.descripcion,
+                               "estimacion": self._origen.estimacion})
+            restantes = self._origen.estimacion
+        else:
+            self.pasos.append({"accion": "recorrido completo", "predicado": "todos los libros", "estimacion": indices.total})
+            restantes = indices.total
+
+        self._intersecar, self._filtrar = [], []
+        for p in con_indice[1:]:
+            if p.estimacion <= restantes:
+                self._intersecar.append(p)
+                self.pasos.append({"accion": "intersección", "predicado": p.descripcion, "estimacion": p.estimacion})
+                restantes = min(restantes, p.estimacion)
+            else:
+                self._filtrar.append(p)
+                self.pasos.append({"accion": "filtro", "predicado": p.descripcion, "estimacion": p.estimacion})
+        for p in sin_indice:
+            self._filtrar.append(p)
+            self.pasos.append({"accion": "filtro", "predicado": p.descripcion, "estimacion": None})
+        self.resultado = None
+
+    def ejecutar(self) -> list:
+        """Libros que cumplen todos los criterios, en el orden del catálogo."""
+        candidatos = self._origen.candidatos() if self._origen is not None else self.libros
+        for p in self._intersecar:
+            if not candidatos:
+                break
+            ids = {id(l) for l in p.candidatos()}
+            candidatos = [l for l in candidatos if id(l) in ids]
+        for p in self._filtrar:
+            if not candidatos:
+                break
+            candidatos = [l for l in candidatos if p.evaluar(l)]
+        if self._origen is not None:
+            posiciones = self.indices.posiciones
+            candidatos = sorted(candidatos, key=lambda l: posiciones[id(l)])
+        self.resultado = len(candidatos)
+        return list(candidatos)
+
+    def __str__(self):
+        lineas = [f"Plan sobre {self.indices.total} libros:"]
+        for n, paso in enumerate(self.pasos, start=1):
+            estimacion = f"~{paso['estimacion']} libros" if paso["estimacion"] is not None else "sin índice"
+            lineas.append(f"  {n}. {paso['accion']:<18} {paso['predicado']:<45} {estimacion}")
+        if self.resultado is not None:
+            lineas.append(f"Resultado: {self.resultado} libros")
+        return "\n".join(lineas)
@@ -0,0 +1,217 @@
+"""Estadísticas de circulación mantenidas de forma incremental.
+
+`EstadisticasCirculacion` guarda contadores (libros más prestados, préstamos
+por género, préstamos activos por tipo de usuario y disponibilidad del
+catálogo) que se actualizan préstamo a préstamo, igual que `CoPrestamos`:
+la interfaz llama a `registrar_prestamo` / `registrar_devolucion` y a
+`libro_agregado` / `libro_eliminado`. Consultarlas no recorre el historial.
+
+Los libros se cuentan por id (renombrar uno no parte su historial y dos libros
+con el mismo título no se mezclan); los títulos solo se usan al mostrar.
+
+Al arrancar se construyen con los objetos ya cargados más el historial de
+préstamos devueltos leído en streaming (`construir`) o, sin cargar nada, en una
+sola pasada sobre libros.json, el historial y prestamos.json
+(`construir_desde_registros`):
+
+    python -m src.estadisticas
+"""
+
+import argparse
+import heapq
+from bisect import bisect_left, insort
+from collections import Counter
+
+from . import persistencia
+from .indices import normalizar
+from .metricas import instrumentar
+
+TOP = 10
+MAX_RANKING = 50  # posiciones de "más prestados" que se mantienen al día
+SIN_GENERO = "Sin género"
+
+
+class EstadisticasCirculacion:
+    def __init__(self, libros: list = None, prestamos: list = None, historial=()):
+        self._reiniciar()
+        if libros is not None or prestamos is not None:
+            self.construir(libros or [], prestamos or [], historial)
+
+    def _reiniciar(self):
+        self.total_prestamos = 0
+        self.por_libro = Counter()       # id libro -> préstamos (histórico)
+        self._titulos = {}               # id libro -> Libro (título al día) o título del registro
+        self._por_titulo = None          # título -> id, solo para registros antiguos sin id
+        self._ranking = []               # [(-préstamos, id libro)] ordenado, hasta MAX_RANKING
+        self.por_genero = Counter()      # género normalizado -> préstamos (histórico)
+        self._nombres_genero = {}        # género normalizado -> nombre a mostrar
+        self.activos_por_tipo = Counter()  # tipo de usuario -> préstamos sin devolver
+        self.total_libros = 0
+        self.prestados = 0               # libros no disponibles
+
+    # ---------- Construcción ----------
+    def contar_catalogo(self, libros):
+        """Recalcula solo la disponibilidad (p. ej. tras importar un catálogo)."""
+        self.total_libros = self.prestados = 0
+        self._por_titulo = None
+        for libro in libros:
+            self.libro_agregado(libro)
+
+    def titulo(self, id_libro: str) -> str:
+        nombre = self._titulos.get(id_libro, id_libro)
+        return getattr(nombre, "titulo", nombre)
+
+    @instrumentar("estadisticas.construir")
+    def construir(self, libros: list, prestamos: list, historial=()):
+        """`historial`: dicts de préstamos archivados (persistencia.iterar_historial)."""
+        self._reiniciar()
+        self.contar_catalogo(libros)
+        self._contar_registros(historial)
+        for p in prestamos:
+            self._titulos[p.libro.id] = p.libro
+            self._contar_prestamo(p.libro.id, p.libro.genero, p.usuario.tipo, p.fecha_devolucion is None,
+                                  ranking=False)
+        self._rehacer_ranking()
+
+    @instrumentar("estadisticas.construir_desde_registros")
+    def construir_desde_registros(self, libros, prestamos):
+        """Igual que construir pero con dicts (p. ej. persistencia.iterar_registros), sin crear
+        objetos Libro/Prestamo: cada archivo se recorre una sola vez."""
+        self._reiniciar()
+        for d in libros:
+            self.total_libros += 1
+            if not d.get("disponible", True):
+                self.prestados += 1
+            if d.get("id"):
+                self._titulos[d["id"]] = d.get("titulo")
+        self._contar_registros(prestamos)
+        self._rehacer_ranking()
+
+    def _id_de_registro(self, libro: dict):
+        """Id del libro de un préstamo archivado; los anteriores a los ids se resuelven por título
+        entre los libros conocidos (o se cuentan por su título si ya no existe)."""
+        if libro.get("id"):
+            self._titulos.setdefault(libro["id"], libro.get("titulo"))
+            return libro["id"]
+        titulo = libro.get("titulo")
+        if not titulo:
+            return None
+        if self._por_titulo is None:
+            self._por_titulo = {}
+            for id_libro in self._titulos:
+                self._por_titulo.setdefault(self.titulo(id_libro), id_libro)
+        return self._por_titulo.get(titulo, titulo)
+
+    def _contar_registros(self, prestamos):
+        for d in prestamos:
+            libro, usuario = d.get("libro") or {}, d.get("usuario") or {}
+            id_libro = self._id_de_registro(libro)
+            if id_libro:
+                self._contar_prestamo(id_libro, libro.get("genero", libro.get("categoria")),
+                                      usuario.get("tipo"), not d.get("fecha_devolucion"), ranking=False)
+
+    def _rehacer_ranking(self):
+        self._ranking = heapq.nsmallest(MAX_RANKING, ((-n, i) for i, n in self.por_libro.items()))
+
+    def _actualizar_ranking(self, id_libro: str, n: int):
+        # los contadores históricos solo suben: un libro fuera del ranking solo puede entrar
+        # cuando él mismo recibe un préstamo, así que basta con revisarlo a él
+        ranking = self._ranking
+        anterior = (-(n - 1), id_libro)
+        i = bisect_left(ranking, anterior)
+        if i < len(ranking) and ranking[i] == anterior:
+            del ranking[i]
+        elif len(ranking) >= MAX_RANKING and (-n, id_libro) > ranking[-1]:
+            return
+        insort(ranking, (-n, id_libro))
+        del ranking[MAX_RANKING:]
+
+    def _contar_prestamo(self, id_libro: str, genero: str, tipo: str, activo: bool, ranking: bool = True):
+        self.total_prestamos += 1
+        self.por_libro[id_libro] += 1
+        if ranking:
+            self._actualizar_ranking(id_libro, self.por_libro[id_libro])
+        clave = normalizar(genero) if isinstance(genero, str) else ""
+        self.por_genero[clave] += 1
+        self._nombres_genero.setdefault(clave, genero if clave else SIN_GENERO)
+        if activo:
+            self.activos_por_tipo[tipo or "estudiante"] += 1
+
+    # ---------- Actualización incremental ----------
+    def registrar_prestamo(self, prestamo):
+        """Préstamo nuevo (prestar_libro o ColaSolicitudes.procesar); el libro ya está marcado como prestado."""
+        self._titulos[prestamo.libro.id] = prestamo.libro
+        self._contar_prestamo(prestamo.libro.id, prestamo.libro.genero, prestamo.usuario.tipo, True)
+        self.prestados += 1
+
+    def registrar_devolucion(self, prestamo):
+        tipo = prestamo.usuario.tipo or "estudiante"
+        if self.activos_por_tipo[tipo] > 0:
+            self.activos_por_tipo[tipo] -= 1
+        self.prestados = max(0, self.prestados - 1)
+
+    def libro_agregado(self, libro):
+        self.total_libros += 1
+        self._titulos[libro.id] = libro
+        if not libro.disponible:
+            self.prestados += 1
+
+    def libro_eliminado(self, libro):
+        self.total_libros = max(0, self.total_libros - 1)
+        if not libro.disponible:
+            self.prestados = max(0, self.prestados - 1)
+
+    # ---------- Consultas ----------
+    def mas_prestados(self, k: int = TOP) -> list:
+        """Hasta k pares (título, préstamos), de más a menos prestado."""
+        if k > MAX_RANKING:
+            mejores = heapq.nsmallest(k, self.por_libro.items(), key=lambda par: (-par[1], par[0]))
+        else:
+            mejores = [(i, -n) for n, i in self._ranking[:k]]
+        return [(self.titulo(i), n) for i, n in mejores]
+
+    def prestamos_por_genero(self) -> list:
+        return sorted(((self._nombres_genero[g], n) for g, n in self.por_genero.items() if n),
+                      key=lambda par: (-par[1], par[0]))
+
+    def prestamos_activos_por_tipo(self) -> dict:
+        return {tipo: n for tipo, n in sorted(self.activos_por_tipo.items()) if n}
+
+    def disponibilidad(self) -> dict:
+        return {"libros": self.total_libros, "disponibles": self.total_libros - self.prestados,
+                "prestados": self.prestados}
+
+    def resumen(self, k: int = TOP) -> dict:
+        return {
+            "total_prestamos": self.total_prestamos,
+            "mas_prestados": self.mas_prestados(k),
+            "por_genero": self.prestamos_por_genero(),
+            "activos_por_tipo": self.prestamos_activos_por_tipo(),
+            "disponibilidad": self.disponibilidad(),
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Estadísticas de circulación a partir de data/ (en streaming)")
+    parser.add_argument("--top", type=int, default=TOP, help="libros a mostrar en el ranking")
+    opciones = parser.parse_args(argv)
+
+    estadisticas = EstadisticasCirculacion()
+    estadisticas.construir_desde_registros(persistencia.iterar_registros("libros.json"),
+                                           persistencia.iterar_prestamos())
+    d = estadisticas.disponibilidad()
+    print(f"Libros: {d['libros']} ({d['disponibles']} disponibles, {d['prestados']} prestados)")
+    print(f"Préstamos registrados: {estadisticas.total_prestamos}")
+    print("\nMás prestados:")
+    for titulo, n in estadisticas.mas_prestados(opciones.top):
+        print(f"  {n:>6}  {titulo}")
+    print("\nPréstamos por género:")
+    for genero, n in estadisticas.prestamos_por_genero():
+        print(f"  {n:>6}  {genero}")
+    print("\nPréstamos activos por tipo de usuario:")
+    for tipo, n in estadisticas.prestamos_activos_por_tipo().items():
+        print(f"  {n:>6}  {tipo}")
+
+
+if __name__ == "__main__":
+    main()
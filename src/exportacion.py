@@ -0,0 +1,194 @@
+"""Exportación en streaming de libros, usuarios, préstamos y solicitudes a JSONL o CSV.
+
+Los registros se escriben de uno en uno (opcionalmente comprimidos con gzip), así que
+la memoria usada no depende del número de registros. Los préstamos y solicitudes se
+pueden leer directamente de `data/` con `persistencia.iterar_registros`, sin cargar
+el historial completo. Los filtros de libros usan `Biblioteca.consultar`; los
+préstamos y solicitudes se filtran por los ids de los libros que devuelve.
+
+Uso:
+    python -m src.exportacion libros catalogo.csv --genero fantasía --disponibles
+    python -m src.exportacion prestamos prestamos.jsonl.gz --activos
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import sys
+
+from .clases import Biblioteca
+from . import persistencia
+from .indices import normalizar
+from .metricas import instrumentar
+
+FORMATOS = ("jsonl", "csv")
+
+# Columnas CSV de cada colección, incluidos los campos opcionales (isbn, id_libro...) que
+# to_dict solo escribe si tienen valor: no deben depender de cómo sea el primer registro.
+_CAMPOS_LIBRO = ["id", "titulo", "autor", "genero", "categoria", "year", "disponible", "isbn"]
+_CAMPOS_USUARIO = ["nombre", "id", "tipo"]
+CAMPOS = {
+    "libros": _CAMPOS_LIBRO,
+    "usuarios": _CAMPOS_USUARIO,
+    "prestamos": ([f"usuario.{c}" for c in _CAMPOS_USUARIO] + [f"libro.{c}" for c in _CAMPOS_LIBRO]
+                  + ["fecha_prestamo", "fecha_vencimiento", "fecha_devolucion"]),
+    "solicitudes": ["id_usuario", "titulo_libro", "fecha_solicitud", "id_libro", "tipo_usuario"],
+}
+
+
+def detectar_formato(ruta: str) -> str:
+    nombre = ruta.lower()
+    if nombre.endswith(".gz"):
+        nombre = nombre[:-3]
+    return "csv" if nombre.endswith(".csv") else "jsonl"
+
+
+def aplanar(registro: dict, prefijo: str = "") -> dict:
+    """Aplana dicts anidados para CSV: {"libro": {"titulo": x}} -> {"libro.titulo": x}."""
+    plano = {}
+    for clave, valor in registro.items():
+        nombre = f"{prefijo}{clave}"
+        if isinstance(valor, dict):
+            plano.update(aplanar(valor, nombre + "."))
+        else:
+            plano[nombre] = valor
+    return plano
+
+
+def _abrir(ruta: str, comprimir: bool):
+    if comprimir:
+        return gzip.open(ruta, 'wt', encoding='utf-8', newline='')
+    return open(ruta, 'w', encoding='utf-8', newline='')
+
+
+@instrumentar("exportacion.exportar_registros")
+def exportar_registros(registros, ruta: str, formato: str = None, comprimir: bool = None, campos: list = None) -> int:
+    """Escribe cada dict de `registros` (cualquier iterable) en `ruta` y devuelve cuántos se escribieron.
+    En CSV las columnas son `campos` (p. ej. CAMPOS["libros"]) o, si no se indican, las claves
+    aplanadas del primer registro: un campo opcional que falte en él no se exportaría."""
+    formato = formato or detectar_formato(ruta)
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato no soportado: {formato}")
+    if comprimir is None:
+        comprimir = ruta.lower().endswith(".gz")
+
+    total = 0
+    with _abrir(ruta, comprimir) as f:
+        if formato == "jsonl":
+            for registro in registros:
+                f.write(json.dumps(registro, ensure_ascii=False))
+                f.write("\n")
+                total += 1
+        else:
+            escritor = None
+            for registro in registros:
+                fila = aplanar(registro)
+                if escritor is None:
+                    escritor = csv.DictWriter(f, fieldnames=campos or list(fila.keys()), extrasaction="ignore")
+                    escritor.writeheader()
+                escritor.writerow(fila)
+                total += 1
+    return total
+
+
+# ---------- Fuentes de registros ----------
+def filtrar_libros(biblioteca: Biblioteca, titulo: str = None, autor: str = None, genero: str = None,
+                   year: int = None, disponibles: bool = False, year_desde: int = None,
+                   year_hasta: int = None) -> list:
+    """Combina los filtros indicados con `Biblioteca.consultar` (índices + intersección).
+    Sin filtros devuelve todo el catálogo."""
+    criterios = {"titulo": titulo, "autor": autor, "genero": genero, "year": year,
+                 "year_desde": year_desde, "year_hasta": year_hasta,
+                 "disponible": True if disponibles else None}
+    criterios = {k: v for k, v in criterios.items() if v not in (None, "")}
+    if not criterios:
+        return biblioteca.libros
+    return biblioteca.consultar(**criterios)
+
+
+def registros_libros(biblioteca: Biblioteca, **filtros):
+    for libro in filtrar_libros(biblioteca, **filtros):
+        yield libro.to_dict()
+
+
+def registros_usuarios(usuarios: list = None):
+    """Usuarios en memoria o, si no se pasan, leídos en streaming de usuarios.json."""
+    if usuarios is None:
+        yield from persistencia.iterar_registros("usuarios.json")
+    else:
+        for u in usuarios:
+            yield u.to_dict()
+
+
+def _de_los_libros(libros: list):
+    """Predicado (id_libro, título) -> bool para los `libros` indicados: por id y, en registros
+    guardados antes de los ids, por título."""
+    ids = {l.id for l in libros}
+    titulos = {l.clave_titulo for l in libros}
+    return lambda id_libro, titulo: id_libro in ids if id_libro else normalizar(titulo or "") in titulos
+
+
+def registros_prestamos(prestamos: list = None, libros: list = None, activos: bool = False):
+    """Préstamos en memoria o, si no se pasan, leídos en streaming del historial y de prestamos.json.
+    `libros` restringe a esos libros (p. ej. el resultado de filtrar_libros)."""
+    fuente = persistencia.iterar_prestamos(activos) if prestamos is None else (p.to_dict() for p in prestamos)
+    incluir = _de_los_libros(libros) if libros is not None else None
+    for d in fuente:
+        if activos and d.get("fecha_devolucion"):
+            continue
+        libro = d.get("libro") or {}
+        if incluir is not None and not incluir(libro.get("id"), libro.get("titulo")):
+            continue
+        yield d
+
+
+def registros_solicitudes(cola=None, libros: list = None):
+    """Solicitudes de la cola en memoria o, si no se pasa, leídas en streaming de solicitudes.json."""
+    fuente = persistencia.iterar_registros("solicitudes.json") if cola is None else (s.to_dict() for s in cola.to_list())
+    incluir = _de_los_libros(libros) if libros is not None else None
+    for d in fuente:
+        if incluir is not None and not incluir(d.get("id_libro"), d.get("titulo_libro")):
+            continue
+        yield d
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exportación en streaming a JSONL o CSV.")
+    parser.add_argument("coleccion", choices=["libros", "usuarios", "prestamos", "solicitudes"])
+    parser.add_argument("salida", help="archivo de salida (.jsonl, .csv, opcionalmente .gz)")
+    parser.add_argument("--formato", choices=FORMATOS, help="forzar el formato en lugar de deducirlo")
+    parser.add_argument("--gzip", action="store_true", help="comprimir aunque la extensión no sea .gz")
+    parser.add_argument("--titulo")
+    parser.add_argument("--autor")
+    parser.add_argument("--genero")
+    parser.add_argument("--year", type=int)
+    parser.add_argument("--disponibles", action="store_true")
+    parser.add_argument("--activos", action="store_true", help="solo préstamos sin devolver")
+    args = parser.parse_args(argv)
+
+    filtros = {"titulo": args.titulo, "autor": args.autor, "genero": args.genero,
+               "year": args.year, "disponibles": args.disponibles}
+    hay_filtros = any(v not in (None, False) for v in filtros.values())
+    biblioteca = None
+    if args.coleccion == "libros" or hay_filtros:
+        biblioteca = Biblioteca()
+        biblioteca.libros = persistencia.cargar_libros()
+
+    if args.coleccion == "libros":
+        registros = registros_libros(biblioteca, **filtros)
+    else:
+        libros = filtrar_libros(biblioteca, **filtros) if hay_filtros else None
+        if args.coleccion == "usuarios":
+            registros = registros_usuarios()
+        elif args.coleccion == "prestamos":
+            registros = registros_prestamos(libros=libros, activos=args.activos)
+        else:
+            registros = registros_solicitudes(libros=libros)
+
+    total = exportar_registros(registros, args.salida, args.formato, args.gzip or None, CAMPOS[args.coleccion])
+    print(f"{total} registros exportados a {args.salida}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""Biblioteca sobre el catálogo fragmentado, que carga los fragmentos bajo demanda.
+
+`BibliotecaFragmentada` es una `Biblioteca` que al crearse solo lee el manifiesto
+(data/libros/_manifiesto.json, ver persistencia). Cada búsqueda carga antes los
+fragmentos que pueden contener resultados y ninguno más:
+
+- por género, con el catálogo fragmentado por género: los fragmentos cuyo
+  manifiesto incluye un género que contiene la consulta;
+- autocompletar un título, fragmentado por inicial: el fragmento de esa inicial;
+- el resto (título parcial, autor, año, disponibles, difusa, por id): todos.
+
+Un proceso que solo atiende la estantería de ciencia ficción no lee el resto
+del catálogo. `guardar()` reescribe solo los fragmentos cuyos libros cambiaron
+(altas, bajas, cambios de atributos o préstamos) y actualiza el manifiesto.
+
+Partir libros.json en fragmentos:
+
+    python -m src.fragmentos --criterio genero
+"""
+
+import argparse
+
+from . import persistencia
+from .clases import Biblioteca, Libro
+from .indices import normalizar
+
+
+def _estado(libro: Libro) -> tuple:
+    return (libro.id, libro.titulo, libro.autor, libro.genero, libro.year, libro.disponible, libro.isbn)
+
+
+class BibliotecaFragmentada(Biblioteca):
+    def __init__(self, manifiesto: dict = None, **kwargs):
+        super().__init__(**kwargs)
+        manifiesto = manifiesto or persistencia.leer_manifiesto() or {"criterio": "genero", "fragmentos": {}}
+        self.criterio = manifiesto["criterio"]
+        self.manifiesto = manifiesto["fragmentos"]  # fragmento -> {"libros", "generos"}
+        self.cargados = set()
+        self._huellas = {}  # fragmento -> estado de sus libros al cargarlo o guardarlo
+
+    # ---------- Carga bajo demanda ----------
+    def _huella(self, libros) -> int:
+        return hash(frozenset(_estado(l) for l in libros))
+
+    def _fragmento(self, libro: Libro) -> str:
+        return persistencia.clave_fragmento(libro, self.criterio)
+
+    def cargar_fragmentos(self, claves):
+        """Carga los fragmentos indicados que aún no estén en memoria."""
+        nuevos = []
+        for clave in claves:
+            if clave in self.cargados:
+                continue
+            libros = persistencia.cargar_fragmento(clave)
+            self.cargados.add(clave)
+            self._huellas[clave] = self._huella(libros)
+            nuevos.extend(libros)
+        if nuevos:
+            super().agregar_libros(nuevos)
+
+    def cargar_todo(self):
+        self.cargar_fragmentos(list(self.manifiesto))
+
+    def completo(self) -> bool:
+        return self.cargados >= set(self.manifiesto)
+
+    def _fragmentos_de_genero(self, genero: str) -> list:
+        if self.criterio != "genero":
+            return list(self.manifiesto)
+        q = normalizar(genero)
+        return [c for c, e in self.manifiesto.items() if any(q in g for g in e.get("generos", []))]
+
+    def _fragmentos_de_titulo(self, titulo: str) -> list:
+        if self.criterio != "inicial" or not normalizar(titulo):
+            return list(self.manifiesto)
+        return [persistencia.fragmento_de_titulo(titulo)]
+
+    # ---------- Búsquedas ----------
+    def buscar_por_genero(self, genero: str):
+        self.cargar_fragmentos(self._fragmentos_de_genero(genero))
+        return super().buscar_por_genero(genero)
+
+    def autocompletar_titulo(self, prefijo: str, k: int = 10) -> list:
+        self.cargar_fragmentos(self._fragmentos_de_titulo(prefijo))
+        return super().autocompletar_titulo(prefijo, k)
+
+    def consultar(self, **criterios):
+        if criterios.get("genero"):
+            self.cargar_fragmentos(self._fragmentos_de_genero(criterios["genero"]))
+        else:
+            self.cargar_todo()
+        return super().consultar(**criterios)
+
+    def buscar_por_titulo(self, titulo: str):
+        self.cargar_todo()  # coincidencia parcial: puede estar en cualquier fragmento
+        return super().buscar_por_titulo(titulo)
+
+    def buscar_por_autor(self, autor: str):
+        self.cargar_todo()
+        return super().buscar_por_autor(autor)
+
+    def buscar_por_año(self, year: int):
+        self.cargar_todo()
+        return super().buscar_por_año(year)
+
+    def buscar_disponibles(self):
+        self.cargar_todo()
+        return super().buscar_disponibles()
+
+    def buscar_difuso(self, texto: str, *args, **kwargs):
+        self.cargar_todo()
+        return super().buscar_difuso(texto, *args, **kwargs)
+
+    def explicar(self, **criterios) -> str:
+        self.cargar_todo()
+        return super().explicar(**criterios)
+
+    def libro_por_id(self, id_libro: str):
+        libro = super().libro_por_id(id_libro)
+        if libro is None and not self.completo():
+            self.cargar_todo()  # el id no dice en qué fragmento está
+            libro = super().libro_por_id(id_libro)
+        return libro
+
+    # ---------- Altas, bajas y cambios ----------
+    def agregar_libro(self, libro: Libro):
+        self.cargar_fragmentos([self._fragmento(libro)])
+        super().agregar_libro(libro)
+
+    def agregar_libros(self, libros: list, ordenar: bool = True):
+        self.cargar_fragmentos({self._fragmento(l) for l in libros})
+        super().agregar_libros(libros, ordenar)
+
+    def _buscar_para_modificar(self, titulo_buscar: str):
+        # primero entre lo cargado; si no, en el fragmento de esa inicial y, por último, en todos
+        libro = super()._buscar_para_modificar(titulo_buscar)
+        if libro is None and not self.completo():
+            self.cargar_fragmentos(self._fragmentos_de_titulo(titulo_buscar))
+            libro = super()._buscar_para_modificar(titulo_buscar)
+        if libro is None and not self.completo():
+            self.cargar_todo()
+            libro = super()._buscar_para_modificar(titulo_buscar)
+        return libro
+
+    # ---------- Guardado ----------
+    def _agrupar(self) -> dict:
+        grupos = {}
+        for l in self.libros:
+            grupos.setdefault(self._fragmento(l), []).append(l)
+        return grupos
+
+    def guardar(self) -> list:
+        """Reescribe solo los fragmentos que cambiaron y actualiza el manifiesto.
+        Devuelve los fragmentos escritos."""
+        grupos = self._agrupar()
+        pendientes = [c for c in grupos if c not in self.cargados and c in self.manifiesto]
+        if pendientes:
+            # un libro pasó a un fragmento que no estaba cargado: sin cargarlo se perderían sus libros
+            self.cargar_fragmentos(pendientes)
+            grupos = self._agrupar()
+        cambiados = [c for c in sorted(self.cargados | set(grupos))
+                     if self._huellas.get(c) != self._huella(grupos.get(c, []))]
+        entradas = {}
+        for clave in cambiados:
+            libros = grupos.get(clave, [])
+            persistencia.guardar_fragmento(clave, libros)
+            self.cargados.add(clave)
+            self._huellas[clave] = self._huella(libros)
+            entradas[clave] = persistencia.entrada_manifiesto(libros)
+        if entradas:
+            self.manifiesto = persistencia.actualizar_manifiesto(self.criterio, entradas)["fragmentos"]
+        return cambiados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Partir libros.json en fragmentos (data/libros/)")
+    parser.add_argument("--criterio", choices=persistencia.CRITERIOS, default="genero")
+    opciones = parser.parse_args(argv)
+
+    manifiesto = persistencia.fragmentar_libros(persistencia.cargar_libros(), opciones.criterio)
+    for clave, entrada in sorted(manifiesto["fragmentos"].items()):
+        print(f"  {entrada['libros']:>6}  {clave}")
+    print(f"{len(manifiesto['fragmentos'])} fragmentos por {opciones.criterio}")
+
+
+if __name__ == "__main__":
+    main()
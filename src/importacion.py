@@ -0,0 +1,206 @@
+"""Importación masiva de catálogos desde CSV o JSONL.
+
+Lee el archivo registro a registro (sin cargarlo entero), valida cada fila,
+descarta duplicados por título normalizado (frente al catálogo y dentro del
+propio archivo), rechaza los que traen un `id` que ya existe e inserta los
+libros en lotes sin reordenar. Al terminar hace
+una sola ordenación, una sola reconstrucción del grafo y una sola escritura de
+`libros.json` y `grafo.json`.
+
+Uso:
+    python -m src.importacion donacion.csv --rechazados rechazados.jsonl
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import sys
+
+from .clases import Libro, Biblioteca, GrafoLibros
+from . import persistencia
+from .metricas import instrumentar
+
+TAM_LOTE = 1000
+
+VALORES_VERDADEROS = {"1", "true", "si", "sí", "s", "yes", "y", "disponible"}
+VALORES_FALSOS = {"0", "false", "no", "n", "prestado"}
+
+
+class ResultadoImportacion:
+    def __init__(self):
+        self.leidos = 0
+        self.importados = 0
+        self.duplicados = 0
+        self.rechazados = []  # lista de (número de registro, motivo, registro original)
+
+    def __str__(self):
+        return (f"Leídos: {self.leidos} - Importados: {self.importados} - "
+                f"Duplicados: {self.duplicados} - Rechazados: {len(self.rechazados)}")
+
+
+def detectar_formato(ruta: str) -> str:
+    nombre = ruta.lower()
+    if nombre.endswith(".gz"):
+        nombre = nombre[:-3]
+    if nombre.endswith(".csv"):
+        return "csv"
+    if nombre.endswith(".jsonl") or nombre.endswith(".ndjson"):
+        return "jsonl"
+    raise ValueError(f"No se reconoce el formato de '{ruta}' (usa .csv o .jsonl)")
+
+
+def _abrir(ruta: str):
+    if ruta.lower().endswith(".gz"):
+        return gzip.open(ruta, 'rt', encoding='utf-8', newline='')
+    return open(ruta, 'r', encoding='utf-8', newline='')
+
+
+def leer_registros(ruta: str, formato: str = None):
+    """Genera (número de registro, dict) leyendo el archivo de forma incremental.
+    En JSONL, una línea que no es JSON válido se devuelve como (número, None)."""
+    formato = formato or detectar_formato(ruta)
+    with _abrir(ruta) as f:
+        if formato == "csv":
+            for n, fila in enumerate(csv.DictReader(f), start=1):
+                yield n, fila
+        elif formato == "jsonl":
+            n = 0
+            for linea in f:
+                if not linea.strip():
+                    continue
+                n += 1
+                try:
+                    dato = json.loads(linea)
+                except ValueError:
+                    dato = None
+                yield n, dato if isinstance(dato, dict) else None
+        else:
+            raise ValueError(f"Formato no soportado: {formato}")
+
+
+def validar_registro(d: dict):
+    """Convierte un registro en Libro. Devuelve (libro, None) o (None, motivo de rechazo).
+    Acepta las mismas claves que Libro.from_dict ('genero'/'categoria', 'year'/'año'/'anio',
+    'id' e 'isbn' opcionales)."""
+    if d is None:
+        return None, "registro mal formado"
+    titulo = (d.get("titulo") or "").strip()
+    if not titulo:
+        return None, "título vacío"
+    autor = (d.get("autor") or "").strip() or "Desconocido"
+    genero = (d.get("genero") or d.get("categoria") or "").strip() or "General"
+
+    year = d.get("year", d.get("año", d.get("anio")))
+    if isinstance(year, str):
+        year = year.strip()
+    if year in (None, ""):
+        year = None
+    else:
+        try:
+            year = int(year)
+        except (TypeError, ValueError):
+            return None, f"año inválido: {year!r}"
+
+    disponible = d.get("disponible", True)
+    if isinstance(disponible, str):
+        valor = disponible.strip().lower()
+        if valor == "" or valor in VALORES_VERDADEROS:
+            disponible = True
+        elif valor in VALORES_FALSOS:
+            disponible = False
+        else:
+            return None, f"valor de disponible inválido: {disponible!r}"
+    id_libro = str(d.get("id") or "").strip() or None
+    isbn = str(d.get("isbn") or "").strip() or None
+    return Libro(titulo, autor, genero, year, bool(disponible), id_libro=id_libro, isbn=isbn), None
+
+
+@instrumentar("importacion.importar_catalogo")
+def importar_catalogo(ruta: str, biblioteca: Biblioteca, grafo: GrafoLibros = None, formato: str = None,
+                      tam_lote: int = TAM_LOTE, progreso=None, guardar: bool = True) -> ResultadoImportacion:
+    """Importa un catálogo CSV/JSONL en `biblioteca`.
+    `progreso(resultado)` se llama tras cada lote insertado. Si se pasa `grafo`, se
+    reconstruye una sola vez al final; con guardar=True se escriben libros.json y
+    grafo.json una sola vez."""
+    resultado = ResultadoImportacion()
+    vistos = {l.clave_titulo for l in biblioteca.libros if l.clave_titulo}
+    ids = {l.id for l in biblioteca.libros}
+    lote = []
+
+    for n, registro in leer_registros(ruta, formato):
+        resultado.leidos += 1
+        libro, motivo = validar_registro(registro)
+        if libro is None:
+            resultado.rechazados.append((n, motivo, registro))
+            continue
+        clave = libro.clave_titulo
+        if clave in vistos:
+            resultado.duplicados += 1
+            continue
+        if libro.id in ids:
+            # los préstamos, solicitudes y el grafo referencian los libros por id
+            resultado.rechazados.append((n, f"id duplicado: {libro.id!r}", registro))
+            continue
+        vistos.add(clave)
+        ids.add(libro.id)
+        lote.append(libro)
+        if len(lote) >= tam_lote:
+            biblioteca.agregar_libros(lote, ordenar=False)
+            resultado.importados += len(lote)
+            lote = []
+            if progreso:
+                progreso(resultado)
+
+    if lote:
+        biblioteca.agregar_libros(lote, ordenar=False)
+        resultado.importados += len(lote)
+        if progreso:
+            progreso(resultado)
+
+    if resultado.importados:
+        biblioteca.ordenar_por_titulo()
+        if grafo is not None:
+            grafo.build_from_biblioteca(biblioteca)
+        if guardar:
+            persistencia.guardar_datos("libros.json", biblioteca.libros)
+            if grafo is not None:
+                persistencia.guardar_grafo("grafo.json", grafo.to_dict())
+    return resultado
+
+
+def guardar_rechazados(resultado: ResultadoImportacion, ruta: str):
+    """Escribe los registros rechazados en JSONL: {"registro": n, "motivo": ..., "datos": ...}."""
+    with open(ruta, 'w', encoding='utf-8') as f:
+        for n, motivo, datos in resultado.rechazados:
+            f.write(json.dumps({"registro": n, "motivo": motivo, "datos": datos}, ensure_ascii=False) + "\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Importación masiva de libros desde CSV o JSONL.")
+    parser.add_argument("ruta", help="archivo .csv o .jsonl (opcionalmente .gz)")
+    parser.add_argument("--formato", choices=["csv", "jsonl"], help="forzar el formato en lugar de deducirlo")
+    parser.add_argument("--lote", type=int, default=TAM_LOTE, help="libros por lote")
+    parser.add_argument("--sin-grafo", action="store_true", help="no reconstruir grafo.json")
+    parser.add_argument("--rechazados", help="archivo JSONL donde guardar los registros rechazados")
+    args = parser.parse_args(argv)
+
+    biblioteca = Biblioteca()
+    biblioteca.libros = persistencia.cargar_libros()
+    grafo = None if args.sin_grafo else GrafoLibros()
+
+    def progreso(r):
+        print(f"\r{r}", end="", file=sys.stderr, flush=True)
+
+    resultado = importar_catalogo(args.ruta, biblioteca, grafo, args.formato, args.lote, progreso)
+    print(f"\r{resultado}", file=sys.stderr)
+    for n, motivo, _ in resultado.rechazados[:10]:
+        print(f"  registro {n}: {motivo}", file=sys.stderr)
+    if len(resultado.rechazados) > 10:
+        print(f"  ... y {len(resultado.rechazados) - 10} más", file=sys.stderr)
+    if args.rechazados:
+        guardar_rechazados(resultado, args.rechazados)
+
+
+if __name__ == "__main__":
+    main()
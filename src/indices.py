@@ -0,0 +1,306 @@
+"""Índices auxiliares para búsquedas sobre el catálogo.
+
+Módulo sin dependencias del resto del paquete: `clases.py` lo importa.
+
+- `normalizar`: minúsculas (casefold) sin tildes ni signos, para comparar texto.
+- `IndiceTrigramas`: búsqueda tolerante a erratas ("Senor de los anilos",
+  "Harry Poter") por trigramas de caracteres.
+- `IndicePrefijos`: autocompletado por prefijo de títulos e IDs de usuario.
+- `UnionFind`: componentes conexas (del grafo de libros) con consultas casi O(1).
+"""
+
+import heapq
+from bisect import bisect_left, insort
+import math
+from functools import lru_cache
+import time
+import unicodedata
+
+PRESUPUESTO_MS = 50.0
+UMBRAL = 0.5
+
+
+def _quitar_tildes(texto: str) -> str:
+    descompuesto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+# tabla precalculada para las letras latinas con tilde más habituales (á, ñ, ü, ç...);
+# el resto de caracteres no ASCII pasan por NFKD
+_TABLA_TILDES = {}
+for _codigo in range(0xC0, 0x250):
+    _base = _quitar_tildes(chr(_codigo))
+    if _base != chr(_codigo) and _base.isascii():
+        _TABLA_TILDES[_codigo] = _base
+
+
+@lru_cache(maxsize=65536)  # autores y géneros se repiten mucho al cargar el catálogo
+def normalizar(texto: str) -> str:
+    """Clave de comparación: sin tildes, casefold y espacios colapsados ("  Fantasía " -> "fantasia")."""
+    if not texto:
+        return ""
+    if not texto.isascii():
+        texto = texto.translate(_TABLA_TILDES)
+        if not texto.isascii():
+            texto = _quitar_tildes(texto)
+    return " ".join(texto.casefold().split())
+
+
+def trigramas(texto: str) -> set:
+    """Trigramas de cada palabra con relleno ("  d", " du", "dun", "une", "ne ")."""
+    return _trigramas_normalizado(normalizar(texto))
+
+
+def _trigramas_normalizado(clave: str) -> set:
+    resultado = set()
+    for palabra in "".join(c if c.isalnum() else " " for c in clave).split():
+        p = f"  {palabra} "
+        for i in range(len(p) - 2):
+            resultado.add(p[i:i + 3])
+    return resultado
+
+
+# -----------------------------------------------------------
+#   BÚSQUEDA DIFUSA POR TRIGRAMAS
+# -----------------------------------------------------------
+
+class IndiceTrigramas:
+    """Índice invertido trigrama -> textos que lo contienen.
+
+    La puntuación de un texto es la fracción de trigramas de la consulta que
+    contiene (así "Harry Poter" encuentra "Harry Potter y la piedra filosofal"),
+    con la similitud de Jaccard como desempate. Como un candidato con puntuación
+    >= umbral comparte al menos m = ceil(umbral·|Q|) trigramas con la consulta,
+    basta con reunir candidatos de las |Q|-m+1 listas más cortas (filtrado por
+    prefijo): las listas de trigramas muy comunes (" el") no se recorren.
+    Los candidatos se verifican de más a menos coincidencias en esas listas y se
+    para en cuanto ninguno de los restantes puede entrar en el top-k.
+    """
+
+    def __init__(self, libros: list = None, campos=("titulo", "autor")):
+        self.campos = tuple(campos)
+        self._textos = []      # textos distintos indexados (normalizados)
+        self._libros = []      # por texto: [(libro, campo)]
+        self._listas = {}      # trigrama -> posiciones en _textos
+        self.ultima_completa = True
+        if libros is not None:
+            self.construir(libros)
+
+    def construir(self, libros: list):
+        posiciones = {}
+        self._textos, self._libros, self._listas = [], [], {}
+        for libro in libros:
+            for campo in self.campos:
+                # Libro ya trae la clave normalizada de cada campo (clave_titulo, clave_autor...)
+                clave = getattr(libro, "clave_" + campo, None)
+                if clave is None:
+                    clave = normalizar(getattr(libro, campo, None) or "")
+                if not clave:
+                    continue
+                i = posiciones.get(clave)
+                if i is None:
+                    # los autores se repiten mucho: cada texto distinto se indexa una vez
+                    i = posiciones[clave] = len(self._textos)
+                    self._textos.append(clave)
+                    self._libros.append([])
+                    for t in _trigramas_normalizado(clave):
+                        self._listas.setdefault(t, []).append(i)
+                self._libros[i].append((libro, campo))
+
+    def buscar(self, consulta: str, limite: int = 10, umbral: float = UMBRAL,
+               presupuesto_ms: float = PRESUPUESTO_MS, campos=None) -> list:
+        """Devuelve hasta `limite` pares (Libro, puntuación) de mejor a peor.
+        Si se agota `presupuesto_ms` se devuelve lo verificado hasta entonces y
+        `ultima_completa` queda en False."""
+        inicio = time.perf_counter()
+        limite_t = inicio + presupuesto_ms / 1000.0
+        self.ultima_completa = True
+        q = trigramas(consulta)
+        if not q or limite <= 0:
+            return []
+        minimo = max(1, math.ceil(umbral * len(q)))
+        listas = sorted((self._listas.get(t, ()) for t in q), key=len)
+        corte = len(q) - minimo + 1
+        parciales = {}
+        for lista in listas[:corte]:
+            for i in lista:
+                parciales[i] = parciales.get(i, 0) + 1
+        resto = len(q) - corte  # trigramas de listas largas no contados
+
+        campos = set(campos or self.campos)
+        mejores = {}  # id(libro) -> (puntuación, jaccard, libro)
+        # montículo con la primera puntuación de hasta `limite` libros distintos: si un libro
+        # mejora con otro campo no se añade de nuevo, así top[0] nunca supera a la k-ésima
+        # mejor puntuación real y la poda no descarta libros que entran en el top-k
+        top = []
+        for n, i in enumerate(sorted(parciales, key=parciales.get, reverse=True)):
+            if len(top) >= limite and (parciales[i] + resto) / len(q) < top[0]:
+                break  # cota superior de los restantes por debajo del top-k
+            if n % 256 == 0 and time.perf_counter() > limite_t:
+                self.ultima_completa = False
+                break
+            t = _trigramas_normalizado(self._textos[i])
+            comunes = len(q & t)
+            if comunes < minimo:
+                continue
+            puntuacion = comunes / len(q)
+            jaccard = comunes / (len(q) + len(t) - comunes)
+            for libro, campo in self._libros[i]:
+                if campo not in campos:
+                    continue
+                previo = mejores.get(id(libro))
+                if previo is None or (puntuacion, jaccard) > previo[:2]:
+                    mejores[id(libro)] = (puntuacion, jaccard, libro)
+                if previo is None:
+                    if len(top) < limite:
+                        heapq.heappush(top, puntuacion)
+                    elif puntuacion > top[0]:
+                        heapq.heapreplace(top, puntuacion)
+
+        orden = heapq.nsmallest(limite, mejores.values(), key=lambda x: (-x[0], -x[1], x[2].titulo or ""))
+        return [(libro, puntuacion) for puntuacion, _, libro in orden]
+
+
+# -----------------------------------------------------------
+#   AUTOCOMPLETADO POR PREFIJO
+# -----------------------------------------------------------
+
+class IndicePrefijos:
+    """Lista ordenada de pares (clave normalizada, texto original).
+
+    Todos los textos que empiezan por un prefijo quedan contiguos, así que
+    completar es un bisect (O(log n)) más los k siguientes pares. Altas y bajas
+    usan bisect/insort sobre la misma lista: no hace falta reconstruir.
+    """
+
+    def __init__(self, textos=None):
+        self._entradas = []
+        if textos is not None:
+            self.construir(textos)
+
+    def construir(self, textos):
+        self._entradas = sorted((normalizar(t), t) for t in textos if t)
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def agregar(self, texto: str):
+        if texto:
+            insort(self._entradas, (normalizar(texto), texto))
+
+    def eliminar(self, texto: str) -> bool:
+        """Quita una aparición de `texto`. Devuelve False si no estaba."""
+        entrada = (normalizar(texto or ""), texto)
+        i = bisect_left(self._entradas, entrada)
+        if i < len(self._entradas) and self._entradas[i] == entrada:
+            del self._entradas[i]
+            return True
+        return False
+
+    def completar(self, prefijo: str, k: int = 10) -> list:
+        """Hasta k textos distintos que empiezan por `prefijo` (sin distinguir tildes ni
+        mayúsculas), en orden alfabético."""
+        clave = normalizar(prefijo or "")
+        if prefijo and prefijo[-1].isspace() and clave:
+            clave += " "  # "el " no debe completar "elefante"
+        resultado = []
+        entradas = self._entradas
+        i = bisect_left(entradas, (clave,))
+        while i < len(entradas) and len(resultado) < k and entradas[i][0].startswith(clave):
+            texto = entradas[i][1]
+            if not resultado or resultado[-1] != texto:  # repetidos quedan contiguos
+                resultado.append(texto)
+            i += 1
+        return resultado
+
+
+# -----------------------------------------------------------
+#   COMPONENTES CONEXAS (UNION-FIND)
+# -----------------------------------------------------------
+
+class UnionFind:
+    """Conjuntos disjuntos con unión por tamaño y compresión de caminos.
+
+    `encontrar`, `conectados` y `tamano` son casi O(1). `miembros` devuelve los
+    elementos en orden de alta, copiados de una caché {raíz: [elementos]} que se
+    calcula de una pasada la primera vez y después se mantiene en cada unión (las
+    dos listas se concatenan y se reordenan al pedirlas).
+    No admite bajas: quien las necesite reconstruye.
+    """
+
+    def __init__(self, elementos=None):
+        self._padre = {}
+        self._tamano = {}  # solo de las raíces
+        self._orden = {}   # elemento -> posición de alta
+        self._miembros = None  # caché {raíz: [elementos en orden de alta]}
+        self._por_ordenar = set()  # raíces cuya lista de la caché se unió a otra
+        for x in (elementos or []):
+            self.agregar(x)
+
+    def __len__(self):
+        return len(self._padre)
+
+    def __contains__(self, x):
+        return x in self._padre
+
+    def agregar(self, x):
+        if x not in self._padre:
+            self._padre[x] = x
+            self._tamano[x] = 1
+            self._orden[x] = len(self._orden)
+            if self._miembros is not None:
+                self._miembros[x] = [x]
+
+    def encontrar(self, x):
+        """Raíz del conjunto de x (x debe existir)."""
+        padre = self._padre
+        while padre[x] != x:
+            padre[x] = padre[padre[x]]  # compresión por mitades
+            x = padre[x]
+        return x
+
+    def unir(self, a, b) -> bool:
+        """Une los conjuntos de a y b (los da de alta si hace falta). False si ya lo estaban."""
+        self.agregar(a)
+        self.agregar(b)
+        ra, rb = self.encontrar(a), self.encontrar(b)
+        if ra == rb:
+            return False
+        if self._tamano[ra] < self._tamano[rb]:
+            ra, rb = rb, ra
+        self._padre[rb] = ra
+        self._tamano[ra] += self._tamano.pop(rb)
+        if self._miembros is not None:
+            self._miembros[ra].extend(self._miembros.pop(rb))
+            self._por_ordenar.discard(rb)
+            self._por_ordenar.add(ra)
+        return True
+
+    def conectados(self, a, b) -> bool:
+        return a in self._padre and b in self._padre and self.encontrar(a) == self.encontrar(b)
+
+    def tamano(self, x) -> int:
+        """Elementos del conjunto de x (0 si x no existe)."""
+        return self._tamano[self.encontrar(x)] if x in self._padre else 0
+
+    def miembros(self, x) -> list:
+        """Elementos del conjunto de x en orden de alta (una copia)."""
+        if x not in self._padre:
+            return []
+        if self._miembros is None:
+            miembros = {}
+            for y in self._padre:  # orden de alta
+                miembros.setdefault(self.encontrar(y), []).append(y)
+            self._miembros = miembros
+        raiz = self.encontrar(x)
+        lista = self._miembros[raiz]
+        if raiz in self._por_ordenar:
+            # dos tramos ya ordenados: sorted los mezcla en tiempo lineal. Se asigna una
+            # lista nueva (sin ordenar en el sitio) por si otro lector la está copiando
+            lista = sorted(lista, key=self._orden.__getitem__)
+            self._miembros[raiz] = lista
+            self._por_ordenar.discard(raiz)
+        return list(lista)
+
+    def num_conjuntos(self) -> int:
+        return len(self._tamano)
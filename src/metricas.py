@@ -0,0 +1,158 @@
+"""Instrumentación opcional de las rutas calientes (búsquedas, grafo, cola y persistencia).
+
+Está deshabilitada por defecto: las funciones decoradas con `instrumentar` solo
+comprueban una variable global antes de llamar a la original. Se activa con
+`habilitar()` o con la variable de entorno BIBLIOTECA_METRICAS=1; si además se
+define BIBLIOTECA_METRICAS_ARCHIVO, el registro se vuelca a ese JSON al salir.
+"""
+
+import atexit
+import json
+import math
+import os
+import threading
+import time
+from functools import wraps
+
+# Número de latencias recientes que se conservan por métrica para los percentiles
+MAX_MUESTRAS = 4096
+
+_habilitado = False
+_registro = {}
+_lock = threading.Lock()
+_archivo_salida = None
+
+
+class Metrica:
+    """Acumula llamadas, tiempo total, bytes escritos y una ventana de latencias."""
+
+    __slots__ = ("nombre", "llamadas", "total", "maximo", "bytes", "muestras", "_pos")
+
+    def __init__(self, nombre: str):
+        self.nombre = nombre
+        self.llamadas = 0
+        self.total = 0.0
+        self.maximo = 0.0
+        self.bytes = 0
+        self.muestras = []
+        self._pos = 0
+
+    def registrar(self, segundos: float):
+        self.llamadas += 1
+        self.total += segundos
+        if segundos > self.maximo:
+            self.maximo = segundos
+        # búfer circular: conservar las últimas MAX_MUESTRAS latencias
+        if len(self.muestras) < MAX_MUESTRAS:
+            self.muestras.append(segundos)
+        else:
+            self.muestras[self._pos] = segundos
+            self._pos = (self._pos + 1) % MAX_MUESTRAS
+
+    def percentil(self, p: float) -> float:
+        """Percentil p (0-100) por rango más cercano sobre las muestras conservadas."""
+        if not self.muestras:
+            return 0.0
+        ordenadas = sorted(self.muestras)
+        idx = min(len(ordenadas) - 1, max(0, math.ceil(p / 100 * len(ordenadas)) - 1))
+        return ordenadas[idx]
+
+    def to_dict(self):
+        return {
+            "llamadas": self.llamadas,
+            "total_ms": self.total * 1000,
+            "media_ms": (self.total / self.llamadas * 1000) if self.llamadas else 0.0,
+            "p50_ms": self.percentil(50) * 1000,
+            "p95_ms": self.percentil(95) * 1000,
+            "p99_ms": self.percentil(99) * 1000,
+            "max_ms": self.maximo * 1000,
+            "bytes_escritos": self.bytes,
+        }
+
+
+def habilitar(archivo_salida: str = None):
+    """Activa la instrumentación. Si se indica archivo_salida, se vuelca al terminar el proceso."""
+    global _habilitado, _archivo_salida
+    _habilitado = True
+    if archivo_salida:
+        if _archivo_salida is None:
+            atexit.register(_volcar_al_salir)
+        _archivo_salida = archivo_salida
+
+
+def deshabilitar():
+    global _habilitado
+    _habilitado = False
+
+
+def esta_habilitado() -> bool:
+    return _habilitado
+
+
+def reiniciar():
+    """Vacía el registro de métricas."""
+    with _lock:
+        _registro.clear()
+
+
+def _obtener(nombre: str) -> Metrica:
+    m = _registro.get(nombre)
+    if m is None:
+        m = _registro.setdefault(nombre, Metrica(nombre))
+    return m
+
+
+def registrar_tiempo(nombre: str, segundos: float):
+    with _lock:
+        _obtener(nombre).registrar(segundos)
+
+
+def registrar_bytes(nombre: str, cantidad: int):
+    if not _habilitado:
+        return
+    with _lock:
+        _obtener(nombre).bytes += cantidad
+
+
+def instrumentar(nombre: str):
+    """Decorador que mide llamadas y latencia de la función bajo `nombre` cuando está habilitado."""
+    def decorador(func):
+        @wraps(func)
+        def envoltura(*args, **kwargs):
+            if not _habilitado:
+                return func(*args, **kwargs)
+            inicio = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                registrar_tiempo(nombre, time.perf_counter() - inicio)
+        return envoltura
+    return decorador
+
+
+def resumen() -> dict:
+    """Devuelve {nombre: estadísticas} ordenado por tiempo total descendente."""
+    with _lock:
+        metricas = sorted(_registro.values(), key=lambda m: m.total, reverse=True)
+        return {m.nombre: m.to_dict() for m in metricas}
+
+
+def volcar(ruta: str):
+    """Escribe el resumen actual en un archivo JSON."""
+    carpeta = os.path.dirname(ruta)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(resumen(), f, indent=2, ensure_ascii=False)
+
+
+def _volcar_al_salir():
+    if _archivo_salida and _registro:
+        try:
+            volcar(_archivo_salida)
+        except OSError:
+            pass
+
+
+if os.environ.get("BIBLIOTECA_METRICAS", "") not in ("", "0"):
+    habilitar(os.environ.get("BIBLIOTECA_METRICAS_ARCHIVO"))
@@ -0,0 +1,109 @@
+"""Modo de perfilado por acción del menú.
+
+`Perfilador.instalar(modulo, nombres)` sustituye las funciones de acción de un
+módulo de interfaz por envolturas que ejecutan cada llamada bajo `cProfile`,
+guardan un `.prof` etiquetado con el nombre de la acción y la hora, e imprimen
+un resumen con las N funciones más costosas. Como los menús despachan las
+acciones buscándolas en las variables globales del módulo, no hace falta
+modificar los bucles de `interfaz/interfaz.py` ni de `interfaz/menu.py`.
+Opcionalmente mide el pico de memoria con `tracemalloc`.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+CARPETA = "perfiles"
+TOP = 15
+
+# Acciones despachadas desde main/usuarios_menu/libros_menu en interfaz/interfaz.py
+ACCIONES_INTERFAZ = [
+    "registrar_usuario", "listar_usuarios", "actualizar_usuario_menu", "eliminar_usuario_menu",
+    "registrar_libro", "ver_libros", "buscar_libros", "prestar_libro", "devolver_libro",
+    "relacionar_libros", "ver_recomendaciones", "actualizar_libro_menu", "eliminar_libro_menu",
+    "importar_catalogo_menu", "ver_metricas", "ver_estadisticas", "ver_vencimientos",
+]
+
+# Acciones despachadas desde el bucle de mostrar_menu en interfaz/menu.py
+ACCIONES_MENU = [
+    "registrar_libro", "registrar_usuario", "prestar_libro", "devolver_libro", "buscar_libros",
+    "relacionar_libros", "ver_recomendaciones", "actualizar_libro_menu", "eliminar_libro_menu",
+    "listar_usuarios", "actualizar_usuario_menu", "eliminar_usuario_menu", "importar_catalogo_menu",
+    "ver_metricas", "ver_estadisticas", "ver_vencimientos",
+]
+
+
+class Perfilador:
+    def __init__(self, carpeta: str = CARPETA, top: int = TOP, memoria: bool = False, salida=None):
+        self.carpeta = carpeta
+        self.top = top
+        self.memoria = memoria
+        self.salida = salida or sys.stderr
+        self.archivos = []  # rutas .prof generadas, en orden
+        self._activo = False
+
+    @contextmanager
+    def perfilar(self, nombre: str):
+        """Ejecuta el bloque bajo cProfile y guarda `<carpeta>/<nombre>_<fecha>.prof`.
+        Las llamadas anidadas se ejecutan sin perfilar (cProfile no admite dos perfiles activos)."""
+        if self._activo:
+            yield
+            return
+        self._activo = True
+        iniciar_memoria = self.memoria and not tracemalloc.is_tracing()
+        if iniciar_memoria:
+            tracemalloc.start()
+        elif self.memoria and hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        perfil = cProfile.Profile()
+        inicio = time.perf_counter()
+        perfil.enable()
+        try:
+            yield
+        finally:
+            perfil.disable()
+            duracion = time.perf_counter() - inicio
+            pico = None
+            if self.memoria:
+                pico = tracemalloc.get_traced_memory()[1]
+                if iniciar_memoria:
+                    tracemalloc.stop()
+            self._activo = False
+            self._guardar(nombre, perfil, duracion, pico)
+
+    def _guardar(self, nombre: str, perfil: cProfile.Profile, duracion: float, pico):
+        os.makedirs(self.carpeta, exist_ok=True)
+        marca = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        ruta = os.path.join(self.carpeta, f"{nombre}_{marca}.prof")
+        perfil.dump_stats(ruta)
+        self.archivos.append(ruta)
+
+        texto = io.StringIO()
+        pstats.Stats(perfil, stream=texto).strip_dirs().sort_stats("cumulative").print_stats(self.top)
+        memoria = f", pico de memoria {pico / 1024:.1f} KiB" if pico is not None else ""
+        print(f"\n[perfil] {nombre}: {duracion * 1000:.1f} ms{memoria} -> {ruta}", file=self.salida)
+        # omitir la cabecera de pstats y mostrar solo la tabla de funciones
+        lineas = texto.getvalue().splitlines()
+        inicio_tabla = next((i for i, l in enumerate(lineas) if l.lstrip().startswith("ncalls")), 0)
+        print("\n".join(l for l in lineas[inicio_tabla:] if l.strip()), file=self.salida)
+
+    def envolver(self, nombre: str, func):
+        @wraps(func)
+        def envoltura(*args, **kwargs):
+            with self.perfilar(nombre):
+                return func(*args, **kwargs)
+        return envoltura
+
+    def instalar(self, modulo, nombres: list):
+        """Reemplaza en `modulo` cada función de `nombres` por su versión perfilada."""
+        for nombre in nombres:
+            func = getattr(modulo, nombre, None)
+            if callable(func):
+                setattr(modulo, nombre, self.envolver(nombre, func))
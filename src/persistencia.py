@@ -1,80 +1,703 @@
+import bz2
+import gzip
 import json
+import lzma
 import os
-from .clases import Libro, Usuario, Prestamo
+import re
+import time
+from contextlib import contextmanager
+from .clases import Libro, Usuario, Prestamo, indexar_por_id, nuevo_id_libro
+from . import catalogo_binario
+from .indices import normalizar
+from . import metricas
+from .metricas import instrumentar
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
 
 DATA_DIR = "data"
 
-def guardar_datos(nombre_archivo: str, datos):
-    """Guarda una lista de objetos en un archivo JSON."""
-    if not os.path.exists(DATA_DIR):
-        os.makedirs(DATA_DIR)
+# Tamaño de bloque para la lectura incremental de listas JSON
+TAM_BLOQUE = 1 << 16
 
-    ruta = os.path.join(DATA_DIR, nombre_archivo)
-    with open(ruta, 'w', encoding='utf-8') as f:
-        json.dump([d.to_dict() for d in datos], f, indent=2, ensure_ascii=False)
+# ---------------------------------------------------------
+#   ACCESO CONCURRENTE ENTRE PROCESOS
+# ---------------------------------------------------------
+# Cada colección tiene su propio candado (`<archivo>.lock`) y un sello de versión
+# (`<archivo>.version`) que se incrementa en cada escritura. Al cargar se recuerda la
+# versión leída y una huella de cada registro; al guardar, si otro proceso escribió
+# entretanto, se hace una fusión a tres bandas registro a registro en lugar de
+# sobrescribir sus cambios. Las escrituras son atómicas (archivo temporal + os.replace).
 
+# Clave que identifica un registro dentro de cada colección, para la fusión. Los libros
+# se identifican por su id (el título solo en registros guardados antes de existir).
+CLAVES = {
+    "libros.json": lambda d: d.get("id") or (d.get("titulo") or "").lower(),
+    "usuarios.json": lambda d: d.get("id"),
+    "prestamos.json": lambda d: (d["usuario"]["id"], d["libro"].get("id") or d["libro"]["titulo"],
+                                 d["fecha_prestamo"]),
+    "solicitudes.json": lambda d: (d.get("id_usuario"), d.get("id_libro") or d.get("titulo_libro"),
+                                   d.get("fecha_solicitud")),
+}
 
-def cargar_libros() -> list:
-    """Carga libros desde JSON."""
-    ruta = os.path.join(DATA_DIR, "libros.json")
-    if os.path.exists(ruta):
-        with open(ruta, 'r', encoding='utf-8') as f:
+
+def _clave_de(nombre_archivo: str):
+    """Clave de registro de una colección; los fragmentos del catálogo usan la de libros.json."""
+    if nombre_archivo.startswith(FRAGMENTOS + "/"):
+        return CLAVES["libros.json"]
+    return CLAVES.get(nombre_archivo)
+
+
+ESPERA_BLOQUEO = 10.0  # segundos máximos esperando un candado en Windows
+
+_versiones_vistas = {}  # ruta -> versión leída/escrita por este proceso
+_base = {}              # ruta -> {clave: huella} de los registros en esa versión
+_pendiente_recarga = set()  # rutas fusionadas con cambios ajenos aún no cargados en memoria
+
+
+def _ruta(nombre_archivo: str) -> str:
+    return os.path.join(DATA_DIR, nombre_archivo)
+
+
+# ---------------------------------------------------------
+#   FORMATO EN DISCO (JSON COMPACTO Y COMPRESIÓN)
+# ---------------------------------------------------------
+# Cada colección se guarda como `<nombre>` (p. ej. libros.json) o comprimida como
+# `<nombre>.gz`, `.xz` o `.bz2`. Al cargar se abre el archivo que exista y la extensión
+# decide el códec; al guardar se comprime mientras se serializa, con el formato
+# configurado, y se borran las otras variantes. Candados y sellos de versión usan
+# siempre el nombre sin extensión.
+#
+# BIBLIOTECA_COMPRESION: "gz" para todas las colecciones, o por colección
+# ("libros.json=xz,prestamos.json=gz"). BIBLIOTECA_JSON_COMPACTO=1 escribe un registro
+# por línea sin sangría en lugar de indent=2. `python -m benchmarks.bench_formatos`
+# compara tamaño y tiempos de cada combinación.
+
+CODECS = {"": open, ".gz": gzip.open, ".xz": lzma.open, ".bz2": bz2.open}
+
+
+def leer_compresion(texto: str) -> dict:
+    """Configuración de BIBLIOTECA_COMPRESION -> {colección o "*": extensión}."""
+    config = {}
+    for parte in (p.strip() for p in texto.split(",")):
+        if not parte:
+            continue
+        nombre, _, codec = parte.rpartition("=")
+        extension = "." + codec.strip().lstrip(".") if codec.strip(" .") else ""
+        if extension not in CODECS:
+            raise ValueError(f"Compresión no soportada: {codec!r} (usa gz, xz o bz2)")
+        config[nombre.strip() or "*"] = extension
+    return config
+
+
+COMPRESION = leer_compresion(os.environ.get("BIBLIOTECA_COMPRESION", ""))
+JSON_COMPACTO = os.environ.get("BIBLIOTECA_JSON_COMPACTO", "") not in ("", "0")
+
+
+def _extension(nombre_archivo: str) -> str:
+    return COMPRESION.get(nombre_archivo, COMPRESION.get("*", ""))
+
+
+def _ruta_datos(nombre_archivo: str):
+    """Archivo en disco de la colección (con o sin compresión), o None si no existe."""
+    base = _ruta(nombre_archivo)
+    for extension in (_extension(nombre_archivo), *CODECS):
+        if os.path.exists(base + extension):
+            return base + extension
+    return None
+
+
+def _abrir(ruta: str, modo: str = "r", extension: str = None):
+    """Abre en modo texto UTF-8 con el códec de `extension` (por defecto, el de la ruta)."""
+    if extension is None:
+        extension = next((e for e in CODECS if e and ruta.endswith(e)), "")
+    return CODECS[extension](ruta, modo + "t", encoding="utf-8")
+
+
+def _huella(registro: dict) -> int:
+    return hash(json.dumps(registro, ensure_ascii=False, sort_keys=True))
+
+
+@contextmanager
+def bloquear(nombre_archivo: str, compartido: bool = False):
+    """Candado entre procesos para una colección. Varios lectores pueden compartirlo
+    (en Windows siempre es exclusivo); los escritores lo obtienen en exclusiva."""
+    carpeta = os.path.dirname(_ruta(nombre_archivo))  # los fragmentos van en una subcarpeta
+    if not os.path.exists(carpeta):
+        os.makedirs(carpeta)
+    with open(_ruta(nombre_archivo) + ".lock", 'a+') as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_SH if compartido else fcntl.LOCK_EX)
+        else:
+            limite = time.monotonic() + ESPERA_BLOQUEO
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    if time.monotonic() > limite:
+                        raise
+                    time.sleep(0.05)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def version_actual(nombre_archivo: str) -> int:
+    """Versión en disco de la colección (0 si nunca se ha escrito con sello)."""
+    try:
+        with open(_ruta(nombre_archivo) + ".version", 'r', encoding='utf-8') as f:
+            return int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def _escribir_version(nombre_archivo: str, version: int):
+    ruta = _ruta(nombre_archivo) + ".version"
+    tmp = f"{ruta}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(str(version))
+    os.replace(tmp, ruta)
+
+
+def colecciones_modificadas(nombres=None) -> list:
+    """Colecciones cargadas por este proceso que otro proceso ha cambiado desde entonces
+    (o que se fusionaron con cambios ajenos al guardar) y conviene recargar."""
+    nombres = nombres or list(CLAVES)
+    cambiadas = []
+    for nombre in nombres:
+        ruta = _ruta(nombre)
+        if ruta in _pendiente_recarga:
+            cambiadas.append(nombre)
+        elif ruta in _versiones_vistas and version_actual(nombre) != _versiones_vistas[ruta]:
+            cambiadas.append(nombre)
+    return cambiadas
+
+
+def _recordar_base(nombre_archivo: str, version: int, registros: list):
+    ruta = _ruta(nombre_archivo)
+    _versiones_vistas[ruta] = version
+    _pendiente_recarga.discard(ruta)
+    clave = _clave_de(nombre_archivo)
+    if clave:
+        _base[ruta] = {clave(r): _huella(r) for r in registros}
+
+
+def _leer_lista(nombre_archivo: str):
+    """Lee una colección bajo candado compartido y recuerda su versión y registros base.
+    Devuelve la lista de dicts o None si el archivo no existe."""
+    ruta = _ruta_datos(nombre_archivo)
+    if ruta is None:
+        # recordar que estaba vacía: si otro proceso la crea, se fusionará al guardar
+        _recordar_base(nombre_archivo, version_actual(nombre_archivo), [])
+        return None
+    with bloquear(nombre_archivo, compartido=True):
+        version = version_actual(nombre_archivo)
+        with _abrir(ruta) as f:
+            datos = json.load(f)
+    _recordar_base(nombre_archivo, version, datos)
+    return datos
+
+
+def fusionar(nombre_archivo: str, locales: list, disco: list, base: dict) -> list:
+    """Fusión a tres bandas por clave de registro entre lo que este proceso quiere
+    escribir (`locales`), lo que hay en disco y la base que este proceso cargó:
+    - cambiado aquí -> gana la versión local;
+    - sin cambios aquí -> gana la del disco (o desaparece si otro proceso lo borró);
+    - borrado aquí -> no se escribe;
+    - añadido por otro proceso -> se conserva.
+    Devuelve la lista resultante en el orden local, con los añadidos ajenos al final."""
+    clave = _clave_de(nombre_archivo)
+    en_disco = {clave(r): r for r in disco}
+    resultado = []
+    claves_locales = set()
+    for r in locales:
+        k = clave(r)
+        claves_locales.add(k)
+        if k in base and base[k] == _huella(r):
+            # no lo modificamos: prevalece lo que haya hecho otro proceso
+            if k in en_disco:
+                resultado.append(en_disco[k])
+        else:
+            resultado.append(r)
+    for k, r in en_disco.items():
+        if k not in claves_locales and k not in base:
+            resultado.append(r)
+    return resultado
+
+
+def _escribir_atomico(nombre_archivo: str, escribir) -> int:
+    """Escribe en un temporal con `escribir(f)`, comprimiendo según la configuración de la
+    colección, y lo renombra sobre el destino. Devuelve los bytes en disco."""
+    carpeta = os.path.dirname(_ruta(nombre_archivo))
+    if not os.path.exists(carpeta):
+        os.makedirs(carpeta)
+    extension = _extension(nombre_archivo)
+    ruta = _ruta(nombre_archivo) + extension
+    tmp = f"{ruta}.{os.getpid()}.tmp"
+    try:
+        with _abrir(tmp, "w", extension) as f:
+            escribir(f)
+        tamano = os.path.getsize(tmp)
+        os.replace(tmp, ruta)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    # la colección cambió de formato: que no quede la variante anterior
+    for otra in CODECS:
+        if otra != extension and os.path.exists(_ruta(nombre_archivo) + otra):
+            os.remove(_ruta(nombre_archivo) + otra)
+    return tamano
+
+
+def escribir_lista_json(f, registros, compacto: bool = None):
+    """Escribe los dicts de `registros` como lista JSON, uno a uno.
+    Con indent=2 el resultado es idéntico a json.dump(list(registros), f, indent=2) sin
+    construir la lista; compacto (por defecto JSON_COMPACTO) escribe un registro por línea."""
+    if JSON_COMPACTO if compacto is None else compacto:
+        primero = True
+        for registro in registros:
+            f.write("[\n" if primero else ",\n")
+            f.write(json.dumps(registro, ensure_ascii=False, separators=(",", ":")))
+            primero = False
+        f.write("[]" if primero else "\n]")
+        return
+    primero = True
+    for registro in registros:
+        texto = json.dumps(registro, indent=2, ensure_ascii=False)
+        f.write("[\n  " if primero else ",\n  ")
+        f.write(texto.replace("\n", "\n  "))
+        primero = False
+    f.write("[]" if primero else "\n]")
+
+
+def iterar_registros(nombre_archivo: str, tam_bloque: int = TAM_BLOQUE):
+    """Genera uno a uno los elementos de la lista JSON guardada en `nombre_archivo`
+    sin cargar el archivo completo en memoria (descomprimiendo sobre la marcha si hace falta).
+    No genera nada si el archivo no existe."""
+    ruta = _ruta_datos(nombre_archivo)
+    if ruta is None:
+        return
+    decoder = json.JSONDecoder()
+    with _abrir(ruta) as f:
+        buf = ""
+        pos = 0
+        fin = False
+        inicio_lista = False
+
+        def rellenar():
+            nonlocal buf, pos, fin
+            bloque = f.read(tam_bloque)
+            if not bloque:
+                fin = True
+            # descartar lo ya consumido para que el búfer no crezca con el archivo
+            buf = buf[pos:] + bloque
+            pos = 0
+
+        while True:
+            # saltar espacios y separadores
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= len(buf):
+                if fin:
+                    return
+                rellenar()
+                continue
+            if not inicio_lista:
+                if buf[pos] != "[":
+                    raise ValueError(f"{nombre_archivo} no contiene una lista JSON")
+                inicio_lista = True
+                pos += 1
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                registro, nuevo_pos = decoder.raw_decode(buf, pos)
+            except ValueError:
+                if fin:
+                    raise
+                rellenar()
+                continue
+            pos = nuevo_pos
+            yield registro
+
+
+@instrumentar("persistencia.guardar_datos")
+def guardar_datos(nombre_archivo: str, datos) -> bool:
+    """Guarda una lista de objetos en un archivo JSON.
+    Los objetos se serializan de uno en uno, sin construir la lista de dicts en memoria.
+    Si otro proceso modificó la colección desde la última carga, fusiona ambos cambios
+    y devuelve True (la colección debería recargarse); en otro caso devuelve False."""
+    return guardar_registros(nombre_archivo, (d.to_dict() for d in datos))
+
+
+def guardar_registros(nombre_archivo: str, registros) -> bool:
+    """Como guardar_datos pero recibe los dicts ya serializados (p. ej. una instantánea
+    tomada en otro hilo)."""
+    clave = _clave_de(nombre_archivo)
+    with bloquear(nombre_archivo):
+        actual = version_actual(nombre_archivo)
+        ruta = _ruta(nombre_archivo)
+        vista = _versiones_vistas.get(ruta)
+        en_disco = _ruta_datos(nombre_archivo)
+        conflicto = clave is not None and vista is not None and actual != vista and en_disco is not None
+
+        if conflicto:
+            with _abrir(en_disco) as f:
+                disco = json.load(f)
+            fuente = iter(fusionar(nombre_archivo, list(registros), disco, _base.get(ruta, {})))
+        else:
+            fuente = iter(registros)
+
+        nueva_base = {}
+
+        def recorrer():
+            # registrar la huella de lo escrito para la próxima fusión
+            for r in fuente:
+                if clave:
+                    nueva_base[clave(r)] = _huella(r)
+                yield r
+
+        tamano = _escribir_atomico(nombre_archivo, lambda f: escribir_lista_json(f, recorrer()))
+        _escribir_version(nombre_archivo, actual + 1)
+        _versiones_vistas[ruta] = actual + 1
+        if clave:
+            _base[ruta] = nueva_base
+        if conflicto:
+            _pendiente_recarga.add(ruta)
+    if metricas.esta_habilitado():
+        metricas.registrar_bytes("persistencia.guardar_datos", tamano)
+    return conflicto
+
+
+def migrar_ids_libros() -> int:
+    """Asigna un id a los libros de libros.json guardados sin él y reescribe el archivo.
+    Tiene que quedar en disco: un id generado en cada carga no serviría para referenciar
+    el libro desde préstamos, solicitudes y grafo. Devuelve cuántos libros se migraron."""
+    if _ruta_datos("libros.json") is None:
+        return 0
+    with bloquear("libros.json"):
+        # releer bajo el candado exclusivo: otro proceso puede haberlos migrado ya
+        with _abrir(_ruta_datos("libros.json")) as f:
             datos = json.load(f)
+        sin_id = [d for d in datos if not d.get("id")]
+        if not sin_id:
+            return 0
+        for d in sin_id:
+            d["id"] = nuevo_id_libro()
+        actual = version_actual("libros.json")
+        _escribir_atomico("libros.json", lambda f: escribir_lista_json(f, datos))
+        _escribir_version("libros.json", actual + 1)
+    return len(sin_id)
+
+
+@instrumentar("persistencia.cargar_libros")
+def cargar_libros() -> list:
+    """Carga libros desde JSON (migrando antes los que no tienen id)."""
+    datos = _leer_lista("libros.json")
+    if datos is not None and not all(d.get("id") for d in datos):
+        migrar_ids_libros()
+        datos = _leer_lista("libros.json")
+    if datos is not None:
         return [Libro.from_dict(d) for d in datos]
     return []
 
 
+@instrumentar("persistencia.cargar_usuarios")
 def cargar_usuarios() -> list:
     """Carga usuarios desde JSON."""
-    ruta = os.path.join(DATA_DIR, "usuarios.json")
-    if os.path.exists(ruta):
-        with open(ruta, 'r', encoding='utf-8') as f:
-            datos = json.load(f)
+    datos = _leer_lista("usuarios.json")
+    if datos is not None:
         return [Usuario.from_dict(d) for d in datos]
     return []
 
 
+@instrumentar("persistencia.cargar_prestamos")
 def cargar_prestamos(libros_registrados: list, usuarios_registrados: list) -> list:
-    """Carga préstamos desde JSON, reconstruyendo referencias a libros y usuarios."""
-    ruta = os.path.join(DATA_DIR, "prestamos.json")
-    if os.path.exists(ruta):
-        with open(ruta, 'r', encoding='utf-8') as f:
-            datos = json.load(f)
+    """Carga préstamos desde JSON, reconstruyendo referencias a libros y usuarios
+    (por id, con un diccionario construido una sola vez)."""
+    datos = _leer_lista("prestamos.json")
+    if datos is not None:
         prestamos = []
+        libros, usuarios = indexar_por_id(libros_registrados), indexar_por_id(usuarios_registrados)
+        por_titulo = None
         for d in datos:
-            p = Prestamo.from_dict(d, usuarios_registrados, libros_registrados)
+            if not d["libro"].get("id"):
+                # guardado antes de existir los ids: se resuelve por título (una vez; al
+                # volver a guardar los préstamos ya llevan el id)
+                if por_titulo is None:
+                    por_titulo = {}
+                    for l in libros_registrados:
+                        por_titulo.setdefault(l.titulo, l.id)
+                d["libro"]["id"] = por_titulo.get(d["libro"].get("titulo"))
+            p = Prestamo.from_dict(d, usuarios, libros)
             if p:
                 prestamos.append(p)
         return prestamos
     return []
 
 
+# ---------------------------------------------------------
+#   HISTORIAL DE PRÉSTAMOS (SEGMENTOS POR MES)
+# ---------------------------------------------------------
+# prestamos.json solo guarda los préstamos activos. Los devueltos se mueven a
+# historial/prestamos-AAAA-MM.jsonl según el mes de devolución: una línea JSON por
+# préstamo, y solo se añaden líneas al final, nunca se reescribe un segmento. Así
+# prestar o devolver reescribe únicamente los préstamos activos, y el historial se
+# lee en streaming solo cuando hace falta (estadísticas, exportaciones, consultas).
+
+HISTORIAL = "historial"  # subcarpeta de DATA_DIR; también nombre de su candado
+
+
+def _ruta_segmento(mes: str) -> str:
+    return os.path.join(DATA_DIR, HISTORIAL, f"prestamos-{mes}.jsonl")
+
+
+@instrumentar("persistencia.archivar_registros")
+def archivar_registros(registros) -> int:
+    """Añade préstamos devueltos (dicts de Prestamo.to_dict) al segmento de su mes de
+    devolución. Devuelve cuántos se archivaron."""
+    por_mes = {}
+    for d in registros:
+        por_mes.setdefault(d["fecha_devolucion"][:7], []).append(d)
+    if not por_mes:
+        return 0
+    tamano = 0
+    with bloquear(HISTORIAL):
+        os.makedirs(os.path.join(DATA_DIR, HISTORIAL), exist_ok=True)
+        for mes, lista in sorted(por_mes.items()):
+            texto = "".join(json.dumps(d, ensure_ascii=False) + "\n" for d in lista)
+            with open(_ruta_segmento(mes), 'a', encoding='utf-8') as f:
+                f.write(texto)
+            tamano += len(texto)
+    if metricas.esta_habilitado():
+        metricas.registrar_bytes("persistencia.archivar_registros", tamano)
+    return sum(len(lista) for lista in por_mes.values())
+
+
+def archivar_devueltos(prestamos: list) -> int:
+    """Saca de `prestamos` (en el sitio) los préstamos ya devueltos y los añade al historial.
+    Devuelve cuántos se movieron; si alguno, hay que guardar después prestamos.json."""
+    devueltos = [p for p in prestamos if p.fecha_devolucion is not None]
+    if devueltos:
+        # primero el historial: si algo falla antes de guardar prestamos.json, el préstamo
+        # puede quedar repetido en el historial, pero no se pierde
+        archivar_registros(p.to_dict() for p in devueltos)
+        prestamos[:] = [p for p in prestamos if p.fecha_devolucion is None]
+    return len(devueltos)
+
+
+def meses_historial() -> list:
+    """Meses ("AAAA-MM") que tienen segmento de historial, en orden."""
+    carpeta = os.path.join(DATA_DIR, HISTORIAL)
+    if not os.path.isdir(carpeta):
+        return []
+    return sorted(n[len("prestamos-"):-len(".jsonl")] for n in os.listdir(carpeta)
+                  if n.startswith("prestamos-") and n.endswith(".jsonl"))
+
+
+def iterar_historial(desde: str = None, hasta: str = None):
+    """Genera los préstamos archivados (dicts) de los meses entre `desde` y `hasta`
+    ("AAAA-MM", ambos incluidos; None = sin límite). Solo abre esos segmentos y los lee
+    línea a línea; una última línea a medio escribir por otro proceso se ignora."""
+    for mes in meses_historial():
+        if (desde and mes < desde) or (hasta and mes > hasta):
+            continue
+        with open(_ruta_segmento(mes), 'r', encoding='utf-8') as f:
+            for linea in f:
+                if linea.endswith("\n"):
+                    yield json.loads(linea)
+
+
+def iterar_prestamos(activos: bool = False):
+    """Todos los préstamos (dicts) en streaming: el historial y después los activos de
+    prestamos.json. Con `activos=True`, solo estos últimos."""
+    if not activos:
+        yield from iterar_historial()
+    yield from iterar_registros("prestamos.json")
+
+
+@instrumentar("persistencia.cargar_solicitudes")
 def cargar_solicitudes() -> list:
     """Carga solicitudes de préstamo (cola) desde JSON y devuelve lista de dicts/objetos.
     Devuelve lista vacía si no existe."""
-    ruta = os.path.join(DATA_DIR, "solicitudes.json")
-    if os.path.exists(ruta):
-        with open(ruta, 'r', encoding='utf-8') as f:
-            datos = json.load(f)
+    datos = _leer_lista("solicitudes.json")
+    if datos is not None:
         # datos es una lista de dicts; caller puede convertir a objetos
         return datos
     return []
 
 
+@instrumentar("persistencia.guardar_grafo")
 def guardar_grafo(nombre_archivo: str, grafo_dict: dict):
-    """Guarda la estructura de adyacencia del grafo en JSON."""
-    if not os.path.exists(DATA_DIR):
-        os.makedirs(DATA_DIR)
-    ruta = os.path.join(DATA_DIR, nombre_archivo)
-    with open(ruta, 'w', encoding='utf-8') as f:
-        json.dump(grafo_dict, f, indent=2, ensure_ascii=False)
+    """Guarda la estructura de adyacencia del grafo en JSON.
+    El grafo se deriva del catálogo, así que no se fusiona: gana la última escritura."""
+    with bloquear(nombre_archivo):
+        sangria = None if JSON_COMPACTO else 2
+        tamano = _escribir_atomico(nombre_archivo, lambda f: json.dump(grafo_dict, f, indent=sangria, ensure_ascii=False))
+        _escribir_version(nombre_archivo, version_actual(nombre_archivo) + 1)
+    if metricas.esta_habilitado():
+        metricas.registrar_bytes("persistencia.guardar_grafo", tamano)
 
 
+@instrumentar("persistencia.cargar_grafo")
 def cargar_grafo(nombre_archivo: str):
     """Carga un grafo desde JSON y devuelve el diccionario de adyacencia o None si no existe."""
-    ruta = os.path.join(DATA_DIR, nombre_archivo)
-    if os.path.exists(ruta):
-        with open(ruta, 'r', encoding='utf-8') as f:
-            datos = json.load(f)
+    ruta = _ruta_datos(nombre_archivo)
+    if ruta is not None:
+        with bloquear(nombre_archivo, compartido=True):
+            with _abrir(ruta) as f:
+                datos = json.load(f)
         return datos
-    return None
\ No newline at end of file
+    return None
+
+# ---------------------------------------------------------
+#   CATÁLOGO BINARIO (MMAP)
+# ---------------------------------------------------------
+# Copia de libros.json en registros fijos (ver src/catalogo_binario.py) para consultar
+# un libro sin cargar el catálogo. Como grafo.json, se deriva de libros.json: guarda la
+# versión de libros.json con la que se generó para saber si está al día.
+
+CATALOGO_BINARIO = "catalogo.bin"
+
+
+@instrumentar("persistencia.guardar_catalogo_binario")
+def guardar_catalogo_binario(libros, nombre_archivo: str = CATALOGO_BINARIO) -> int:
+    """Escribe el catálogo binario de `libros` (lista o Biblioteca). Devuelve los bytes."""
+    libros = getattr(libros, "libros", libros)
+    if not os.path.exists(DATA_DIR):
+        os.makedirs(DATA_DIR)
+    with bloquear(nombre_archivo):
+        tamano = catalogo_binario.escribir(_ruta(nombre_archivo), libros, version_actual("libros.json"))
+    if metricas.esta_habilitado():
+        metricas.registrar_bytes("persistencia.guardar_catalogo_binario", tamano)
+    return tamano
+
+
+def abrir_catalogo_binario(nombre_archivo: str = CATALOGO_BINARIO, escritura: bool = False):
+    """CatalogoBinario abierto con mmap, o None si no existe. Cerrarlo al terminar (o usar `with`).
+    Con escritura=True permite marcar_disponible en el sitio."""
+    ruta = _ruta(nombre_archivo)
+    if not os.path.exists(ruta):
+        return None
+    return catalogo_binario.CatalogoBinario(ruta, escritura)
+
+
+def catalogo_binario_al_dia(catalogo) -> bool:
+    """True si libros.json no ha cambiado desde que se generó el catálogo binario."""
+    return catalogo.version_origen == version_actual("libros.json")
+
+
+# ---------------------------------------------------------
+#   CATÁLOGO FRAGMENTADO
+# ---------------------------------------------------------
+# Alternativa a libros.json para catálogos grandes: data/libros/<fragmento>.json, un
+# archivo por género o por inicial del título, más data/libros/_manifiesto.json con el
+# criterio y, por fragmento, cuántos libros tiene y qué géneros contiene. Cada fragmento
+# es una colección más (candado, versión, fusión entre procesos y compresión propios),
+# así que guardar un cambio solo reescribe su fragmento y el manifiesto.
+# `fragmentos.BibliotecaFragmentada` los carga bajo demanda.
+
+FRAGMENTOS = "libros"  # subcarpeta de DATA_DIR
+MANIFIESTO = FRAGMENTOS + "/_manifiesto.json"  # "_": ningún fragmento puede llamarse así
+CRITERIOS = ("genero", "inicial")
+
+
+def clave_fragmento(libro, criterio: str) -> str:
+    """Fragmento al que pertenece un libro: su género o la inicial de su título,
+    normalizados a un nombre de archivo seguro ("otros" si no hay)."""
+    if criterio == "genero":
+        clave = libro.clave_genero
+    elif criterio == "inicial":
+        clave = libro.clave_titulo[:1]
+    else:
+        raise ValueError(f"Criterio de fragmentación no soportado: {criterio!r}")
+    return _nombre_seguro(clave)
+
+
+def fragmento_de_titulo(titulo: str) -> str:
+    """Fragmento en el que estaría un título al fragmentar por inicial."""
+    return _nombre_seguro(normalizar(titulo)[:1])
+
+
+def _nombre_seguro(clave: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", clave).strip("-") or "otros"
+
+
+def _nombre_fragmento(clave: str) -> str:
+    return f"{FRAGMENTOS}/{clave}.json"
+
+
+def entrada_manifiesto(libros: list) -> dict:
+    return {"libros": len(libros), "generos": sorted({l.clave_genero for l in libros})}
+
+
+def leer_manifiesto():
+    """Manifiesto del catálogo fragmentado ({"criterio", "fragmentos"}) o None si no existe."""
+    ruta = _ruta_datos(MANIFIESTO)
+    if ruta is None:
+        return None
+    with bloquear(MANIFIESTO, compartido=True):
+        with _abrir(ruta) as f:
+            return json.load(f)
+
+
+def actualizar_manifiesto(criterio: str, entradas: dict, reemplazar: bool = False) -> dict:
+    """Aplica `entradas` ({fragmento: entrada}, None para quitarlo) al manifiesto en disco.
+    Se relee bajo el candado: otro proceso puede haber actualizado otros fragmentos."""
+    with bloquear(MANIFIESTO):
+        ruta = _ruta_datos(MANIFIESTO)
+        manifiesto = None
+        if ruta is not None and not reemplazar:
+            with _abrir(ruta) as f:
+                manifiesto = json.load(f)
+        if manifiesto is None or manifiesto.get("criterio") != criterio:
+            manifiesto = {"criterio": criterio, "fragmentos": {}}
+        for clave, entrada in entradas.items():
+            if entrada is None:
+                manifiesto["fragmentos"].pop(clave, None)
+            else:
+                manifiesto["fragmentos"][clave] = entrada
+        _escribir_atomico(MANIFIESTO, lambda f: json.dump(manifiesto, f, indent=2, ensure_ascii=False))
+        _escribir_version(MANIFIESTO, version_actual(MANIFIESTO) + 1)
+    return manifiesto
+
+
+@instrumentar("persistencia.cargar_fragmento")
+def cargar_fragmento(clave: str) -> list:
+    """Libros de un fragmento ([] si no existe)."""
+    datos = _leer_lista(_nombre_fragmento(clave))
+    return [Libro.from_dict(d) for d in datos] if datos is not None else []
+
+
+def guardar_fragmento(clave: str, libros: list) -> bool:
+    """Reescribe un fragmento (con fusión si otro proceso lo cambió, como guardar_datos)."""
+    return guardar_datos(_nombre_fragmento(clave), libros)
+
+
+@instrumentar("persistencia.fragmentar_libros")
+def fragmentar_libros(libros, criterio: str = "genero") -> dict:
+    """Reparte `libros` (lista o Biblioteca) en fragmentos según `criterio` y escribe el
+    manifiesto. Los fragmentos de un reparto anterior que ya no existen se borran."""
+    libros = getattr(libros, "libros", libros)
+    grupos = {}
+    for l in libros:
+        grupos.setdefault(clave_fragmento(l, criterio), []).append(l)
+    anterior = leer_manifiesto() or {"fragmentos": {}}
+    for clave, grupo in grupos.items():
+        guardar_fragmento(clave, grupo)
+    for clave in set(anterior["fragmentos"]) - set(grupos):
+        ruta = _ruta_datos(_nombre_fragmento(clave))
+        if ruta is not None:
+            os.remove(ruta)
+    return actualizar_manifiesto(criterio, {c: entrada_manifiesto(g) for c, g in grupos.items()},
+                                 reemplazar=True)
@@ -0,0 +1,223 @@
+"""Recomendaciones ordenadas por similitud de atributos.
+
+Cada libro se codifica como un vector disperso de rasgos one-hot: autor,
+palabras del género y década de publicación, con pesos distintos por tipo
+(`PESOS`). La similitud es el coseno entre vectores. En lugar de comparar el
+libro consultado con todo el catálogo, se guarda para cada rasgo la lista de
+posiciones de los libros que lo tienen (índice invertido); una consulta solo
+suma sobre las listas de sus pocos rasgos y después escala por la norma de cada
+libro. Con NumPy disponible la acumulación y la selección del top-k se hacen
+sobre arrays; si no, se usa un dict y `heapq.nlargest`.
+"""
+
+import heapq
+import math
+import re
+
+from .clases import Libro
+from .metricas import instrumentar
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional
+    np = None
+
+PESOS = {"autor": 3.0, "genero": 1.0, "decada": 0.5}
+K = 5
+
+_SEPARADORES = re.compile(r"[^\w]+")
+
+
+def rasgos_libro(libro) -> dict:
+    """Rasgos del libro con su peso: {"autor:...": 3.0, "genero:fantasía": 1.0, "decada:1950": 0.5}."""
+    rasgos = {}
+    if libro.clave_autor:
+        rasgos["autor:" + libro.clave_autor] = PESOS["autor"]
+    for palabra in _SEPARADORES.split(libro.clave_genero):
+        if len(palabra) > 2:  # descarta "de", "y"...
+            rasgos["genero:" + palabra] = PESOS["genero"]
+    if isinstance(libro.year, int):
+        rasgos[f"decada:{libro.year // 10 * 10}"] = PESOS["decada"]
+    return rasgos
+
+
+class RecomendadorSimilitud:
+    def __init__(self, libros: list = None, usar_numpy: bool = None):
+        self.usar_numpy = np is not None if usar_numpy is None else bool(usar_numpy and np is not None)
+        self.libros = []
+        self._posiciones = {}   # id(libro) -> posición
+        self._listas = {}       # rasgo -> posiciones de los libros que lo tienen
+        self._inv_norma = []    # 1 / norma del vector de cada libro
+        self._firma = None
+        if libros is not None:
+            self.construir(libros)
+
+    @staticmethod
+    def _firma_de(libros) -> tuple:
+        # como Biblioteca._cacheado: versión del catálogo más cambios in-place de atributos
+        lista = getattr(libros, "libros", libros)
+        return (getattr(libros, "version", None), id(lista), len(lista), Libro.cambios_atributos)
+
+    @instrumentar("recomendador.construir")
+    def construir(self, libros):
+        """`libros`: una Biblioteca o una lista de libros."""
+        firma = self._firma_de(libros)
+        self.libros = list(getattr(libros, "libros", libros))
+        self._posiciones = {id(l): i for i, l in enumerate(self.libros)}
+        listas = {}
+        inv_norma = []
+        for i, libro in enumerate(self.libros):
+            rasgos = rasgos_libro(libro)
+            for rasgo in rasgos:
+                listas.setdefault(rasgo, []).append(i)
+            norma = math.sqrt(sum(w * w for w in rasgos.values()))
+            inv_norma.append(1.0 / norma if norma else 0.0)
+        if self.usar_numpy:
+            self._listas = {r: np.array(p, dtype=np.int64) for r, p in listas.items()}
+            self._inv_norma = np.array(inv_norma, dtype=np.float64)
+        else:
+            self._listas = listas
+            self._inv_norma = inv_norma
+        self._firma = firma
+
+    def actualizar(self, libros):
+        """Reconstruye solo si el catálogo cambió desde la última construcción: nueva versión
+        de la Biblioteca (altas, bajas, cambios), otra lista, distinto tamaño o un cambio
+        in-place de título/autor/género/año. Con una lista suelta en lugar de la Biblioteca
+        no se detecta una baja seguida de un alta."""
+        if self._firma != self._firma_de(libros):
+            self.construir(libros)
+
+    def invalidar(self):
+        """Fuerza la reconstrucción en el próximo `actualizar`."""
+        self._firma = None
+
+    @instrumentar("recomendador.similares")
+    def similares(self, libro, k: int = K) -> list:
+        """Devuelve hasta k pares (Libro, puntuación) ordenados de más a menos parecido,
+        sin incluir el propio libro ni libros sin ningún rasgo en común."""
+        rasgos = rasgos_libro(libro)
+        norma = math.sqrt(sum(w * w for w in rasgos.values()))
+        if not norma or not self.libros or k <= 0:
+            return []
+        propio = self._posiciones.get(id(libro))
+        if self.usar_numpy:
+            return self._similares_numpy(rasgos, 1.0 / norma, propio, k)
+
+        productos = {}
+        for rasgo, peso in rasgos.items():
+            w2 = peso * peso
+            for i in self._listas.get(rasgo, ()):
+                productos[i] = productos.get(i, 0.0) + w2
+        productos.pop(propio, None)
+        inv = self._inv_norma
+        # desempate por posición (el catálogo suele estar ordenado por título)
+        mejores = heapq.nlargest(k, productos.items(), key=lambda par: (par[1] * inv[par[0]], -par[0]))
+        return [(self.libros[i], p * inv[i] / norma) for i, p in mejores]
+
+    def _similares_numpy(self, rasgos: dict, inv_q: float, propio, k: int) -> list:
+        puntuaciones = np.zeros(len(self.libros), dtype=np.float64)
+        for rasgo, peso in rasgos.items():
+            posiciones = self._listas.get(rasgo)
+            if posiciones is not None:
+                puntuaciones[posiciones] += peso * peso  # sin repetidos dentro de una lista
+        puntuaciones *= self._inv_norma
+        if propio is not None:
+            puntuaciones[propio] = 0.0
+        candidatos = np.flatnonzero(puntuaciones > 0)
+        if len(candidatos) > k:
+            # quedarse con los >= k-ésimo valor (incluye empates) antes de ordenar
+            umbral = np.partition(puntuaciones[candidatos], len(candidatos) - k)[len(candidatos) - k]
+            candidatos = candidatos[puntuaciones[candidatos] >= umbral]
+        orden = np.lexsort((candidatos, -puntuaciones[candidatos]))[:k]
+        return [(self.libros[i], float(puntuaciones[i]) * inv_q) for i in candidatos[orden]]
+
+
+# -----------------------------------------------------------
+#   "QUIENES LEYERON X TAMBIÉN LEYERON" (HISTORIAL DE PRÉSTAMOS)
+# -----------------------------------------------------------
+
+MAX_VECINOS = 50
+
+
+class CoPrestamos:
+    """Matriz dispersa libro×libro: cuántos usuarios distintos tomaron prestados ambos libros.
+    Se actualiza préstamo a préstamo con `registrar`; las consultas leen una lista de
+    vecinos ya ordenada (hasta MAX_VECINOS por libro) que solo se recalcula para los
+    libros afectados por préstamos nuevos.
+
+    Los libros se identifican por id: renombrar un libro no parte su historial y dos
+    libros con el mismo título no se mezclan. Los títulos solo se usan al mostrar."""
+
+    def __init__(self, prestamos: list = None, max_vecinos: int = MAX_VECINOS, historial=(), libros=None):
+        self.max_vecinos = max_vecinos
+        self._por_usuario = {}   # id usuario -> ids de los libros que ha tomado prestados
+        self._conteos = {}       # id libro -> {otro id: usuarios en común}
+        self._vecinos = {}       # id libro -> [(otro id, usuarios en común)] ordenada
+        self._titulos = {}       # id libro -> Libro (título al día) o título del registro
+        if prestamos is not None:
+            self.construir(prestamos, historial, libros)
+
+    def titulo(self, id_libro: str) -> str:
+        nombre = self._titulos.get(id_libro, id_libro)
+        return getattr(nombre, "titulo", nombre)
+
+    def _agregar(self, id_usuario: str, id_libro: str):
+        leidos = self._por_usuario.setdefault(id_usuario, set())
+        if id_libro in leidos:
+            return  # repetir un libro no cuenta dos veces
+        fila = self._conteos.setdefault(id_libro, {})
+        for otro in leidos:
+            fila[otro] = fila.get(otro, 0) + 1
+            otra_fila = self._conteos[otro]
+            otra_fila[id_libro] = otra_fila.get(id_libro, 0) + 1
+            self._vecinos.pop(otro, None)
+        self._vecinos.pop(id_libro, None)
+        leidos.add(id_libro)
+
+    def registrar(self, prestamo):
+        """Añade un préstamo nuevo (p. ej. tras prestar_libro o ColaSolicitudes.procesar)."""
+        self._titulos[prestamo.libro.id] = prestamo.libro
+        self._agregar(prestamo.usuario.id, prestamo.libro.id)
+
+    @instrumentar("coprestamos.construir")
+    def construir(self, prestamos: list, historial=(), libros=None):
+        """`historial`: dicts de préstamos archivados (persistencia.iterar_historial).
+        `libros`: el catálogo, para mostrar los títulos actuales y resolver registros
+        antiguos guardados sin id."""
+        self.construir_desde_registros(historial, libros)
+        for p in prestamos:
+            self.registrar(p)
+
+    def construir_desde_registros(self, registros, libros=None):
+        """Igual que construir pero con dicts de préstamos (p. ej. persistencia.iterar_prestamos),
+        sin crear objetos Prestamo."""
+        self._por_usuario, self._conteos, self._vecinos = {}, {}, {}
+        self._titulos = {l.id: l for l in (libros or [])}
+        por_titulo = None
+        for d in registros:
+            usuario, libro = d.get("usuario") or {}, d.get("libro") or {}
+            id_libro = libro.get("id")
+            if not id_libro and libro.get("titulo"):
+                # registro anterior a los ids: se resuelve por título en el catálogo
+                if por_titulo is None:
+                    por_titulo = {}
+                    for l in (libros or []):
+                        por_titulo.setdefault(l.titulo, l.id)
+                id_libro = por_titulo.get(libro["titulo"], libro["titulo"])
+            if usuario.get("id") is not None and id_libro:
+                self._titulos.setdefault(id_libro, libro.get("titulo"))
+                self._agregar(usuario["id"], id_libro)
+
+    @instrumentar("coprestamos.tambien_prestados")
+    def tambien_prestados(self, libro, k: int = K) -> list:
+        """Hasta k pares (título, usuarios en común), de más a menos frecuente.
+        `libro`: el Libro o su id."""
+        id_libro = getattr(libro, "id", libro)
+        vecinos = self._vecinos.get(id_libro)
+        if vecinos is None:
+            fila = self._conteos.get(id_libro, {})
+            vecinos = heapq.nsmallest(self.max_vecinos, fila.items(),
+                                      key=lambda par: (-par[1], self.titulo(par[0]), par[0]))
+            self._vecinos[id_libro] = vecinos
+        return [(self.titulo(i), n) for i, n in vecinos[:k]]
@@ -0,0 +1,449 @@
+"""Servidor HTTP/JSON local (solo biblioteca estándar) sobre el núcleo de la biblioteca.
+
+Un único bucle asyncio atiende todas las conexiones y comparte una sola
+Biblioteca, GrafoLibros y ColaSolicitudes en memoria; como las operaciones se
+ejecutan en el hilo del bucle no hacen falta candados. La persistencia no bloquea
+las peticiones: cada cambio marca la colección como pendiente y, pasado
+`INTERVALO_GUARDADO`, se toma una instantánea (dicts) en el bucle y se escribe en
+un hilo aparte con `persistencia.guardar_registros`. Varias peticiones seguidas se
+agrupan en una sola escritura. Los préstamos devueltos salen de prestamos.json y se
+añaden al historial (`persistencia.archivar_registros`) en esa misma escritura.
+Si al guardar hubo que fusionar cambios de otro proceso, tras la escritura se recargan
+esas colecciones (las que no tengan cambios propios aún sin escribir).
+
+Rutas:
+    GET  /salud
+    GET  /libros?titulo=&autor=&genero=&year=&year_desde=&year_hasta=&disponibles=1&desde=0&limite=50
+    GET  /recomendaciones?titulo=...&limite=20         (o ?id_libro=...)
+    GET  /tambien-prestados?titulo=...&limite=5        (o ?id_libro=...)
+    GET  /estadisticas?limite=10
+    GET  /vencimientos?dias=7&limite=50
+    POST /prestamos              {"id_usuario": ..., "titulo": ...}    (o "id_libro")
+    POST /devoluciones           {"titulo": ...}                       (o "id_libro"; "id_usuario" opcional)
+    GET  /solicitudes
+    POST /solicitudes/procesar
+
+Con `id_libro` la petición se refiere a ese ejemplar. Con `titulo` (exacto, sin
+tildes ni mayúsculas) se elige entre todos los libros con ese título: para prestar,
+uno disponible (si no hay ninguno, la solicitud espera al primero que quede libre);
+para devolver, uno prestado (del usuario, si se indica).
+
+Uso:
+    python -m src.servidor --puerto 8080
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from urllib.parse import urlsplit, parse_qs
+
+from .clases import Biblioteca, GrafoLibros, ColaSolicitudes, Prestamo, SolicitudPrestamo
+from . import persistencia
+from . import metricas
+from .exportacion import filtrar_libros
+from .recomendador import CoPrestamos
+from .estadisticas import EstadisticasCirculacion, TOP
+from .vencimientos import IndiceVencimientos, DIAS_AVISO
+from .indices import normalizar
+
+HOST = "127.0.0.1"
+PUERTO = 8080
+INTERVALO_GUARDADO = 0.2  # segundos
+LIMITE_RESULTADOS = 50
+MAX_RESULTADOS = 1000
+MAX_CUERPO = 64 * 1024
+
+RAZONES = {200: "OK", 201: "Created", 202: "Accepted", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class ErrorPeticion(Exception):
+    def __init__(self, estado: int, mensaje: str):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+def _entero(valor, defecto: int, nombre: str) -> int:
+    if valor in (None, ""):
+        return defecto
+    try:
+        return int(valor)
+    except ValueError:
+        raise ErrorPeticion(400, f"'{nombre}' debe ser un entero")
+
+
+def _campo(datos: dict, nombre: str) -> str:
+    valor = datos.get(nombre)
+    if not isinstance(valor, str) or not valor.strip():
+        raise ErrorPeticion(400, f"falta el campo '{nombre}'")
+    return valor.strip()
+
+
+class ServidorBiblioteca:
+    def __init__(self, host: str = HOST, puerto: int = PUERTO, intervalo_guardado: float = INTERVALO_GUARDADO):
+        self.host = host
+        self.puerto = puerto
+        self.intervalo_guardado = intervalo_guardado
+
+        self.biblioteca = Biblioteca()
+        self.biblioteca.libros = persistencia.cargar_libros()
+        self.usuarios = persistencia.cargar_usuarios()
+        self._por_archivar = []
+        self._cargar_prestamos()
+        self.cola = ColaSolicitudes.from_dict_list(persistencia.cargar_solicitudes())
+        self.grafo = GrafoLibros()
+        self.grafo.build_from_biblioteca(self.biblioteca)
+        self.coprestamos = CoPrestamos(self.prestamos, historial=self._historial(), libros=self.biblioteca.libros)
+        self.estadisticas = EstadisticasCirculacion(self.biblioteca.libros, self.prestamos, self._historial())
+        self.vencimientos = IndiceVencimientos(self.prestamos)
+
+        # índices para no recorrer listas en cada petición: título normalizado -> ejemplares
+        # (puede haber varios con el mismo título) y préstamos activos por id de libro
+        self._indexar_libros()
+        self._usuarios = {u.id: u for u in self.usuarios}
+        self._activos = {p.libro.id: p for p in self.prestamos if p.fecha_devolucion is None}
+
+        self.rutas = {
+            ("GET", "/salud"): self.salud,
+            ("GET", "/libros"): self.buscar,
+            ("GET", "/recomendaciones"): self.recomendaciones,
+            ("GET", "/tambien-prestados"): self.tambien_prestados,
+            ("GET", "/estadisticas"): self.ver_estadisticas,
+            ("GET", "/vencimientos"): self.ver_vencimientos,
+            ("POST", "/prestamos"): self.prestar,
+            ("POST", "/devoluciones"): self.devolver,
+            ("GET", "/solicitudes"): self.solicitudes,
+            ("POST", "/solicitudes/procesar"): self.procesar_cola,
+        }
+        self.peticiones = 0
+        self._pendientes = set()
+        self._tarea_guardado = None
+        self._ejecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="persistencia")
+        self._servidor = None
+
+    def _historial(self):
+        return chain(persistencia.iterar_historial(), self._por_archivar)
+
+    def _indexar_libros(self):
+        self._libros = {}
+        for l in self.biblioteca.libros:
+            self._libros.setdefault(l.clave_titulo, []).append(l)
+
+    def _cargar_prestamos(self) -> int:
+        """Carga los préstamos activos; los devueltos que sigan en prestamos.json pasan a
+        `_por_archivar`. Devuelve cuántos de estos había."""
+        prestamos = persistencia.cargar_prestamos(self.biblioteca.libros, self.usuarios)
+        devueltos = [p.to_dict() for p in prestamos if p.fecha_devolucion is not None]
+        self._por_archivar.extend(devueltos)
+        self.prestamos = [p for p in prestamos if p.fecha_devolucion is None]
+        for p in self.prestamos:
+            p.libro.disponible = False  # Prestamo.from_dict los deja como disponibles
+        return len(devueltos)
+
+    def _recargar(self, cambiadas: set):
+        """Recarga desde data/ las colecciones indicadas y rehace lo que depende de ellas."""
+        if "libros.json" in cambiadas:
+            self.biblioteca.libros = persistencia.cargar_libros()
+            self.grafo.build_from_biblioteca(self.biblioteca)
+            self._indexar_libros()
+        if "usuarios.json" in cambiadas:
+            self.usuarios = persistencia.cargar_usuarios()
+            self._usuarios = {u.id: u for u in self.usuarios}
+        if cambiadas & {"libros.json", "usuarios.json", "prestamos.json"}:
+            # los préstamos enlazan objetos Libro/Usuario: reconstruirlos si cambió cualquiera
+            devueltos = self._cargar_prestamos()
+            self._activos = {p.libro.id: p for p in self.prestamos}
+            self.coprestamos.construir(self.prestamos, self._historial(), self.biblioteca.libros)
+            self.estadisticas.construir(self.biblioteca.libros, self.prestamos, self._historial())
+            self.vencimientos.construir(self.prestamos)
+            if devueltos:
+                self._marcar(persistencia.HISTORIAL, "prestamos.json")
+        if "solicitudes.json" in cambiadas:
+            self.cola.solicitudes = ColaSolicitudes.from_dict_list(persistencia.cargar_solicitudes()).solicitudes
+
+    # ---------- Operaciones ----------
+    def _libro(self, datos: dict, preferir=None):
+        """Libro por `id_libro` o, si no, por `titulo`. Entre varios ejemplares con el mismo
+        título se prefiere el primero que cumpla `preferir(libro)`."""
+        id_libro = datos.get("id_libro")
+        if id_libro is not None:
+            libro = self.biblioteca.libro_por_id(_campo(datos, "id_libro"))
+        else:
+            ejemplares = self._libros.get(normalizar(_campo(datos, "titulo")), [])
+            libro = next((l for l in ejemplares if preferir is not None and preferir(l)),
+                         ejemplares[0] if ejemplares else None)
+        if libro is None:
+            raise ErrorPeticion(404, "libro no encontrado")
+        return libro
+
+    def salud(self, consulta: dict, datos: dict):
+        return 200, {"libros": len(self.biblioteca.libros), "usuarios": len(self.usuarios),
+                     "prestamos_activos": len(self._activos), "solicitudes": len(self.cola.solicitudes)}
+
+    def buscar(self, consulta: dict, datos: dict):
+        years = {campo: _entero(consulta[campo], None, campo) if consulta.get(campo) else None
+                 for campo in ("year", "year_desde", "year_hasta")}
+        libros = filtrar_libros(self.biblioteca, titulo=consulta.get("titulo"), autor=consulta.get("autor"),
+                                genero=consulta.get("genero"),
+                                disponibles=consulta.get("disponibles") in ("1", "true", "si", "sí"), **years)
+        desde = max(0, _entero(consulta.get("desde"), 0, "desde"))
+        limite = min(MAX_RESULTADOS, max(0, _entero(consulta.get("limite"), LIMITE_RESULTADOS, "limite")))
+        return 200, {"total": len(libros), "libros": [l.to_dict() for l in libros[desde:desde + limite]]}
+
+    def recomendaciones(self, consulta: dict, datos: dict):
+        libro = self._libro(consulta)
+        limite = _entero(consulta.get("limite"), 20, "limite")
+        # mismo recorrido que grafo.recomendaciones, pero sin recorrer toda la componente
+        return 200, {"titulo": libro.titulo, "recomendaciones": self.grafo.dfs(libro.id, limite=limite)}
+
+    def tambien_prestados(self, consulta: dict, datos: dict):
+        libro = self._libro(consulta)
+        limite = _entero(consulta.get("limite"), 5, "limite")
+        pares = self.coprestamos.tambien_prestados(libro, limite)
+        return 200, {"titulo": libro.titulo, "tambien_prestados": [{"titulo": t, "lectores": n} for t, n in pares]}
+
+    def ver_estadisticas(self, consulta: dict, datos: dict):
+        limite = min(MAX_RESULTADOS, max(0, _entero(consulta.get("limite"), TOP, "limite")))
+        e = self.estadisticas
+        return 200, {"total_prestamos": e.total_prestamos, "disponibilidad": e.disponibilidad(),
+                     "mas_prestados": [{"titulo": t, "prestamos": n} for t, n in e.mas_prestados(limite)],
+                     "por_genero": [{"genero": g, "prestamos": n} for g, n in e.prestamos_por_genero()],
+                     "activos_por_tipo": e.prestamos_activos_por_tipo()}
+
+    def ver_vencimientos(self, consulta: dict, datos: dict):
+        dias = max(0, _entero(consulta.get("dias"), DIAS_AVISO, "dias"))
+        limite = min(MAX_RESULTADOS, max(0, _entero(consulta.get("limite"), LIMITE_RESULTADOS, "limite")))
+        vencidos, proximos = self.vencimientos.vencidos(), self.vencimientos.proximos(dias)
+        return 200, {"dias": dias, "total_vencidos": len(vencidos), "total_proximos": len(proximos),
+                     "vencidos": [p.to_dict() for p in vencidos[:limite]],
+                     "proximos": [p.to_dict() for p in proximos[:limite]]}
+
+    def prestar(self, consulta: dict, datos: dict):
+        usuario = self._usuarios.get(_campo(datos, "id_usuario"))
+        if usuario is None:
+            raise ErrorPeticion(404, "usuario no encontrado")
+        libro = self._libro(datos, preferir=lambda l: l.disponible)
+
+        if libro.disponible:
+            libro.disponible = False
+            prestamo = Prestamo(usuario, libro)
+            self.prestamos.append(prestamo)
+            self._activos[libro.id] = prestamo
+            self.coprestamos.registrar(prestamo)
+            self.estadisticas.registrar_prestamo(prestamo)
+            self.vencimientos.agregar(prestamo)
+            self._marcar("prestamos.json", "libros.json")
+            return 201, {"estado": "prestado", "prestamo": prestamo.to_dict()}
+
+        # pedido por título: la solicitud la atiende el primer ejemplar que quede libre
+        s = SolicitudPrestamo(usuario.id, libro.titulo, id_libro=libro.id if "id_libro" in datos else None)
+        s.tipo_usuario = usuario.tipo
+        self.cola.encolar(s)
+        self._marcar("solicitudes.json")
+        return 202, {"estado": "encolado", "posicion": len(self.cola.solicitudes)}
+
+    def devolver(self, consulta: dict, datos: dict):
+        id_usuario = datos.get("id_usuario")
+
+        def prestado(libro):
+            p = self._activos.get(libro.id)
+            return p is not None and (id_usuario is None or p.usuario.id == id_usuario)
+        libro = self._libro(datos, preferir=prestado)
+        if not prestado(libro):
+            raise ErrorPeticion(404, "no hay un préstamo activo para ese libro")
+        prestamo = self._activos.pop(libro.id)
+        prestamo.devolver()
+        self.estadisticas.registrar_devolucion(prestamo)
+        self.prestamos.remove(prestamo)
+        self._por_archivar.append(prestamo.to_dict())
+        self._marcar(persistencia.HISTORIAL, "prestamos.json", "libros.json")
+        procesados = self._procesar()
+        return 200, {"devuelto": prestamo.to_dict(), "procesados": [p.to_dict() for p in procesados]}
+
+    def solicitudes(self, consulta: dict, datos: dict):
+        return 200, {"solicitudes": self.cola.to_dict_list()}
+
+    def procesar_cola(self, consulta: dict, datos: dict):
+        return 200, {"procesados": [p.to_dict() for p in self._procesar()]}
+
+    def _procesar(self) -> list:
+        procesados = self.cola.procesar(self.usuarios, self.biblioteca, self.prestamos)
+        for p in procesados:
+            self._activos[p.libro.id] = p
+            self.coprestamos.registrar(p)
+            self.estadisticas.registrar_prestamo(p)
+            self.vencimientos.agregar(p)
+        if procesados:
+            self._marcar("prestamos.json", "libros.json", "solicitudes.json")
+        return procesados
+
+    # ---------- Persistencia en segundo plano ----------
+    def _marcar(self, *nombres: str):
+        """Marca colecciones como modificadas y programa una escritura agrupada."""
+        self._pendientes.update(nombres)
+        if self._tarea_guardado is None or self._tarea_guardado.done():
+            self._tarea_guardado = asyncio.get_running_loop().create_task(self._guardar_tras_intervalo())
+
+    def _instantanea(self, nombre: str) -> list:
+        # se ejecuta en el hilo del bucle: el hilo de escritura nunca toca los objetos vivos
+        if nombre == persistencia.HISTORIAL:
+            registros, self._por_archivar = self._por_archivar, []
+            return registros
+        fuentes = {"libros.json": self.biblioteca.libros, "usuarios.json": self.usuarios,
+                   "prestamos.json": self.prestamos, "solicitudes.json": self.cola.to_list()}
+        return [d.to_dict() for d in fuentes[nombre]]
+
+    async def _guardar_tras_intervalo(self):
+        await asyncio.sleep(self.intervalo_guardado)
+        await self.guardar_pendientes()
+
+    async def guardar_pendientes(self):
+        """Escribe ahora las colecciones pendientes (en el hilo de persistencia)."""
+        if not self._pendientes:
+            return
+        nombres, self._pendientes = sorted(self._pendientes), set()
+        lotes = [(nombre, self._instantanea(nombre)) for nombre in nombres]
+
+        def escribir():
+            # "historial" va antes que "prestamos.json": un préstamo devuelto nunca queda fuera de ambos
+            for nombre, registros in lotes:
+                if nombre == persistencia.HISTORIAL:
+                    persistencia.archivar_registros(registros)
+                else:
+                    persistencia.guardar_registros(nombre, registros)
+
+        await asyncio.get_running_loop().run_in_executor(self._ejecutor, escribir)
+        # de vuelta en el bucle: recargar lo que se fusionó con cambios ajenos. Lo que se haya
+        # vuelto a modificar mientras tanto se recargará tras su propia escritura.
+        propias = [n for n in nombres if n != persistencia.HISTORIAL]
+        fusionadas = set(persistencia.colecciones_modificadas(propias)) - self._pendientes
+        if fusionadas:
+            self._recargar(fusionadas)
+
+    # ---------- HTTP ----------
+    def despachar(self, metodo: str, destino: str, cuerpo: bytes):
+        """Resuelve una petición y devuelve (estado, dict de respuesta)."""
+        partes = urlsplit(destino)
+        ruta = partes.path.rstrip("/") or "/"
+        manejador = self.rutas.get((metodo, ruta))
+        if manejador is None:
+            if any(r == ruta for _, r in self.rutas):
+                return 405, {"error": "método no permitido"}
+            return 404, {"error": "ruta no encontrada"}
+        consulta = {k: v[-1] for k, v in parse_qs(partes.query).items()}
+        try:
+            datos = json.loads(cuerpo) if cuerpo else {}
+        except ValueError:
+            return 400, {"error": "el cuerpo no es JSON válido"}
+        if not isinstance(datos, dict):
+            return 400, {"error": "el cuerpo debe ser un objeto JSON"}
+        inicio = time.perf_counter()
+        try:
+            return manejador(consulta, datos)
+        except ErrorPeticion as e:
+            return e.estado, {"error": str(e)}
+        finally:
+            if metricas.esta_habilitado():
+                metricas.registrar_tiempo(f"servidor.{metodo} {ruta}", time.perf_counter() - inicio)
+
+    async def _atender(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Atiende una conexión; mantiene keep-alive mientras el cliente no pida cerrarla."""
+        try:
+            while True:
+                try:
+                    linea = await reader.readline()
+                    if not linea:
+                        break
+                    metodo, destino, version = linea.decode("latin-1").split()
+                    cabeceras = {}
+                    while True:
+                        linea = await reader.readline()
+                        if linea in (b"\r\n", b"\n", b""):
+                            break
+                        clave, _, valor = linea.decode("latin-1").partition(":")
+                        cabeceras[clave.strip().lower()] = valor.strip()
+                except (asyncio.LimitOverrunError, ValueError):
+                    # línea de petición mal formada o línea más larga que el límite del StreamReader
+                    writer.write(_respuesta(400, {"error": "petición mal formada"}, True))
+                    break
+
+                cerrar = version == "HTTP/1.0" or cabeceras.get("connection", "").lower() == "close"
+                try:
+                    largo = int(cabeceras.get("content-length") or 0)
+                except ValueError:
+                    largo = -1
+                if largo < 0 or largo > MAX_CUERPO:
+                    writer.write(_respuesta(413 if largo > 0 else 400, {"error": "content-length inválido"}, True))
+                    break
+                cuerpo = await reader.readexactly(largo) if largo else b""
+
+                self.peticiones += 1
+                try:
+                    estado, datos = self.despachar(metodo.upper(), destino, cuerpo)
+                except Exception as e:
+                    estado, datos = 500, {"error": f"{type(e).__name__}: {e}"}
+                writer.write(_respuesta(estado, datos, cerrar))
+                await writer.drain()
+                if cerrar:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def iniciar(self) -> int:
+        """Empieza a escuchar y devuelve el puerto real (útil con puerto=0)."""
+        self._servidor = await asyncio.start_server(self._atender, self.host, self.puerto)
+        self.puerto = self._servidor.sockets[0].getsockname()[1]
+        if self._por_archivar:
+            # préstamos devueltos que seguían en prestamos.json (datos anteriores al historial)
+            self._marcar(persistencia.HISTORIAL, "prestamos.json")
+        return self.puerto
+
+    async def cerrar(self):
+        """Deja de aceptar conexiones y escribe lo pendiente antes de salir."""
+        if self._servidor is not None:
+            self._servidor.close()
+            await self._servidor.wait_closed()
+        if self._tarea_guardado is not None and not self._tarea_guardado.done():
+            self._tarea_guardado.cancel()
+        await self.guardar_pendientes()
+        self._ejecutor.shutdown(wait=True)
+
+    async def servir(self):
+        await self.iniciar()
+        print(f"Servidor de la biblioteca en http://{self.host}:{self.puerto}")
+        try:
+            await self._servidor.serve_forever()
+        finally:
+            await self.cerrar()
+
+
+def _respuesta(estado: int, datos: dict, cerrar: bool = False) -> bytes:
+    cuerpo = json.dumps(datos, ensure_ascii=False).encode("utf-8")
+    cabecera = (f"HTTP/1.1 {estado} {RAZONES.get(estado, '')}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(cuerpo)}\r\n"
+                f"Connection: {'close' if cerrar else 'keep-alive'}\r\n\r\n")
+    return cabecera.encode("latin-1") + cuerpo
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor HTTP/JSON local de la biblioteca.")
+    parser.add_argument("--host", default=HOST, help="dirección de escucha (por defecto solo localhost)")
+    parser.add_argument("--puerto", type=int, default=PUERTO)
+    parser.add_argument("--intervalo-guardado", type=float, default=INTERVALO_GUARDADO,
+                        help="segundos que se agrupan los cambios antes de escribirlos")
+    args = parser.parse_args(argv)
+    servidor = ServidorBiblioteca(args.host, args.puerto, args.intervalo_guardado)
+    try:
+        asyncio.run(servidor.servir())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
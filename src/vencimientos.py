@@ -0,0 +1,110 @@
+"""Índice de préstamos activos por fecha de vencimiento.
+
+`IndiceVencimientos` es un montículo (heapq) de préstamos activos ordenado por
+`fecha_vencimiento` (marca en segundos). Como en un montículo cada nodo vence antes que sus hijos,
+los préstamos que vencen antes de una fecha forman un subárbol desde la raíz:
+`vencidos` y `proximos` recorren solo ese subárbol y ordenan lo encontrado, así
+que cuestan O(k log k) para k resultados en lugar de recorrer (y parsear) todos
+los préstamos.
+
+Igual que `CoPrestamos`, la interfaz y el servidor llaman a `agregar` con cada
+préstamo nuevo. Las devoluciones no hace falta avisarlas: `Prestamo.devolver`
+llama a `quitar`, que marca la entrada como borrada sin tocar el montículo; las
+entradas borradas se descartan al llegar a la raíz o, cuando son más de la
+mitad, al compactar.
+"""
+
+import heapq
+
+from .clases import SEGUNDOS_DIA, marca_actual
+from .metricas import instrumentar
+
+DIAS_AVISO = 7  # horizonte por defecto de "próximos a vencer"
+
+
+class IndiceVencimientos:
+    def __init__(self, prestamos: list = None):
+        self._heap = []       # [fecha_vencimiento, n, prestamo]; prestamo=None si ya se devolvió
+        self._entradas = {}   # prestamo -> su entrada en el montículo
+        self._n = 0           # desempate estable entre vencimientos iguales
+        if prestamos is not None:
+            self.construir(prestamos)
+
+    @instrumentar("vencimientos.construir")
+    def construir(self, prestamos: list):
+        for p in self._entradas:
+            p._vencimientos = None
+        self._heap, self._entradas = [], {}
+        for p in prestamos:
+            if p.fecha_devolucion is None:
+                self._heap.append(self._nueva_entrada(p))
+        heapq.heapify(self._heap)
+
+    def _nueva_entrada(self, prestamo):
+        entrada = [prestamo.fecha_vencimiento, self._n, prestamo]
+        self._n += 1
+        self._entradas[prestamo] = entrada
+        prestamo._vencimientos = self
+        return entrada
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def __contains__(self, prestamo):
+        return prestamo in self._entradas
+
+    # ---------- Actualización ----------
+    def agregar(self, prestamo):
+        """Préstamo nuevo (prestar_libro o ColaSolicitudes.procesar)."""
+        if prestamo.fecha_devolucion is not None or prestamo in self._entradas:
+            return
+        heapq.heappush(self._heap, self._nueva_entrada(prestamo))
+
+    def quitar(self, prestamo) -> bool:
+        """Deja de seguir el préstamo (lo llama Prestamo.devolver). Devuelve False si no estaba."""
+        entrada = self._entradas.pop(prestamo, None)
+        if entrada is None:
+            return False
+        entrada[2] = None
+        prestamo._vencimientos = None
+        heap = self._heap
+        while heap and heap[0][2] is None:
+            heapq.heappop(heap)
+        if len(heap) > 2 * len(self._entradas) + 32:
+            self._heap = [e for e in heap if e[2] is not None]
+            heapq.heapify(self._heap)
+        return True
+
+    # ---------- Consultas ----------
+    def _hasta(self, limite: int) -> list:
+        """Entradas activas con vencimiento <= limite, en orden (recorre solo el subárbol que cumple)."""
+        heap, encontradas = self._heap, []
+        n = len(heap)
+        pendientes = [0] if n else []
+        while pendientes:
+            i = pendientes.pop()
+            entrada = heap[i]
+            if entrada[0] > limite:
+                continue  # sus hijos vencen aún más tarde
+            if entrada[2] is not None:
+                encontradas.append(entrada)
+            hijo = 2 * i + 1
+            if hijo < n:
+                pendientes.append(hijo)
+                if hijo + 1 < n:
+                    pendientes.append(hijo + 1)
+        encontradas.sort()
+        return encontradas
+
+    def vencidos(self, ahora: int = None) -> list:
+        """Préstamos activos cuyo vencimiento ya pasó, del más antiguo al más reciente."""
+        return [e[2] for e in self._hasta(marca_actual() if ahora is None else ahora)]
+
+    def proximos(self, dias: int, ahora: int = None) -> list:
+        """Préstamos activos que vencen en los próximos `dias` días (sin los ya vencidos)."""
+        ahora = marca_actual() if ahora is None else ahora
+        return [e[2] for e in self._hasta(ahora + dias * SEGUNDOS_DIA) if e[0] > ahora]
+
+    def siguiente(self):
+        """El préstamo activo que vence antes, o None."""
+        return self._heap[0][2] if self._heap else None
@@ -0,0 +1,30 @@
+from benchmarks import generador, bench_core, bench_formatos
+from src import persistencia
+
+
+def test_generador_determinista():
+    a = generador.generar_escenario(50, semilla=7)
+    b = generador.generar_escenario(50, semilla=7)
+    assert [l.titulo for l in a["libros"]] == [l.titulo for l in b["libros"]]
+    assert [p.fecha_prestamo for p in a["prestamos"]] == [p.fecha_prestamo for p in b["prestamos"]]
+    assert len({l.titulo for l in a["libros"]}) == 50
+
+
+def test_bench_core_informe():
+    data_dir = persistencia.DATA_DIR
+    informe = bench_core.ejecutar([30], repeticiones=1, limite_cuadratico=20)
+    assert persistencia.DATA_DIR == data_dir
+    operaciones = {r["operacion"] for r in informe["resultados"]}
+    assert "biblioteca.buscar_por_titulo" in operaciones
+    assert "persistencia.cargar_libros" in operaciones
+    omitidos = [r for r in informe["resultados"] if "omitido" in r]
+    assert any(r["operacion"] == "grafo.build_from_biblioteca" for r in omitidos)
+    assert bench_core.comparar(informe, informe)
+
+
+def test_bench_formatos_restaura_configuracion():
+    originales = (persistencia.DATA_DIR, persistencia.JSON_COMPACTO, persistencia.COMPRESION)
+    filas = bench_formatos.ejecutar([30], repeticiones=1)
+    assert (persistencia.DATA_DIR, persistencia.JSON_COMPACTO, persistencia.COMPRESION) == originales
+    tamanos = {(f["formato"], f["coleccion"]): f["bytes"] for f in filas}
+    assert tamanos[("compacto + gz", "libros.json")] < tamanos[("json indent=2", "libros.json")]
@@ -0,0 +1,46 @@
+from src.cache import CacheResultados
+from src.clases import Biblioteca, Libro
+
+
+def test_cache_lru_y_firma():
+    cache = CacheResultados(2)
+    llamadas = []
+    calcular = lambda v: lambda: llamadas.append(v) or v
+
+    assert cache.obtener("a", 1, calcular("A")) == "A"
+    assert cache.obtener("a", 1, calcular("otro")) == "A"
+    cache.obtener("b", 1, calcular("B"))
+    cache.obtener("a", 1, calcular("otro"))   # "a" pasa a ser la más reciente
+    cache.obtener("c", 1, calcular("C"))      # expulsa "b"
+    assert cache.obtener("b", 1, calcular("B2")) == "B2"
+    assert cache.obtener("c", 2, calcular("C2")) == "C2"  # firma distinta: se recalcula
+    assert llamadas == ["A", "B", "C", "B2", "C2"]
+    assert cache.estadisticas() == {"entradas": 2, "capacidad": 2, "aciertos": 2, "fallos": 5,
+                                    "invalidaciones": 1, "tasa_aciertos": 2 / 7}
+
+
+def test_busquedas_cacheadas_se_invalidan():
+    b = Biblioteca()
+    b.agregar_libros([Libro("El hobbit", "J.R.R. Tolkien", "Fantasía", 1937),
+                      Libro("Dune", "Frank Herbert", "Ciencia ficción", 1965)])
+    assert [l.titulo for l in b.buscar_por_genero("fantasia")] == ["El hobbit"]
+    assert [l.titulo for l in b.buscar_por_genero("Fantasía")] == ["El hobbit"]
+    assert b.cache.aciertos == 1
+    b.buscar_por_genero("fantasia").clear()  # el llamador recibe una copia
+    assert len(b.buscar_por_genero("fantasia")) == 1
+
+    b.agregar_libro(Libro("Terramar", "Ursula K. Le Guin", "Fantasía", 1968))
+    assert len(b.buscar_por_genero("fantasia")) == 2
+    b.buscar_por_titulo("hobbit")[0].genero = "Ciencia ficción"  # cambio in-place sin pasar por la biblioteca
+    assert len(b.buscar_por_genero("fantasia")) == 1
+
+    assert len(b.buscar_disponibles()) == 3
+    aciertos = b.cache.aciertos
+    assert len(b.buscar_por_genero("fantasia")) == 1 and b.cache.aciertos == aciertos + 1
+    b.libros[1].disponible = False  # préstamo: solo invalida los disponibles
+    assert len(b.buscar_disponibles()) == 2
+    assert len(b.buscar_por_genero("fantasia")) == 1 and b.cache.aciertos == aciertos + 2
+
+    b.libros = [Libro("Otro", "x", "Fantasía", 2000)]  # recarga del catálogo
+    assert [l.titulo for l in b.buscar_por_genero("fantasia")] == ["Otro"]
+    assert Biblioteca(tam_cache=0).buscar_por_titulo("x") == []
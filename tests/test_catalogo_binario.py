@@ -0,0 +1,45 @@
+import pytest
+
+from src import persistencia
+from src.catalogo_binario import CatalogoBinario
+from src.clases import Biblioteca, Libro
+
+
+def test_acceso_busqueda_y_disponibilidad_en_el_sitio(tmp_path, monkeypatch):
+    monkeypatch.setattr(persistencia, "DATA_DIR", str(tmp_path))
+    b = Biblioteca()
+    b.agregar_libros([Libro("El hobbit", "J.R.R. Tolkien", "Fantasía", 1937, isbn="9780261102217"),
+                      Libro("Dune", "Frank Herbert", "Ciencia ficción", 1965),
+                      Libro("Éxodo", "Anónimo", "Fantasía", None, disponible=False),
+                      Libro("El Silmarillion", "J.R.R. Tolkien", "Fantasía", 1977)])
+    persistencia.guardar_datos("libros.json", b.libros)
+    persistencia.guardar_catalogo_binario(b)
+
+    with persistencia.abrir_catalogo_binario() as catalogo:
+        assert len(catalogo) == 4 and persistencia.catalogo_binario_al_dia(catalogo)
+        assert [catalogo.titulo(i) for i in range(4)] == [l.titulo for l in b.libros]
+        hobbit = catalogo.libro_por_titulo("el HOBBIT")
+        assert (hobbit.id, hobbit.autor, hobbit.year, hobbit.isbn) == (b.libros[1].id, "J.R.R. Tolkien", 1937,
+                                                                        "9780261102217")
+        exodo = catalogo[catalogo.buscar_titulo("exodo")]
+        assert exodo.year is None and not exodo.disponible and exodo.isbn is None
+        assert catalogo.buscar_titulo("El") == -1
+        assert [catalogo.titulo(i) for i in catalogo.con_prefijo("el ")] == ["El hobbit", "El Silmarillion"]
+
+    with persistencia.abrir_catalogo_binario(escritura=True) as catalogo:
+        catalogo.marcar_disponible(catalogo.buscar_titulo("Dune"), False)
+    with persistencia.abrir_catalogo_binario() as catalogo:
+        assert not catalogo.disponible(0)
+        with pytest.raises(TypeError):
+            catalogo.marcar_disponible(0, True)  # abierto en solo lectura
+
+    persistencia.guardar_datos("libros.json", b.libros)
+    with persistencia.abrir_catalogo_binario() as catalogo:
+        assert not persistencia.catalogo_binario_al_dia(catalogo)
+
+
+def test_archivo_no_valido(tmp_path):
+    ruta = tmp_path / "otro.bin"
+    ruta.write_bytes(b"no es un catalogo")
+    with pytest.raises(ValueError):
+        CatalogoBinario(str(ruta))
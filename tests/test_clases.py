@@ -1,5 +1,5 @@
 import os
-from src.clases import Biblioteca, Libro, Usuario, ColaSolicitudes, SolicitudPrestamo
+from src.clases import Biblioteca, Libro, Usuario, ColaSolicitudes, SolicitudPrestamo, GrafoLibros
 from src import persistencia
 
 
@@ -30,6 +30,17 @@ def test_cola_procesar():
     assert not libro.disponible
 
 
+def test_cola_ordenadas_prioridad_y_fecha():
+    cola = ColaSolicitudes.from_dict_list([
+        {"id_usuario": "e1", "titulo_libro": "X", "fecha_solicitud": "2024-01-01 09:00:00", "tipo_usuario": "estudiante"},
+        {"id_usuario": "p1", "titulo_libro": "X", "fecha_solicitud": "2024-01-03 09:00:00", "tipo_usuario": "Profesor"},
+        {"id_usuario": "e2", "titulo_libro": "X", "fecha_solicitud": "2023-12-31 09:00:00"},
+        {"id_usuario": "p2", "titulo_libro": "X", "fecha_solicitud": "2024-01-02 09:00:00", "tipo_usuario": "profesor"},
+    ])
+    assert [s.id_usuario for s in cola.ordenadas()] == ["p2", "p1", "e2", "e1"]
+    assert cola.to_dict_list()[0]["fecha_solicitud"] == "2024-01-01 09:00:00"
+
+
 def test_persistencia_roundtrip(tmp_path, monkeypatch):
     # usar tmp_path como data dir temporal
     monkeypatch.setattr(persistencia, "DATA_DIR", str(tmp_path))
@@ -39,3 +50,97 @@ def test_persistencia_roundtrip(tmp_path, monkeypatch):
     loaded = persistencia.cargar_libros()
     assert len(loaded) == 2
     assert {x.titulo for x in loaded} == {"A", "B"}
+
+
+def test_quicksort_catalogo_ya_ordenado():
+    # añadir a un catálogo ordenado no debe agotar la recursión
+    b = Biblioteca()
+    b.libros = [Libro(f"Libro {i:05d}", "A", "G", 2000) for i in range(5000)]
+    b.agregar_libro(Libro("Libro 00000a", "A", "G", 2000))
+    titles = [l.titulo for l in b.libros]
+    assert titles == sorted(titles)
+
+
+def test_dfs_componente_grande_sin_recursion():
+    g = GrafoLibros()
+    libros = [Libro(f"L{i}", "x", "g", 2000) for i in range(5000)]
+    for a, b in zip(libros, libros[1:]):
+        g.relacionar(a, b)
+    assert g.dfs("L0")[-1] == "L4999"
+    assert g.dfs("L0", limite=3) == ["L1", "L2", "L3"]
+    assert g.dfs("L0", max_depth=2) == ["L1", "L2"]
+
+
+def test_componentes_del_grafo():
+    b = Biblioteca()
+    libros = [Libro("Dune", "Herbert", "Ciencia ficción", 1965), Libro("Hyperion", "Simmons", "Ciencia ficción", 1989),
+              Libro("Endymion", "Simmons", "Aventura", 1996), Libro("Walden", "Thoreau", "Ensayo", 1854)]
+    b.agregar_libros(libros)
+    dune, hyperion, endymion, walden = libros
+    g = GrafoLibros()
+    g.build_from_biblioteca(b)
+    assert g.tamano_componente(dune.id) == 3 and g.misma_componente(dune.id, "Endymion")
+    assert sorted(g.recomendaciones(dune)) == ["Endymion", "Hyperion"] and g.recomendaciones(walden) == []
+
+    g.relacionar(walden, dune)
+    assert g.tamano_componente(walden.id) == 4
+    g.remover_libro(hyperion)  # Dune y Endymion solo se unían por Hyperion
+    assert not g.misma_componente(dune.id, endymion.id)
+    assert sorted(g.recomendaciones(dune)) == ["Walden"] and g.tamano_componente(hyperion.id) == 0
+
+    # el orden es el de alta en el grafo, sin depender del orden de las uniones
+    otro = GrafoLibros()
+    letras = [Libro(t, t, t, 2000) for t in "ABCDE"]
+    for l in letras:
+        otro.agregar_libro(l)
+    otro.recomendaciones(letras[0])
+    for i, j in ((0, 1), (2, 3), (3, 4), (1, 2)):
+        otro.relacionar(letras[i], letras[j])
+    assert otro.recomendaciones(letras[0]) == ["B", "C", "D", "E"]
+    otro.componente_ids(letras[0].id).append("x")
+    assert len(otro.componente_ids(letras[0].id)) == otro.tamano_componente(letras[0].id) == 5
+
+    # un grafo cargado de JSON calcula las componentes al consultarlas
+    cargado = GrafoLibros.from_dict(g.to_dict(), b)
+    assert cargado.recomendaciones(walden) == ["Dune"] and cargado.tamano_componente(endymion.id) == 1
+
+
+def test_claves_normalizadas_en_busqueda_y_cola():
+    b = Biblioteca()
+    b.agregar_libros([Libro("Ángeles", "García", "Fantasía", 2000), Libro("Zeta", "Otro", "Ensayo", 2001)])
+    assert [l.titulo for l in b.libros] == ["Ángeles", "Zeta"]  # la tilde no manda "Á" al final
+    assert b.buscar_por_genero("fantasia") == b.buscar_por_autor("GARCIA") == b.buscar_por_titulo("angeles")
+
+    libro = b.libros[0]
+    libro.genero = "Ciencia Ficción"
+    assert libro.clave_genero == "ciencia ficcion" and b.buscar_por_genero("Fantasía") == []
+
+    cola = ColaSolicitudes()
+    cola.encolar(SolicitudPrestamo("u1", "angeles"))
+    prestamos = []
+    assert len(cola.procesar([Usuario("Ana", "u1")], b, prestamos)) == 1 and prestamos[0].libro is libro
+
+
+def test_ids_estables_al_renombrar_y_titulos_repetidos():
+    b = Biblioteca()
+    dune, otro_dune = Libro("Dune", "Herbert", "Ciencia ficción", 1965), Libro("Dune", "Otro", "Ensayo", 2000)
+    b.agregar_libros([dune, otro_dune, Libro("Hyperion", "Simmons", "Ciencia ficción", 1989)])
+    assert dune.id != otro_dune.id and b.libro_por_id(otro_dune.id) is otro_dune
+
+    g = GrafoLibros()
+    g.build_from_biblioteca(b)
+    ana = Usuario("Ana", "u1")
+    otro_dune.disponible = False
+    cola = ColaSolicitudes()
+    cola.encolar(SolicitudPrestamo("u1", "Dune", id_libro=otro_dune.id))
+
+    assert b.actualizar_libro(otro_dune.id, titulo="Dune (ensayo)")
+    assert b.libro_por_id(otro_dune.id).titulo == "Dune (ensayo)"
+    assert g.recomendaciones(dune) == ["Hyperion"]
+    otro_dune.disponible = True
+    prestamos = []
+    cola.procesar([ana], b, prestamos)
+    assert prestamos[0].libro is otro_dune  # por id, aunque ya no se llame "Dune"
+
+    assert b.eliminar_libro(dune.id) and b.libro_por_id(dune.id) is None
+    assert [l.titulo for l in b.libros] == ["Dune (ensayo)", "Hyperion"]
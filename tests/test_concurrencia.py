@@ -0,0 +1,131 @@
+import random
+import sys
+import threading
+from src.clases import Biblioteca, Libro, Usuario, SolicitudPrestamo
+from src.concurrencia import BibliotecaConcurrente, GrafoConcurrente, ColaConcurrente, LockLectorEscritor
+
+
+def test_lock_permite_lectores_simultaneos_y_escritor_exclusivo():
+    lock = LockLectorEscritor()
+    dentro = threading.Barrier(3, timeout=5)
+
+    def leer():
+        with lock.lectura():
+            dentro.wait()  # solo pasa si los tres lectores están dentro a la vez
+
+    hilos = [threading.Thread(target=leer) for _ in range(3)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+
+    with lock.escritura():
+        with lock.lectura(), lock.escritura():  # reentrante para el escritor
+            pass
+
+
+
+def test_indices_al_dia_se_consultan_con_el_candado_de_lectura():
+    b = Biblioteca()
+    b.libros = [Libro("Dune", "Frank Herbert", "Ciencia ficción", 1965),
+                Libro("Hyperion", "Dan Simmons", "Ciencia ficción", 1989)]
+    biblioteca = BibliotecaConcurrente(b)
+    dune = b.libros[0]
+    assert biblioteca.libro_por_id(dune.id) is dune  # construye los índices
+    assert biblioteca.buscar_difuso("dune")[0][0] is dune
+
+    dentro = threading.Barrier(2, timeout=5)
+    vigente = b.indice_vigente
+
+    def esperar_al_otro(nombre):
+        dentro.wait()  # con el candado de escritura el segundo hilo no llegaría nunca
+        return vigente(nombre)
+    b.indice_vigente = esperar_al_otro
+
+    resultados = []
+    hilos = [threading.Thread(target=lambda: resultados.append(biblioteca.libro_por_id(dune.id))),
+             threading.Thread(target=lambda: resultados.append(biblioteca.buscar_difuso("hyperion")[0][0].titulo))]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    assert len(resultados) == 2 and dune in resultados and "Hyperion" in resultados
+
+    # tras un alta el índice ya no está al día y se reconstruye
+    b.indice_vigente = vigente
+    biblioteca.agregar_libro(Libro("Terramar", "Ursula K. Le Guin", "Fantasía", 1968))
+    assert biblioteca.autocompletar_titulo("ter") == ["Terramar"]
+
+
+def test_estres_busquedas_y_prestamos_concurrentes():
+    b = Biblioteca()
+    b.libros = [Libro(f"Libro {i:03d}", f"Autor {i % 7}", f"Género {i % 10}", 2000 + i % 20) for i in range(200)]
+    b.ordenar_por_titulo()
+    biblioteca = BibliotecaConcurrente(b)
+    grafo = GrafoConcurrente()
+    grafo.build_from_biblioteca(biblioteca)
+    cola = ColaConcurrente()
+    usuarios = [Usuario(f"U{i}", f"u{i}") for i in range(8)]
+    prestamos = []
+    errores = []
+    fin = threading.Event()
+
+    def buscador(semilla):
+        azar = random.Random(semilla)
+        try:
+            while not fin.is_set():
+                foto = biblioteca.instantanea()
+                titulos = [l.titulo.lower() for l in foto]
+                assert titulos == sorted(titulos)
+                assert all(isinstance(l, Libro) for l in biblioteca.buscar_por_titulo(f"{azar.randrange(10)}"))
+                grafo.dfs(foto[azar.randrange(len(foto))].id, limite=20)
+        except Exception as e:
+            errores.append(e)
+
+    def prestamista(n):
+        azar = random.Random(n)
+        try:
+            for _ in range(100):
+                titulo = f"Libro {azar.randrange(200):03d}"
+                if biblioteca.prestar(usuarios[n], titulo, prestamos) is None and azar.random() < 0.2:
+                    cola.encolar(SolicitudPrestamo(usuarios[n].id, titulo))
+                activos = [p for p in prestamos if p.usuario is usuarios[n] and p.fecha_devolucion is None]
+                if activos and azar.random() < 0.5:
+                    biblioteca.devolver(activos[0])
+                    cola.procesar(usuarios, biblioteca, prestamos)
+        except Exception as e:
+            errores.append(e)
+
+    def editor():
+        try:
+            for i in range(50):
+                biblioteca.agregar_libro(Libro(f"Nuevo {i:02d}", "Autor", "Género", 2024))
+            grafo.build_from_biblioteca(biblioteca)
+        except Exception as e:
+            errores.append(e)
+
+    hilos = [threading.Thread(target=buscador, args=(i,)) for i in range(4)]
+    trabajadores = [threading.Thread(target=prestamista, args=(i,)) for i in range(8)]
+    trabajadores.append(threading.Thread(target=editor))
+    intervalo = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)  # cambios de hilo frecuentes para provocar intercalados
+    try:
+        for h in hilos + trabajadores:
+            h.start()
+        for h in trabajadores:
+            h.join()
+    finally:
+        fin.set()
+        for h in hilos:
+            h.join()
+        sys.setswitchinterval(intervalo)
+
+    assert errores == []
+    assert len(biblioteca.libros) == 250
+    # invariante: cada libro tiene como mucho un préstamo activo y `disponible` lo refleja
+    activos = {}
+    for p in prestamos:
+        if p.fecha_devolucion is None:
+            activos[p.libro.titulo] = activos.get(p.libro.titulo, 0) + 1
+    assert all(n == 1 for n in activos.values())
+    assert all(l.disponible == (l.titulo not in activos) for l in biblioteca.libros)
@@ -0,0 +1,50 @@
+import pytest
+from src.clases import Biblioteca, Libro
+from src.exportacion import filtrar_libros
+
+
+def _biblioteca():
+    b = Biblioteca()
+    b.agregar_libros([
+        Libro("El hobbit", "J.R.R. Tolkien", "Fantasía", 1937),
+        Libro("El señor de los anillos", "J.R.R. Tolkien", "Fantasía épica", 1954),
+        Libro("Silmarillion", "J.R.R. Tolkien", "Fantasía", 1977),
+        Libro("Terramar", "Ursula K. Le Guin", "Fantasía", 1968),
+        Libro("Dune", "Frank Herbert", "Ciencia ficción", 1965),
+        Libro("Poemas", "Otro", "Poesía", None),
+    ])
+    b.buscar_por_titulo("señor")[0].disponible = False
+    return b
+
+
+def test_consultar_combina_criterios():
+    b = _biblioteca()
+    titulos = lambda libros: [l.titulo for l in libros]
+    assert titulos(b.consultar(autor="tolkien", genero="fantasia")) == [
+        "El hobbit", "El señor de los anillos", "Silmarillion"]
+    assert titulos(b.consultar(autor="tolkien", year_desde=1950, year_hasta=1980, disponible=True)) == ["Silmarillion"]
+    assert titulos(b.consultar(genero="fantasía", titulo="EL", disponible=False)) == ["El señor de los anillos"]
+    assert titulos(b.consultar(year=1965)) == ["Dune"]
+    assert b.consultar(autor="tolkien", genero="poesía") == []
+    # filtrar_libros (exportación y servidor) usa el mismo motor
+    assert titulos(filtrar_libros(b, genero="fantasía", disponibles=True, year_desde=1960)) == ["Silmarillion", "Terramar"]
+    with pytest.raises(ValueError):
+        b.consultar(editorial="x")
+
+
+def test_indices_se_reconstruyen_y_explicar():
+    b = _biblioteca()
+    assert len(b.consultar(autor="herbert")) == 1
+    b.agregar_libro(Libro("Hijos de Dune", "Frank Herbert", "Ciencia ficción", 1976))
+    assert len(b.consultar(autor="herbert")) == 2
+    # un cambio in-place (sin actualizar_libro) también invalida los índices
+    b.buscar_por_titulo("Dune")[0].genero = "Poesía"
+    assert [l.titulo for l in b.consultar(genero="poesia")] == ["Dune", "Poemas"]
+    assert b.buscar_difuso("Poemas")[0][0].titulo == "Poemas"
+
+    plan = b.explicar(autor="le guin", genero="fantasía", disponible=True)
+    lineas = plan.splitlines()
+    # el criterio más selectivo (1 libro de Le Guin) genera los candidatos
+    assert "índice" in lineas[1] and "autor" in lineas[1] and "~1 libros" in lineas[1]
+    assert "disponible" in plan and "sin índice" in plan
+    assert lineas[-1] == "Resultado: 1 libros"
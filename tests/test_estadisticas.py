@@ -0,0 +1,54 @@
+from src import persistencia
+from src.clases import Libro, Usuario, Prestamo
+from src.estadisticas import EstadisticasCirculacion
+
+
+def test_incremental_coincide_con_reconstruir(tmp_path, monkeypatch):
+    dune, hobbit, poemas = (Libro("Dune", "Herbert", "Ciencia ficción", 1965),
+                            Libro("El hobbit", "Tolkien", "Fantasía", 1937),
+                            Libro("Poemas", "Otro", None, None))
+    ana, luis = Usuario("Ana", "u1"), Usuario("Luis", "u2", "profesor")
+    libros, prestamos = [dune, hobbit], []
+    e = EstadisticasCirculacion(libros, prestamos)
+
+    for usuario, libro in ((ana, dune), (luis, hobbit)):
+        libro.disponible = False
+        prestamos.append(Prestamo(usuario, libro))
+        e.registrar_prestamo(prestamos[-1])
+    prestamos[0].devolver()
+    e.registrar_devolucion(prestamos[0])
+    dune.disponible = False
+    prestamos.append(Prestamo(luis, dune))
+    e.registrar_prestamo(prestamos[-1])
+    libros.append(poemas)
+    e.libro_agregado(poemas)
+
+    assert e.mas_prestados() == [("Dune", 2), ("El hobbit", 1)]
+    assert e.prestamos_por_genero() == [("Ciencia ficción", 2), ("Fantasía", 1)]
+    assert e.prestamos_activos_por_tipo() == {"profesor": 2}
+    assert e.disponibilidad() == {"libros": 3, "disponibles": 1, "prestados": 2}
+
+    # reconstruir desde objetos o en streaming desde data/ da lo mismo
+    assert EstadisticasCirculacion(libros, prestamos).resumen() == e.resumen()
+    monkeypatch.setattr(persistencia, "DATA_DIR", str(tmp_path))
+    persistencia.guardar_datos("libros.json", libros)
+    persistencia.guardar_datos("prestamos.json", prestamos)
+    desde_json = EstadisticasCirculacion()
+    desde_json.construir_desde_registros(persistencia.iterar_registros("libros.json"),
+                                         persistencia.iterar_registros("prestamos.json"))
+    assert desde_json.resumen() == e.resumen()
+
+    libros.remove(hobbit)
+    e.libro_eliminado(hobbit)
+    assert e.disponibilidad() == {"libros": 2, "disponibles": 1, "prestados": 1}
+
+
+def test_cuenta_por_libro_y_muestra_el_titulo_actual():
+    dune, copia = Libro("Dune", "Herbert", "Ciencia ficción", 1965), Libro("Dune", "Herbert", "Ciencia ficción", 1965)
+    ana = Usuario("Ana", "u1")
+    historial = [Prestamo(ana, dune).to_dict(), Prestamo(ana, dune).to_dict()]
+    e = EstadisticasCirculacion([dune, copia], [Prestamo(ana, copia)], historial)
+    assert e.mas_prestados() == [("Dune", 2), ("Dune", 1)]
+    dune.titulo = "Dune (edición ilustrada)"  # renombrado: el historial sigue siendo suyo
+    e.registrar_prestamo(Prestamo(ana, dune))
+    assert e.mas_prestados() == [("Dune (edición ilustrada)", 3), ("Dune", 1)]
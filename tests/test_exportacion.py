@@ -0,0 +1,76 @@
+import csv
+import gzip
+import io
+import json
+from src import persistencia
+from src.clases import Biblioteca, ColaSolicitudes, Libro, Usuario, Prestamo, SolicitudPrestamo, a_marca
+from src.exportacion import CAMPOS, exportar_registros, registros_libros, registros_prestamos, registros_solicitudes
+
+
+def test_guardar_datos_mismo_formato_que_json_dump(tmp_path, monkeypatch):
+    monkeypatch.setattr(persistencia, "DATA_DIR", str(tmp_path))
+    libros = [Libro("Fantasía", "Ñ", "G", 2000), Libro("B", "Y", "G", None, False)]
+    persistencia.guardar_datos("libros.json", libros)
+    esperado = json.dumps([l.to_dict() for l in libros], indent=2, ensure_ascii=False)
+    assert (tmp_path / "libros.json").read_text(encoding="utf-8") == esperado
+    assert list(persistencia.iterar_registros("libros.json", tam_bloque=5)) == [l.to_dict() for l in libros]
+
+    persistencia.guardar_datos("vacio.json", [])
+    assert (tmp_path / "vacio.json").read_text(encoding="utf-8") == "[]"
+    assert list(persistencia.iterar_registros("vacio.json")) == []
+
+
+def test_exportar_libros_filtrados_csv_gzip(tmp_path):
+    b = Biblioteca()
+    b.libros = [Libro("A", "Tolkien", "Fantasía", 1954), Libro("B", "Tolkien", "Ensayo", 1960, False),
+                Libro("C", "Otro", "Fantasía", 1970, False)]
+    ruta = tmp_path / "libros.csv.gz"
+    total = exportar_registros(registros_libros(b, autor="tolkien", disponibles=True), str(ruta))
+    assert total == 1
+    with gzip.open(ruta, 'rt', encoding='utf-8', newline='') as f:
+        filas = list(csv.DictReader(f))
+    assert [f["titulo"] for f in filas] == ["A"]
+
+
+def test_csv_con_campos_opcionales(tmp_path):
+    # el primer libro no tiene isbn: la columna debe estar igualmente
+    b = Biblioteca()
+    b.libros = [Libro("A", "X", "G", 2000), Libro("B", "Y", "G", 2001, isbn="9780261102217")]
+    ruta = tmp_path / "libros.csv"
+    exportar_registros(registros_libros(b), str(ruta), campos=CAMPOS["libros"])
+    filas = list(csv.DictReader(io.StringIO(ruta.read_text(encoding="utf-8"))))
+    assert [f["isbn"] for f in filas] == ["", "9780261102217"]
+
+    prestamos = tmp_path / "prestamos.csv"
+    exportar_registros(registros_prestamos([Prestamo(Usuario("Ana", "u1"), l) for l in b.libros]), str(prestamos),
+                       campos=CAMPOS["prestamos"])
+    filas = list(csv.DictReader(io.StringIO(prestamos.read_text(encoding="utf-8"))))
+    assert [f["libro.isbn"] for f in filas] == ["", "9780261102217"]
+
+
+def test_exportar_prestamos_desde_archivo(tmp_path, monkeypatch):
+    monkeypatch.setattr(persistencia, "DATA_DIR", str(tmp_path))
+    u = Usuario("Ana", "u1")
+    l1, l2 = Libro("A", "X", "G", 2000), Libro("B", "Y", "G", 2001)
+    p1, p2 = Prestamo(u, l1, "2024-01-01 10:00:00"), Prestamo(u, l2, "2024-01-02 10:00:00")
+    p1.fecha_devolucion = a_marca("2024-01-05 10:00:00")
+    persistencia.guardar_datos("prestamos.json", [p1, p2])
+
+    salida = tmp_path / "activos.jsonl"
+    assert exportar_registros(registros_prestamos(activos=True), str(salida)) == 1
+    assert json.loads(salida.read_text(encoding="utf-8"))["libro"]["titulo"] == "B"
+
+    plano = tmp_path / "prestamos.csv"
+    exportar_registros(registros_prestamos(libros=[l1]), str(plano))
+    fila = next(csv.DictReader(io.StringIO(plano.read_text(encoding="utf-8"))))
+    assert fila["usuario.id"] == "u1" and fila["libro.titulo"] == "A"
+
+    # por id: otro libro con el mismo título no entra
+    otro_a = Libro("A", "Z", "G", 2002)
+    persistencia.guardar_datos("prestamos.json", [p1, p2, Prestamo(u, otro_a)])
+    assert [d["libro"]["id"] for d in registros_prestamos(libros=[otro_a])] == [otro_a.id]
+    cola = ColaSolicitudes()
+    cola.encolar(SolicitudPrestamo("u1", "A", id_libro=l1.id))
+    cola.encolar(SolicitudPrestamo("u1", "a"))  # antigua, sin id: por título
+    assert len(list(registros_solicitudes(cola, libros=[l1]))) == 2
+    assert len(list(registros_solicitudes(cola, libros=[otro_a]))) == 1
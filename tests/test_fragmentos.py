@@ -0,0 +1,49 @@
+from src import persistencia
+from src.clases import Libro
+from src.fragmentos import BibliotecaFragmentada
+
+
+def _catalogo():
+    return [Libro("Dune", "Frank Herbert", "Ciencia ficción", 1965),
+            Libro("Hyperion", "Dan Simmons", "Ciencia ficción", 1989),
+            Libro("El hobbit", "J.R.R. Tolkien", "Fantasía", 1937),
+            Libro("Terramar", "Ursula K. Le Guin", "Fantasía", 1968),
+            Libro("Ensayo sobre la ceguera", "José Saramago", "Novela", 1995)]
+
+
+def test_carga_bajo_demanda_y_guardado_parcial(tmp_path, monkeypatch):
+    monkeypatch.setattr(persistencia, "DATA_DIR", str(tmp_path))
+    manifiesto = persistencia.fragmentar_libros(_catalogo(), "genero")
+    assert {c: e["libros"] for c, e in manifiesto["fragmentos"].items()} == {
+        "ciencia-ficcion": 2, "fantasia": 2, "novela": 1}
+
+    b = BibliotecaFragmentada()
+    assert [l.titulo for l in b.buscar_por_genero("ficcion")] == ["Dune", "Hyperion"]
+    assert b.cargados == {"ciencia-ficcion"}
+
+    # un préstamo (cambio in-place) solo reescribe su fragmento
+    versiones = {c: persistencia.version_actual(f"libros/{c}.json") for c in manifiesto["fragmentos"]}
+    b.buscar_por_genero("ciencia")[0].disponible = False
+    assert b.guardar() == ["ciencia-ficcion"]
+    assert b.guardar() == []
+    assert persistencia.version_actual("libros/fantasia.json") == versiones["fantasia"]
+
+    # cambiar de género mueve el libro y carga antes el fragmento de destino
+    assert b.actualizar_libro("Hyperion", genero="Fantasía")
+    assert b.guardar() == ["ciencia-ficcion", "fantasia"]
+    otra = BibliotecaFragmentada()
+    assert [l.titulo for l in otra.buscar_por_genero("fantasia")] == ["El hobbit", "Hyperion", "Terramar"]
+    assert not otra.buscar_por_genero("ciencia ficcion")[0].disponible
+    assert persistencia.leer_manifiesto()["fragmentos"]["fantasia"]["libros"] == 3
+    assert otra.buscar_por_autor("saramago") and otra.completo()
+
+
+def test_fragmentos_por_inicial(tmp_path, monkeypatch):
+    monkeypatch.setattr(persistencia, "DATA_DIR", str(tmp_path))
+    persistencia.fragmentar_libros(_catalogo(), "inicial")
+    b = BibliotecaFragmentada()
+    assert b.autocompletar_titulo("el h") == ["El hobbit"]
+    assert b.cargados == {"e"}
+    b.agregar_libro(Libro("Ébano", "Ryszard Kapuściński", "Crónica", 1998))
+    assert b.guardar() == ["e"] and b.cargados == {"e"}
+    assert [l.titulo for l in persistencia.cargar_fragmento("e")] == ["Ébano", "El hobbit", "Ensayo sobre la ceguera"]
@@ -0,0 +1,61 @@
+import json
+from src import persistencia
+from src.clases import Biblioteca, GrafoLibros, Libro
+from src.importacion import importar_catalogo
+
+
+def test_importar_csv_valida_y_deduplica(tmp_path, monkeypatch):
+    monkeypatch.setattr(persistencia, "DATA_DIR", str(tmp_path))
+    csv_path = tmp_path / "donacion.csv"
+    csv_path.write_text(
+        "titulo,autor,genero,year,disponible\n"
+        "Zeta,Ana,Poesía,2001,\n"
+        "Alpha,Bruno,Poesía,1999,no\n"
+        "  alpha ,Otro,Ensayo,2000,\n"  # duplicado dentro del archivo
+        "Existente,X,Y,1990,\n"          # duplicado frente al catálogo
+        ",Sin título,Y,1990,\n"
+        "Beta,C,Ensayo,mil,\n",
+        encoding="utf-8",
+    )
+    b = Biblioteca()
+    b.libros = [Libro("Existente", "X", "Y", 1990)]
+    g = GrafoLibros()
+    avances = []
+    r = importar_catalogo(str(csv_path), b, g, tam_lote=1, progreso=lambda res: avances.append(res.importados))
+
+    assert (r.leidos, r.importados, r.duplicados, len(r.rechazados)) == (6, 2, 2, 2)
+    assert [n for n, _, _ in r.rechazados] == [5, 6]
+    assert avances == [1, 2]
+    assert [l.titulo for l in b.libros] == ["Alpha", "Existente", "Zeta"]
+    assert not b.libros[0].disponible
+    ids = {l.titulo: l.id for l in b.libros}
+    assert ids["Zeta"] in g.adyacencia[ids["Alpha"]]  # mismo género
+    assert {l.titulo for l in persistencia.cargar_libros()} == {"Alpha", "Existente", "Zeta"}
+    assert ids["Alpha"] in persistencia.cargar_grafo("grafo.json")
+
+
+def test_importar_jsonl(tmp_path, monkeypatch):
+    monkeypatch.setattr(persistencia, "DATA_DIR", str(tmp_path))
+    ruta = tmp_path / "libros.jsonl"
+    lineas = [json.dumps({"titulo": f"Libro {i}", "autor": "A", "categoria": "G", "año": 2000 + i}) for i in range(5)]
+    ruta.write_text("\n".join(lineas + ["{no es json"]) + "\n", encoding="utf-8")
+    b = Biblioteca()
+    r = importar_catalogo(str(ruta), b, guardar=False)
+    assert r.importados == 5
+    assert r.rechazados[0][1] == "registro mal formado"
+    assert b.libros[4].year == 2004 and b.libros[4].genero == "G"
+    assert not (tmp_path / "libros.json").exists()
+
+
+def test_importar_rechaza_ids_repetidos(tmp_path):
+    b = Biblioteca()
+    b.agregar_libro(Libro("Dune", "Frank Herbert", "Ciencia ficción", 1965, id_libro="l1"))
+    ruta = tmp_path / "libros.jsonl"
+    registros = [{"id": "l1", "titulo": "Hyperion"}, {"id": "l2", "titulo": "Terramar"},
+                 {"id": "l2", "titulo": "El hobbit"}, {"titulo": "Solaris"}]
+    ruta.write_text("\n".join(json.dumps(d) for d in registros) + "\n", encoding="utf-8")
+    r = importar_catalogo(str(ruta), b, guardar=False)
+    assert r.importados == 2
+    assert [(n, motivo) for n, motivo, _ in r.rechazados] == [(1, "id duplicado: 'l1'"), (3, "id duplicado: 'l2'")]
+    assert [l.titulo for l in b.libros] == ["Dune", "Solaris", "Terramar"]
+    assert b.libro_por_id("l1").titulo == "Dune"
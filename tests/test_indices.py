@@ -0,0 +1,92 @@
+from src.clases import Biblioteca, Libro
+from src.indices import normalizar, trigramas, IndiceTrigramas, IndicePrefijos, UnionFind
+
+
+def _biblioteca():
+    b = Biblioteca()
+    b.agregar_libros([
+        Libro("El Señor de los Anillos", "J.R.R. Tolkien", "Fantasía", 1954),
+        Libro("Harry Potter y la piedra filosofal", "J.K. Rowling", "Fantasía", 1997),
+        Libro("Cien años de soledad", "Gabriel García Márquez", "Novela", 1967),
+        Libro("Dune", "Frank Herbert", "Ciencia ficción", 1965),
+    ])
+    return b
+
+
+def test_normalizar_y_trigramas():
+    assert normalizar("  Fantasía   ÉPICA ") == "fantasia epica"
+    assert trigramas("Dune") == {"  d", " du", "dun", "une", "ne "}
+
+
+def test_buscar_difuso_tolera_erratas():
+    b = _biblioteca()
+    assert b.buscar_por_titulo("Senor de los anilos") == []
+    assert [l.titulo for l, _ in b.buscar_difuso("Senor de los anilos")][:1] == ["El Señor de los Anillos"]
+    assert [l.titulo for l, _ in b.buscar_difuso("Harry Poter")][:1] == ["Harry Potter y la piedra filosofal"]
+    # solo autores
+    resultado = b.buscar_difuso("Garcia Marques", campos=("autor",))
+    assert [l.titulo for l, _ in resultado] == ["Cien años de soledad"]
+    assert b.buscar_difuso("zzzz") == []
+
+
+
+def test_buscar_difuso_no_repite_un_libro_en_el_top():
+    # "Rosa nube" coincide por título y, mejor aún, por autor: un solo hueco del top-2
+    libros = [Libro("Lunares nube", "Lunar lunares", "Poesía", 2001), Libro("Rosa nube", "Rosal marino", "Poesía", 2002),
+              Libro("Lunar", "Nube", "Poesía", 2003)]
+    resultado = IndiceTrigramas(libros).buscar("nubes rosal", limite=2, umbral=0.3)
+    assert [l.titulo for l, _ in resultado] == ["Rosa nube", "Lunares nube"]
+
+def test_indice_difuso_se_actualiza_con_el_catalogo():
+    b = _biblioteca()
+    assert b.buscar_difuso("Silmarilion") == []
+    b.agregar_libro(Libro("El Silmarillion", "J.R.R. Tolkien", "Fantasía", 1977))
+    assert [l.titulo for l, _ in b.buscar_difuso("Silmarilion")] == ["El Silmarillion"]
+    b.libros = [l for l in b.libros if l.titulo != "El Silmarillion"]
+    assert b.buscar_difuso("Silmarilion") == []
+
+
+def test_presupuesto_agotado_devuelve_parcial():
+    libros = [Libro(f"El libro {i}", "Autor", "G", 2000) for i in range(2000)]
+    indice = IndiceTrigramas(libros)
+    assert len(indice.buscar("el libro", limite=5, presupuesto_ms=0)) <= 5
+    assert indice.ultima_completa is False
+
+
+def test_indice_prefijos():
+    indice = IndicePrefijos(["Dune", "Dune Mesías", "Hijos de Dune", "Dune", "Élite", "el libro"])
+    assert indice.completar("du") == ["Dune", "Dune Mesías"]
+    assert indice.completar("DUNE ") == ["Dune Mesías"]
+    assert indice.completar("eli") == ["Élite"]
+    assert indice.completar("", k=2) == ["Dune", "Dune Mesías"]
+    indice.agregar("Duna roja")
+    assert indice.eliminar("Dune") and indice.completar("dun") == ["Duna roja", "Dune", "Dune Mesías"]
+    assert indice.eliminar("Dune") and not indice.eliminar("Dune")
+    assert indice.completar("zz") == []
+
+
+def test_autocompletar_titulo_se_mantiene_sin_reconstruir():
+    b = _biblioteca()
+    indice = b.indice_prefijos()
+    assert b.autocompletar_titulo("el se") == ["El Señor de los Anillos"]
+    b.agregar_libro(Libro("El Silmarillion", "J.R.R. Tolkien", "Fantasía", 1977))
+    b.actualizar_libro("Cien años de soledad", titulo="Cien años de soledad (ed. especial)")
+    b.eliminar_libro("El Señor de los Anillos")
+    assert b.indice_prefijos() is indice
+    assert b.autocompletar_titulo("el s") == ["El Silmarillion"]
+    assert b.autocompletar_titulo("cien") == ["Cien años de soledad (ed. especial)"]
+    b.libros = b.libros[:1]  # reemplazar la lista sí lo reconstruye
+    assert b.indice_prefijos() is not indice and len(b.indice_prefijos()) == 1
+
+
+def test_union_find():
+    uf = UnionFind("abcde")
+    assert uf.unir("a", "b") and uf.unir("c", "d") and not uf.unir("b", "a")
+    assert uf.miembros("a") == ["a", "b"] and uf.num_conjuntos() == 3
+    uf.unir("d", "a")  # con la caché de miembros ya calculada
+    uf.unir("e", "f")  # da de alta f
+    assert uf.conectados("b", "c") and not uf.conectados("a", "e")
+    assert uf.miembros("c") == ["a", "b", "c", "d"] and uf.tamano("b") == 4  # orden de alta
+    uf.miembros("a").append("x")  # es una copia: la caché no cambia
+    assert uf.miembros("a") == ["a", "b", "c", "d"]
+    assert uf.miembros("f") == ["e", "f"] and uf.tamano("zz") == 0 and uf.miembros("zz") == []
@@ -0,0 +1,45 @@
+import json
+import pytest
+from src import metricas, persistencia
+from src.clases import Biblioteca, Libro
+
+
+@pytest.fixture
+def registro_limpio():
+    estado = metricas.esta_habilitado()
+    metricas.reiniciar()
+    yield
+    metricas.reiniciar()
+    if estado:
+        metricas.habilitar()
+    else:
+        metricas.deshabilitar()
+
+
+def test_deshabilitado_no_registra(registro_limpio):
+    metricas.deshabilitar()
+    b = Biblioteca()
+    b.libros = [Libro("A", "X", "G", 2000)]
+    b.buscar_por_titulo("a")
+    assert metricas.resumen() == {}
+
+
+def test_registra_llamadas_percentiles_y_bytes(registro_limpio, tmp_path, monkeypatch):
+    monkeypatch.setattr(persistencia, "DATA_DIR", str(tmp_path))
+    metricas.habilitar()
+    b = Biblioteca()
+    b.libros = [Libro("A", "X", "G", 2000), Libro("B", "Y", "G", 2001)]
+    for _ in range(10):
+        b.buscar_por_genero("g")
+    persistencia.guardar_datos("libros.json", b.libros)
+
+    datos = metricas.resumen()
+    busqueda = datos["biblioteca.buscar_por_genero"]
+    assert busqueda["llamadas"] == 10
+    assert busqueda["p50_ms"] <= busqueda["p95_ms"] <= busqueda["p99_ms"] <= busqueda["max_ms"]
+    guardado = datos["persistencia.guardar_datos"]
+    assert guardado["bytes_escritos"] == (tmp_path / "libros.json").stat().st_size
+
+    salida = tmp_path / "metricas.json"
+    metricas.volcar(str(salida))
+    assert json.loads(salida.read_text(encoding="utf-8"))["biblioteca.buscar_por_genero"]["llamadas"] == 10
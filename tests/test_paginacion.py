@@ -0,0 +1,24 @@
+from interfaz.paginacion import Paginador
+
+
+def test_paginador_navegacion():
+    items = list(range(45))
+    p = Paginador(len(items), tam_pagina=20)
+    assert p.paginas == 3
+    assert p.rebanada(items) == list(range(20))
+    p.siguiente()
+    assert p.rango() == (20, 40)
+    p.siguiente()
+    assert p.rebanada(items) == list(range(40, 45))
+    assert p.es_ultima()
+    assert p.siguiente() == 3  # no pasa de la última
+    assert p.ir_a(0) == 1
+    assert p.ir_a(99) == 3
+    p.anterior()
+    assert p.pagina == 2
+
+
+def test_paginador_vacio():
+    p = Paginador(0)
+    assert p.paginas == 1
+    assert p.rebanada([]) == []
@@ -0,0 +1,42 @@
+import io
+import os
+import pstats
+import types
+from src.perfilado import Perfilador
+
+
+def _modulo_falso():
+    mod = types.ModuleType("menu_falso")
+
+    def registrar_libro():
+        return sum(i * i for i in range(1000))
+
+    def ver_libros():
+        # una acción que llama a otra acción perfilada no debe romper cProfile
+        return mod.registrar_libro()
+
+    def menu():
+        return mod.ver_libros()
+
+    mod.registrar_libro = registrar_libro
+    mod.ver_libros = ver_libros
+    mod.menu = menu
+    return mod
+
+
+def test_instalar_genera_un_prof_por_accion(tmp_path):
+    mod = _modulo_falso()
+    salida = io.StringIO()
+    p = Perfilador(str(tmp_path), top=5, memoria=True, salida=salida)
+    p.instalar(mod, ["registrar_libro", "ver_libros", "no_existe"])
+
+    assert mod.registrar_libro() == sum(i * i for i in range(1000))
+    mod.menu()
+
+    assert len(p.archivos) == 2
+    nombres = [os.path.basename(r) for r in p.archivos]
+    assert nombres[0].startswith("registrar_libro_") and nombres[1].startswith("ver_libros_")
+    for ruta in p.archivos:
+        assert pstats.Stats(ruta).total_calls > 0
+    assert "[perfil] ver_libros" in salida.getvalue()
+    assert "pico de memoria" in salida.getvalue()
@@ -0,0 +1,150 @@
+import os
+import subprocess
+import sys
+import textwrap
+from src import persistencia
+from src.clases import Libro, Usuario, Prestamo
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _ejecutar_en_otro_proceso(directorio, codigo):
+    """Lanza un proceso Python independiente con data/ apuntando a `directorio`."""
+    prefijo = f"from src import persistencia\npersistencia.DATA_DIR = {str(directorio)!r}\n"
+    return subprocess.Popen([sys.executable, "-c", prefijo + textwrap.dedent(codigo)], cwd=RAIZ)
+
+
+def test_fusion_con_cambios_de_otro_proceso(tmp_path, monkeypatch):
+    monkeypatch.setattr(persistencia, "DATA_DIR", str(tmp_path))
+    u = Usuario("Ana", "u1")
+    libros = [Libro("A", "X", "G", 2000), Libro("B", "Y", "G", 2001)]
+    persistencia.guardar_datos("usuarios.json", [u])
+    persistencia.guardar_datos("libros.json", libros)
+    persistencia.guardar_datos("prestamos.json", [Prestamo(u, libros[0], "2024-01-01 10:00:00")])
+
+    libros = persistencia.cargar_libros()
+    usuarios = persistencia.cargar_usuarios()
+    prestamos = persistencia.cargar_prestamos(libros, usuarios)
+
+    # otra terminal devuelve el préstamo de "A" y presta "B"
+    otro = _ejecutar_en_otro_proceso(tmp_path, """
+        from src.clases import Prestamo, a_marca
+        libros = persistencia.cargar_libros()
+        usuarios = persistencia.cargar_usuarios()
+        prestamos = persistencia.cargar_prestamos(libros, usuarios)
+        prestamos[0].fecha_devolucion = a_marca("2024-01-02 10:00:00")
+        prestamos.append(Prestamo(usuarios[0], libros[1], "2024-01-03 10:00:00"))
+        persistencia.guardar_datos("prestamos.json", prestamos)
+    """)
+    assert otro.wait(timeout=30) == 0
+    assert persistencia.colecciones_modificadas(["prestamos.json"]) == ["prestamos.json"]
+
+    # esta terminal añade su propio préstamo sin haber visto los cambios ajenos
+    nuevo = Usuario("Luis", "u2")
+    prestamos.append(Prestamo(nuevo, libros[0], "2024-01-04 10:00:00"))
+    assert persistencia.guardar_datos("prestamos.json", prestamos) is True
+
+    finales = list(persistencia.iterar_registros("prestamos.json"))
+    por_fecha = {d["fecha_prestamo"]: d for d in finales}
+    assert set(por_fecha) == {"2024-01-01 10:00:00", "2024-01-03 10:00:00", "2024-01-04 10:00:00"}
+    assert por_fecha["2024-01-01 10:00:00"]["fecha_devolucion"] == "2024-01-02 10:00:00"
+    # la fusión deja la colección marcada para recargar
+    assert persistencia.colecciones_modificadas(["prestamos.json"]) == ["prestamos.json"]
+    persistencia.cargar_prestamos(libros, usuarios + [nuevo])
+    assert persistencia.colecciones_modificadas(["prestamos.json"]) == []
+
+
+def test_varios_procesos_no_pierden_altas(tmp_path):
+    codigo = """
+        from src.clases import Usuario
+        for i in range(40):
+            usuarios = persistencia.cargar_usuarios()
+            usuarios.append(Usuario("x", f"{n}-{{i}}"))
+            persistencia.guardar_datos("usuarios.json", usuarios)
+    """
+    procesos = [_ejecutar_en_otro_proceso(tmp_path, codigo.format(n=n)) for n in range(4)]
+    assert all(p.wait(timeout=60) == 0 for p in procesos)
+
+    original = persistencia.DATA_DIR
+    try:
+        persistencia.DATA_DIR = str(tmp_path)
+        ids = {u.id for u in persistencia.cargar_usuarios()}
+    finally:
+        persistencia.DATA_DIR = original
+    assert len(ids) == 160
+
+
+def test_historial_por_meses(tmp_path, monkeypatch):
+    monkeypatch.setattr(persistencia, "DATA_DIR", str(tmp_path))
+    from src.clases import a_marca
+    ana = Usuario("Ana", "u1")
+    libros = [Libro(t, "X", "G", 2000) for t in ("A", "B", "C")]
+    prestamos = [Prestamo(ana, l, "2024-01-01 10:00:00") for l in libros]
+    prestamos[0].fecha_devolucion = a_marca("2024-01-20 10:00:00")
+    prestamos[1].fecha_devolucion = a_marca("2024-02-03 10:00:00")
+
+    assert persistencia.archivar_devueltos(prestamos) == 2
+    assert [p.libro.titulo for p in prestamos] == ["C"]  # solo quedan los activos
+    persistencia.guardar_datos("prestamos.json", prestamos)
+    assert persistencia.meses_historial() == ["2024-01", "2024-02"]
+
+    # los segmentos solo crecen por el final; una línea a medio escribir no se lee
+    prestamos[0].fecha_devolucion = a_marca("2024-02-10 10:00:00")
+    persistencia.archivar_devueltos(prestamos)
+    persistencia.guardar_datos("prestamos.json", prestamos)
+    with open(tmp_path / "historial" / "prestamos-2024-02.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"usuario": ')
+    assert [d["libro"]["titulo"] for d in persistencia.iterar_historial(desde="2024-02")] == ["B", "C"]
+    assert [d["libro"]["titulo"] for d in persistencia.iterar_historial(hasta="2024-01")] == ["A"]
+    assert [d["libro"]["titulo"] for d in persistencia.iterar_prestamos()] == ["A", "B", "C"]
+    assert list(persistencia.iterar_prestamos(activos=True)) == []
+
+
+def test_migracion_de_datos_por_titulo(tmp_path, monkeypatch):
+    monkeypatch.setattr(persistencia, "DATA_DIR", str(tmp_path))
+    # datos guardados antes de existir los ids de libro
+    (tmp_path / "libros.json").write_text(
+        '[{"titulo": "A", "autor": "X", "genero": "G", "year": 2000, "disponible": false},'
+        ' {"titulo": "B", "autor": "Y", "genero": "G", "year": 2001, "disponible": true}]', encoding="utf-8")
+    (tmp_path / "prestamos.json").write_text(
+        '[{"usuario": {"nombre": "Ana", "id": "u1", "tipo": "estudiante"},'
+        ' "libro": {"titulo": "A"}, "fecha_prestamo": "2024-01-01 10:00:00"}]', encoding="utf-8")
+    persistencia.guardar_datos("usuarios.json", [Usuario("Ana", "u1")])
+
+    libros = persistencia.cargar_libros()
+    assert all(l.id for l in libros)
+    assert [l.id for l in persistencia.cargar_libros()] == [l.id for l in libros]  # quedan en disco
+    prestamos = persistencia.cargar_prestamos(libros, persistencia.cargar_usuarios())
+    assert prestamos[0].libro is libros[0]
+
+    # tras renombrar, el préstamo guardado sigue encontrando su libro por id
+    persistencia.guardar_datos("prestamos.json", prestamos)
+    libros[0].titulo = "A (2ª ed.)"
+    persistencia.guardar_datos("libros.json", libros)
+    libros = persistencia.cargar_libros()
+    prestamos = persistencia.cargar_prestamos(libros, persistencia.cargar_usuarios())
+    assert prestamos[0].libro.titulo == "A (2ª ed.)"
+
+
+def test_json_compacto_y_compresion(tmp_path, monkeypatch):
+    monkeypatch.setattr(persistencia, "DATA_DIR", str(tmp_path))
+    libros = [Libro(f"Libro {i}", "Autor", "Género", 2000 + i) for i in range(50)]
+    persistencia.guardar_datos("libros.json", libros)
+    tam_legible = (tmp_path / "libros.json").stat().st_size
+
+    monkeypatch.setattr(persistencia, "JSON_COMPACTO", True)
+    monkeypatch.setattr(persistencia, "COMPRESION", persistencia.leer_compresion("libros.json=gz"))
+    persistencia.guardar_datos("libros.json", libros)
+    assert not (tmp_path / "libros.json").exists()
+    assert (tmp_path / "libros.json.gz").stat().st_size < tam_legible / 4
+    esperado = [l.to_dict() for l in libros]
+    assert [l.to_dict() for l in persistencia.cargar_libros()] == esperado
+    assert list(persistencia.iterar_registros("libros.json", tam_bloque=64)) == esperado
+
+    # cambiar de códec reescribe con la nueva extensión; la carga detecta la que haya
+    monkeypatch.setattr(persistencia, "COMPRESION", persistencia.leer_compresion("xz"))
+    persistencia.guardar_datos("libros.json", libros)
+    assert sorted(p.name for p in tmp_path.glob("libros.json*")) == ["libros.json.lock", "libros.json.version",
+                                                                     "libros.json.xz"]
+    monkeypatch.setattr(persistencia, "COMPRESION", {})
+    assert [l.to_dict() for l in persistencia.cargar_libros()] == esperado
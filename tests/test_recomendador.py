@@ -0,0 +1,92 @@
+from src.clases import Biblioteca, Libro, Usuario, Prestamo
+from src import recomendador
+from src.recomendador import RecomendadorSimilitud, CoPrestamos, rasgos_libro
+
+
+def _catalogo():
+    return [
+        Libro("El hobbit", "J.R.R. Tolkien", "Fantasía", 1937),
+        Libro("El señor de los anillos", "J.R.R. Tolkien", "Fantasía épica", 1954),
+        Libro("Silmarillion", "J.R.R. Tolkien", "Fantasía", 1977),
+        Libro("Terramar", "Ursula K. Le Guin", "Fantasía", 1968),
+        Libro("Dune", "Frank Herbert", "Ciencia ficción", 1965),
+        Libro("Poemas", "Otro", "Poesía", None),
+    ]
+
+
+def test_rasgos_libro():
+    assert rasgos_libro(Libro("X", "  Le  Guin ", "Ciencia de ficción", 1968)) == {
+        "autor:le guin": 3.0, "genero:ciencia": 1.0, "genero:ficcion": 1.0, "decada:1960": 0.5}
+
+
+def test_similares_ordenados_por_puntuacion():
+    libros = _catalogo()
+    r = RecomendadorSimilitud(libros, usar_numpy=False)
+    parecidos = r.similares(libros[1], k=3)
+    assert [l.titulo for l, _ in parecidos] == ["El hobbit", "Silmarillion", "Terramar"]
+    puntuaciones = [p for _, p in parecidos]
+    assert puntuaciones == sorted(puntuaciones, reverse=True) and 0 < puntuaciones[-1] < puntuaciones[0] <= 1
+    # sin rasgos en común no se recomienda
+    assert all(l.titulo != "Poemas" for l, _ in r.similares(libros[0], k=10))
+
+
+def test_actualizar_sigue_al_catalogo():
+    b = Biblioteca()
+    b.agregar_libros(_catalogo())
+    r = RecomendadorSimilitud(usar_numpy=False)
+    r.actualizar(b)
+    hobbit = b.buscar_por_titulo("hobbit")[0]
+    b.agregar_libro(Libro("Cuentos perdidos", "J.R.R. Tolkien", "Fantasía", 1983))
+    r.actualizar(b)
+    assert "Cuentos perdidos" in [l.titulo for l, _ in r.similares(hobbit, k=3)]
+
+    # una baja seguida de un alta deja la misma lista con el mismo tamaño
+    b.eliminar_libro("Cuentos perdidos")
+    b.agregar_libro(Libro("Roverandom", "J.R.R. Tolkien", "Fantasía", 1998))
+    r.actualizar(b)
+    titulos = [l.titulo for l, _ in r.similares(hobbit, k=3)]
+    assert "Roverandom" in titulos and "Cuentos perdidos" not in titulos
+
+    b.buscar_por_titulo("Dune")[0].autor = "J.R.R. Tolkien"  # cambio in-place
+    r.actualizar(b)
+    assert "Dune" in [l.titulo for l, _ in r.similares(hobbit, k=5)]
+
+
+def test_numpy_y_python_coinciden():
+    if recomendador.np is None:
+        return
+    libros = _catalogo()
+    a = RecomendadorSimilitud(libros, usar_numpy=False).similares(libros[0], k=4)
+    b = RecomendadorSimilitud(libros, usar_numpy=True).similares(libros[0], k=4)
+    assert [l.titulo for l, _ in a] == [l.titulo for l, _ in b]
+    assert all(abs(x - y) < 1e-12 for (_, x), (_, y) in zip(a, b))
+
+
+def test_coprestamos_incremental():
+    a, b, c, d = (Libro(t, "x", "g", 2000) for t in "ABCD")
+    ana, luis, eva = Usuario("Ana", "u1"), Usuario("Luis", "u2"), Usuario("Eva", "u3")
+    co = CoPrestamos([Prestamo(ana, a), Prestamo(ana, b), Prestamo(ana, b), Prestamo(luis, a), Prestamo(luis, c)])
+    assert co.tambien_prestados(a) == [("B", 1), ("C", 1)]
+    assert co.tambien_prestados(d) == []
+
+    # un préstamo nuevo actualiza las listas ya calculadas de los libros afectados
+    co.registrar(Prestamo(eva, c))
+    co.registrar(Prestamo(eva, a))
+    assert co.tambien_prestados(a) == [("C", 2), ("B", 1)]
+    assert co.tambien_prestados(c, k=1) == [("A", 2)]
+
+    desde_json = CoPrestamos()
+    desde_json.construir_desde_registros(p.to_dict() for p in [Prestamo(ana, a), Prestamo(luis, a), Prestamo(luis, d)])
+    assert desde_json.tambien_prestados(d.id) == [("A", 1)]
+
+    # por id: renombrar no parte el historial y un título repetido no se mezcla
+    otra_a = Libro("A", "y", "g", 2001)
+    co.registrar(Prestamo(luis, otra_a))
+    a.titulo = "A (2.ª ed.)"
+    assert co.tambien_prestados(c) == [("A (2.ª ed.)", 2), ("A", 1)]
+    # registros antiguos sin id se resuelven por título en el catálogo
+    antiguos = [p.to_dict() for p in [Prestamo(ana, b), Prestamo(ana, d)]]
+    for r in antiguos:
+        del r["libro"]["id"]
+    desde_json.construir_desde_registros(antiguos, libros=[b, d])
+    assert desde_json.tambien_prestados(b) == [("D", 1)]
@@ -0,0 +1,134 @@
+import asyncio
+import json
+from src import persistencia
+from src.clases import Libro, Usuario
+from src.servidor import ServidorBiblioteca
+
+
+async def _pedir(puerto, metodo, ruta, cuerpo=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", puerto)
+    datos = json.dumps(cuerpo).encode() if cuerpo is not None else b""
+    writer.write(f"{metodo} {ruta} HTTP/1.1\r\nContent-Length: {len(datos)}\r\nConnection: close\r\n\r\n".encode() + datos)
+    respuesta = await reader.read()
+    writer.close()
+    cabecera, _, cuerpo = respuesta.partition(b"\r\n\r\n")
+    return int(cabecera.split()[1]), json.loads(cuerpo)
+
+
+def test_servidor_prestamo_cola_y_devolucion(tmp_path, monkeypatch):
+    monkeypatch.setattr(persistencia, "DATA_DIR", str(tmp_path))
+    persistencia.guardar_datos("libros.json", [Libro("Dune", "Herbert", "Ciencia ficción", 1965),
+                                               Libro("Hijos de Dune", "Herbert", "Ciencia ficción", 1976)])
+    persistencia.guardar_datos("usuarios.json", [Usuario("Ana", "u1"), Usuario("Luis", "u2", "profesor")])
+
+    async def escenario():
+        servidor = ServidorBiblioteca(puerto=0, intervalo_guardado=0.01)
+        puerto = await servidor.iniciar()
+        try:
+            estado, datos = await _pedir(puerto, "GET", "/libros?titulo=dune&limite=1")
+            assert estado == 200 and datos["total"] == 2 and len(datos["libros"]) == 1
+
+            estado, datos = await _pedir(puerto, "GET", "/recomendaciones?titulo=Dune")
+            assert datos["recomendaciones"] == ["Hijos de Dune"]
+            estado, datos = await _pedir(puerto, "GET", "/tambien-prestados?titulo=Dune")
+            assert estado == 200 and datos["tambien_prestados"] == []
+
+            estado, _ = await _pedir(puerto, "POST", "/prestamos", {"id_usuario": "u1", "titulo": "dune"})
+            assert estado == 201
+            estado, datos = await _pedir(puerto, "POST", "/prestamos", {"id_usuario": "u2", "titulo": "Dune"})
+            assert estado == 202 and datos["posicion"] == 1
+
+            estado, datos = await _pedir(puerto, "POST", "/devoluciones", {"titulo": "Dune"})
+            assert estado == 200 and datos["procesados"][0]["usuario"]["id"] == "u2"
+
+            estado, datos = await _pedir(puerto, "GET", "/estadisticas")
+            assert datos["mas_prestados"] == [{"titulo": "Dune", "prestamos": 2}]
+            assert datos["activos_por_tipo"] == {"profesor": 1}
+            assert datos["disponibilidad"] == {"libros": 2, "disponibles": 1, "prestados": 1}
+
+            # el préstamo del profesor (30 días) solo aparece mirando más de 30 días adelante
+            estado, datos = await _pedir(puerto, "GET", "/vencimientos")
+            assert estado == 200 and datos["total_vencidos"] == datos["total_proximos"] == 0
+            estado, datos = await _pedir(puerto, "GET", "/vencimientos?dias=31")
+            assert [p["usuario"]["id"] for p in datos["proximos"]] == ["u2"]
+
+            assert (await _pedir(puerto, "POST", "/prestamos", {"id_usuario": "x", "titulo": "Dune"}))[0] == 404
+            assert (await _pedir(puerto, "POST", "/prestamos", {"titulo": "Dune"}))[0] == 400
+            assert (await _pedir(puerto, "DELETE", "/libros"))[0] == 405
+        finally:
+            await servidor.cerrar()
+
+    asyncio.run(escenario())
+
+    # el préstamo devuelto pasa al historial; prestamos.json queda solo con el activo
+    prestamos = list(persistencia.iterar_registros("prestamos.json"))
+    assert [(p["usuario"]["id"], bool(p["fecha_devolucion"])) for p in prestamos] == [("u2", False)]
+    assert [p["usuario"]["id"] for p in persistencia.iterar_historial()] == ["u1"]
+    assert list(persistencia.iterar_registros("solicitudes.json")) == []
+
+
+def test_servidor_ejemplares_con_el_mismo_titulo(tmp_path, monkeypatch):
+    monkeypatch.setattr(persistencia, "DATA_DIR", str(tmp_path))
+    dune, copia = Libro("Dune", "Herbert", "Ciencia ficción", 1965), Libro("Dune", "Herbert", "Ciencia ficción", 1965)
+    persistencia.guardar_datos("libros.json", [dune, copia])
+    persistencia.guardar_datos("usuarios.json", [Usuario("Ana", "u1"), Usuario("Luis", "u2"), Usuario("Eva", "u3")])
+
+    async def escenario():
+        servidor = ServidorBiblioteca(puerto=0, intervalo_guardado=0.01)
+        puerto = await servidor.iniciar()
+        try:
+            prestados = []
+            for usuario in ("u1", "u2"):
+                estado, datos = await _pedir(puerto, "POST", "/prestamos", {"id_usuario": usuario, "titulo": "dune"})
+                assert estado == 201
+                prestados.append(datos["prestamo"]["libro"]["id"])
+            assert sorted(prestados) == sorted([dune.id, copia.id])
+            assert (await _pedir(puerto, "POST", "/prestamos", {"id_usuario": "u3", "titulo": "Dune"}))[0] == 202
+
+            # cada ejemplar prestado se puede devolver: por id o por título y usuario
+            estado, datos = await _pedir(puerto, "POST", "/devoluciones", {"titulo": "Dune", "id_usuario": "u2"})
+            assert estado == 200 and datos["devuelto"]["usuario"]["id"] == "u2"
+            # la solicitud por título la atiende el ejemplar que acaba de quedar libre
+            assert [(p["usuario"]["id"], p["libro"]["id"]) for p in datos["procesados"]] == [("u3", prestados[1])]
+            estado, datos = await _pedir(puerto, "POST", "/devoluciones", {"id_libro": prestados[0]})
+            assert estado == 200 and datos["devuelto"]["usuario"]["id"] == "u1"
+            assert (await _pedir(puerto, "POST", "/devoluciones", {"id_libro": "no-existe"}))[0] == 404
+        finally:
+            await servidor.cerrar()
+
+    asyncio.run(escenario())
+
+
+def test_servidor_recarga_lo_fusionado_y_rechaza_lineas_largas(tmp_path, monkeypatch):
+    monkeypatch.setattr(persistencia, "DATA_DIR", str(tmp_path))
+    persistencia.guardar_datos("libros.json", [Libro("Dune", "Herbert", "Ciencia ficción", 1965)])
+    persistencia.guardar_datos("usuarios.json", [Usuario("Ana", "u1")])
+
+    async def escenario():
+        servidor = ServidorBiblioteca(puerto=0, intervalo_guardado=60)
+        puerto = await servidor.iniciar()
+        try:
+            # otro proceso añade un libro sin que el servidor lo haya leído
+            ruta = persistencia._ruta("libros.json")
+            vista, base = persistencia._versiones_vistas[ruta], persistencia._base[ruta]
+            otro = persistencia.cargar_libros() + [Libro("Hyperion", "Simmons", "Ciencia ficción", 1989)]
+            persistencia.guardar_datos("libros.json", otro)
+            persistencia._versiones_vistas[ruta], persistencia._base[ruta] = vista, base
+
+            assert (await _pedir(puerto, "POST", "/prestamos", {"id_usuario": "u1", "titulo": "Dune"}))[0] == 201
+            await servidor.guardar_pendientes()
+            estado, datos = await _pedir(puerto, "GET", "/libros?titulo=hyperion")
+            assert estado == 200 and datos["total"] == 1
+            estado, datos = await _pedir(puerto, "GET", "/libros?disponibles=1")
+            assert [l["titulo"] for l in datos["libros"]] == ["Hyperion"]
+            assert (await _pedir(puerto, "POST", "/devoluciones", {"titulo": "Dune"}))[0] == 200
+
+            reader, writer = await asyncio.open_connection("127.0.0.1", puerto)
+            writer.write(b"GET /" + b"x" * 70000 + b" HTTP/1.1\r\n\r\n")
+            respuesta = await reader.read()
+            writer.close()
+            assert respuesta.startswith(b"HTTP/1.1 400")
+        finally:
+            await servidor.cerrar()
+
+    asyncio.run(escenario())
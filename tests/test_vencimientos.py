@@ -0,0 +1,53 @@
+import random
+from src.clases import Libro, Usuario, Prestamo, SolicitudPrestamo, a_marca, formatear_fecha
+from src.vencimientos import IndiceVencimientos
+
+
+def test_vencimiento_segun_tipo_y_datos_antiguos():
+    ana, luis = Usuario("Ana", "u1"), Usuario("Luis", "u2", "profesor")
+    libro = Libro("Dune", "Herbert", "Ciencia ficción", 1965)
+    vence = lambda p: formatear_fecha(p.fecha_vencimiento)
+    assert vence(Prestamo(ana, libro, "2025-01-01 10:00:00")) == "2025-01-15 10:00:00"
+    assert vence(Prestamo(luis, libro, "2025-01-01 10:00:00")) == "2025-01-31 10:00:00"
+
+    # prestamos.json anterior al vencimiento: se calcula al cargar
+    datos = Prestamo(ana, libro, "2025-01-01 10:00:00").to_dict()
+    del datos["fecha_vencimiento"]
+    assert vence(Prestamo.from_dict(datos, [ana], [libro])) == "2025-01-15 10:00:00"
+
+
+def test_fechas_como_marcas_y_texto_en_json():
+    ana, libro = Usuario("Ana", "u1"), Libro("Dune", "Herbert", "Ciencia ficción", 1965)
+    p = Prestamo(ana, libro, "2024-01-01 10:00:00")
+    p.fecha_devolucion = a_marca("2024-01-02 10:00:00")
+    assert isinstance(p.fecha_prestamo, int) and p.fecha_devolucion - p.fecha_prestamo == 24 * 3600
+    datos = p.to_dict()
+    assert (datos["fecha_prestamo"], datos["fecha_devolucion"]) == ("2024-01-01 10:00:00", "2024-01-02 10:00:00")
+    assert Prestamo.from_dict(datos, [ana], [libro]).fecha_devolucion == p.fecha_devolucion
+
+    s = SolicitudPrestamo.from_dict({"id_usuario": "u1", "titulo_libro": "Dune", "fecha_solicitud": "2024-03-01 08:30:00"})
+    assert s.fecha_solicitud == a_marca("2024-03-01 08:30:00")
+    assert s.to_dict()["fecha_solicitud"] == "2024-03-01 08:30:00"
+
+
+def test_vencidos_y_proximos_coinciden_con_recorrer_todo():
+    rnd = random.Random(7)
+    usuarios = [Usuario(f"U{i}", f"u{i}", rnd.choice(["estudiante", "profesor"])) for i in range(20)]
+    libro = Libro("Dune", "Herbert", "Ciencia ficción", 1965)
+    inicio = a_marca("2025-01-01 00:00:00")
+    prestamos = [Prestamo(rnd.choice(usuarios), libro, inicio + rnd.randint(0, 365) * 86400) for _ in range(300)]
+    for p in prestamos[:100]:
+        p.fecha_devolucion = inicio
+    indice = IndiceVencimientos(prestamos)
+    for p in prestamos[150:250]:
+        p.devolver()  # se quita solo del índice
+    nuevo = Prestamo(usuarios[0], libro, "2025-06-01 12:00:00")
+    prestamos.append(nuevo)
+    indice.agregar(nuevo)
+    assert len(indice) == 101 and nuevo in indice
+
+    ahora = a_marca("2025-07-01 00:00:00")
+    activos = sorted((p for p in prestamos if p.fecha_devolucion is None), key=lambda p: p.fecha_vencimiento)
+    assert indice.vencidos(ahora) == [p for p in activos if p.vencido(ahora)]
+    assert indice.proximos(10, ahora) == [p for p in activos if ahora < p.fecha_vencimiento <= ahora + 10 * 86400]
+    assert indice.siguiente() is activos[0]